@@ -1,7 +1,7 @@
 from http.server import BaseHTTPRequestHandler
 import json
 import os
-from apps.storage import Repo
+from apps.notify.callbacks import parse_callback, ingest_callback_events
 from apps.common import get_logger
 
 logger = get_logger(__name__)
@@ -35,35 +35,15 @@ class handler(BaseHTTPRequestHandler):
             post_data = self.rfile.read(content_length)
             body = json.loads(post_data.decode('utf-8'))
 
-            logger.info(f"Received callback: {body}")
-
-            # Extract callback data (format varies by provider)
-            request_id = body.get('requestId') or body.get('request_id')
-            result_code = body.get('resultCode') or body.get('result_code') or body.get('code')
-            result_message = body.get('resultMessage') or body.get('result_message') or body.get('message')
-
-            if not request_id:
+            events = parse_callback(body)
+            if not events:
                 logger.error("No requestId in callback")
                 self._send_response(400, {'error': 'Missing requestId'})
                 return
 
-            # Determine status from result code
-            status = 'failed'
-            if result_code in ['0000', '200', 'success']:
-                status = 'delivered'
-            elif result_code in ['3000', '3001']:  # Recipient unavailable
-                status = 'failed'
-
-            # Update notification log
-            # Note: In a production system, you'd query by request_id
-            # For now, we'll log the callback
-            logger.info(
-                f"Callback received - requestId: {request_id}, "
-                f"resultCode: {result_code}, status: {status}"
-            )
-
-            # TODO: Implement proper request_id to notification_log mapping
-            # Repo.update_notification_status(log_id, status, result_code, result_message)
+            # Queue for bulk application; no per-row DB writes while the provider waits
+            outcome = ingest_callback_events(events)
+            logger.info(f"Delivery callback: {len(events)} events {outcome}")
 
             self._send_response(200, {'success': True})
 
@@ -0,0 +1,43 @@
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import json
+import os
+from apps.storage.instrumentation import load_published_snapshots, render_prometheus
+from apps.common import get_logger
+
+logger = get_logger(__name__)
+
+
+class handler(BaseHTTPRequestHandler):
+    """Serverless function exposing DB metrics published by worker processes."""
+
+    def _send_response(self, status_code: int, body: str, content_type: str = 'application/json'):
+        """Send response."""
+        self.send_response(status_code)
+        self.send_header('Content-type', content_type)
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
+    def do_GET(self):
+        """Return per-process DB metrics as JSON, or Prometheus text with ?format=prometheus."""
+        try:
+            # Verify internal API token
+            auth_header = self.headers.get('Authorization', '')
+            expected_token = os.environ.get('REV_INTERNAL_API_TOKEN', '')
+
+            if expected_token and not auth_header.endswith(expected_token):
+                self._send_response(401, json.dumps({'error': 'Unauthorized'}))
+                return
+
+            snapshots = load_published_snapshots()
+            query = parse_qs(urlparse(self.path).query)
+
+            if query.get('format', [''])[0] == 'prometheus':
+                self._send_response(200, render_prometheus(snapshots), 'text/plain; version=0.0.4')
+                return
+
+            self._send_response(200, json.dumps({'processes': snapshots}))
+
+        except Exception as e:
+            logger.error(f"Metrics endpoint error: {e}")
+            self._send_response(500, json.dumps({'error': str(e)}))
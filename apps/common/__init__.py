@@ -1,4 +1,6 @@
 from .config import settings, get_settings
 from .logger import get_logger
+from .redis_client import get_redis
+from .text import normalize_text
 
-__all__ = ["settings", "get_settings", "get_logger"]
+__all__ = ["settings", "get_settings", "get_logger", "get_redis", "normalize_text"]
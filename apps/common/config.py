@@ -10,10 +10,17 @@ class Settings(BaseSettings):
     db_url: str = Field(alias="REV_DB_URL")
     db_pool_size: int = Field(default=5, alias="REV_DB_POOL_SIZE")  # Reduced from 10
     db_max_overflow: int = Field(default=10, alias="REV_DB_MAX_OVERFLOW")  # Reduced from 20
+    db_metrics_enabled: bool = Field(default=True, alias="REV_DB_METRICS_ENABLED")
+    db_slow_query_ms: int = Field(default=500, alias="REV_DB_SLOW_QUERY_MS")
+    db_metrics_publish_interval_sec: int = Field(default=30, alias="REV_DB_METRICS_PUBLISH_INTERVAL_SEC")
 
     # Redis
     redis_url: str = Field(alias="REV_REDIS_URL")
 
+    # Hospital / contact read-through cache
+    hospital_cache_ttl_sec: int = Field(default=300, alias="REV_HOSPITAL_CACHE_TTL_SEC")  # Redis layer
+    hospital_cache_local_ttl_sec: int = Field(default=30, alias="REV_HOSPITAL_CACHE_LOCAL_TTL_SEC")  # In-process layer
+
     # Crawler settings
     crawl_concurrency_default: int = Field(default=2, alias="REV_CRAWL_CONCURRENCY_DEFAULT")  # Reduced from 3
     playwright_headless: bool = Field(default=True, alias="REV_PLAYWRIGHT_HEADLESS")
@@ -38,17 +45,90 @@ class Settings(BaseSettings):
     # Sentiment Analysis
     transformers_cache: str = Field(default="/data/hf_cache", alias="TRANSFORMERS_CACHE")
     sentiment_batch_size: int = Field(default=16, alias="REV_SENTIMENT_BATCH_SIZE")  # Batch processing
+    # Padded tokens per batch (items x longest item); defaults to batch_size x 256 when unset
+    sentiment_token_budget: Optional[int] = Field(default=None, alias="REV_SENTIMENT_TOKEN_BUDGET")
+    sentiment_max_batch_items: int = Field(default=64, alias="REV_SENTIMENT_MAX_BATCH_ITEMS")
+    sentiment_model_version: Optional[str] = Field(default=None, alias="REV_SENTIMENT_MODEL_VERSION")  # Defaults to model:backend
+    sentiment_cache_enabled: bool = Field(default=True, alias="REV_SENTIMENT_CACHE_ENABLED")
+    sentiment_cache_ttl_sec: int = Field(default=30 * 24 * 3600, alias="REV_SENTIMENT_CACHE_TTL_SEC")
+    sentiment_cache_local_size: int = Field(default=10000, alias="REV_SENTIMENT_CACHE_LOCAL_SIZE")
+    sentiment_backend: str = Field(default="torch", alias="REV_SENTIMENT_BACKEND")  # torch | onnx
+    sentiment_onnx_path: str = Field(default="/data/hf_cache/onnx/model.int8.onnx", alias="REV_SENTIMENT_ONNX_PATH")
+    sentiment_preload: bool = Field(default=True, alias="REV_SENTIMENT_PRELOAD")  # Load model at worker start
+    # CPU layout (apps.sentiment.parallel); unset = derived from available cores
+    sentiment_cpu_cores: Optional[int] = Field(default=None, alias="REV_SENTIMENT_CPU_CORES")
+    sentiment_intra_op_threads: Optional[int] = Field(default=None, alias="REV_SENTIMENT_INTRA_OP_THREADS")
+    sentiment_inter_op_threads: Optional[int] = Field(default=None, alias="REV_SENTIMENT_INTER_OP_THREADS")
+    sentiment_shard_processes: Optional[int] = Field(default=None, alias="REV_SENTIMENT_SHARD_PROCESSES")  # 1 = off
+    sentiment_shard_min_items: int = Field(default=32, alias="REV_SENTIMENT_SHARD_MIN_ITEMS")
+    # Lexical pre-classifier: confident positives skip the transformer
+    sentiment_prefilter_enabled: bool = Field(default=True, alias="REV_SENTIMENT_PREFILTER_ENABLED")
+    sentiment_prefilter_threshold: float = Field(default=0.85, alias="REV_SENTIMENT_PREFILTER_THRESHOLD")
+    # Share of accepted reviews also run through the model to measure agreement
+    sentiment_prefilter_audit_rate: float = Field(default=0.05, alias="REV_SENTIMENT_PREFILTER_AUDIT_RATE")
+    # Shared inference server (apps.sentiment.server); unset = in-process model
+    sentiment_server_socket: Optional[str] = Field(default=None, alias="REV_SENTIMENT_SERVER_SOCKET")
+    sentiment_server_batch_window_ms: int = Field(default=20, alias="REV_SENTIMENT_SERVER_BATCH_WINDOW_MS")
+    sentiment_server_max_items: int = Field(default=256, alias="REV_SENTIMENT_SERVER_MAX_ITEMS")
+    sentiment_server_timeout_sec: float = Field(default=120.0, alias="REV_SENTIMENT_SERVER_TIMEOUT_SEC")
+    # How long callers wait for an unreachable server before failing (no in-process fallback)
+    sentiment_server_wait_sec: float = Field(default=60.0, alias="REV_SENTIMENT_SERVER_WAIT_SEC")
+    # New-review events (Redis stream) consumed by apps.sentiment.consumer
+    review_events_enabled: bool = Field(default=True, alias="REV_REVIEW_EVENTS_ENABLED")
+    review_events_maxlen: int = Field(default=100000, alias="REV_REVIEW_EVENTS_MAXLEN")  # Approximate stream cap
+    sentiment_consumer_batch_size: int = Field(default=32, alias="REV_SENTIMENT_CONSUMER_BATCH_SIZE")
+    sentiment_consumer_block_ms: int = Field(default=5000, alias="REV_SENTIMENT_CONSUMER_BLOCK_MS")
+    # Events delivered this many times without being acknowledged go to the dead-letter stream
+    sentiment_consumer_max_deliveries: int = Field(default=5, alias="REV_SENTIMENT_CONSUMER_MAX_DELIVERIES")
+    # Periodic sweep only picks up reviews older than this (newer ones belong to the consumer)
+    sentiment_sweep_grace_min: int = Field(default=10, alias="REV_SENTIMENT_SWEEP_GRACE_MIN")
 
     # Notification
+    # Registered provider name (apps/notify/providers): nhn_bizmessage, or mock for offline load tests
     alim_provider: str = Field(default="nhn_bizmessage", alias="REV_ALIM_PROVIDER")
     alim_appkey: Optional[str] = Field(default=None, alias="REV_ALIM_APPKEY")
     alim_secret: Optional[str] = Field(default=None, alias="REV_ALIM_SECRET")
     alim_sender_key: Optional[str] = Field(default=None, alias="REV_ALIM_SENDER_KEY")
     alim_template_code: str = Field(default="RV_NEG_REVIEW_ALERT_01", alias="REV_ALIM_TEMPLATE_CODE")
+    # Redis claim per (hospital, review, recipient) covering an in-flight send; kept 24h once sent
     alim_idempotency_ttl_min: int = Field(default=10, alias="REV_ALIM_IDEMPOTENCY_TTL_MIN")
+    alim_base_url: str = Field(default="https://api-alimtalk.cloud.toast.com", alias="REV_ALIM_BASE_URL")
+    alim_digest_template_code: str = Field(default="RV_NEG_REVIEW_DIGEST_01", alias="REV_ALIM_DIGEST_TEMPLATE_CODE")
+    # After an alert, a hospital's further flagged reviews wait this long and go out as one digest (0 = off)
+    notify_digest_window_min: int = Field(default=10, alias="REV_NOTIFY_DIGEST_WINDOW_MIN")
+    notify_digest_max_snippets: int = Field(default=3, alias="REV_NOTIFY_DIGEST_MAX_SNIPPETS")
+    # In-flight provider sends per notification run, overall and per hospital
+    notify_max_concurrency: int = Field(default=10, alias="REV_NOTIFY_MAX_CONCURRENCY")
+    notify_per_hospital_concurrency: int = Field(default=3, alias="REV_NOTIFY_PER_HOSPITAL_CONCURRENCY")
+    notify_http_timeout_sec: float = Field(default=30.0, alias="REV_NOTIFY_HTTP_TIMEOUT_SEC")
+    # Provider requests per second across all processes (Redis token bucket; 0 = unlimited)
+    alim_rate_limit_per_sec: float = Field(default=50.0, alias="REV_ALIM_RATE_LIMIT_PER_SEC")
+    sms_rate_limit_per_sec: float = Field(default=20.0, alias="REV_SMS_RATE_LIMIT_PER_SEC")
+    # Failed AlimTalk sends: retried with exponential backoff (+ jitter) up to this many
+    # attempts in total, then resent by SMS when the fallback is enabled
+    notify_retry_max_attempts: int = Field(default=4, alias="REV_NOTIFY_RETRY_MAX_ATTEMPTS")
+    notify_retry_base_sec: int = Field(default=60, alias="REV_NOTIFY_RETRY_BASE_SEC")
+    notify_retry_max_sec: int = Field(default=1800, alias="REV_NOTIFY_RETRY_MAX_SEC")
+    sms_fallback_enabled: bool = Field(default=False, alias="REV_SMS_FALLBACK_ENABLED")
+    sms_appkey: Optional[str] = Field(default=None, alias="REV_SMS_APPKEY")
+    sms_secret: Optional[str] = Field(default=None, alias="REV_SMS_SECRET")
+    sms_sender_no: Optional[str] = Field(default=None, alias="REV_SMS_SENDER_NO")  # Pre-registered sender number
+    sms_base_url: str = Field(default="https://api-sms.cloud.toast.com", alias="REV_SMS_BASE_URL")
+    mock_provider_latency_ms: int = Field(default=50, alias="REV_MOCK_PROVIDER_LATENCY_MS")
+    mock_provider_error_rate: float = Field(default=0.0, alias="REV_MOCK_PROVIDER_ERROR_RATE")
+    mock_provider_recipient_error_rate: float = Field(default=0.0, alias="REV_MOCK_PROVIDER_RECIPIENT_ERROR_RATE")
     quiet_hours_start: str = Field(default="22:00", alias="REV_QUIET_HOURS_START")
     quiet_hours_end: str = Field(default="08:00", alias="REV_QUIET_HOURS_END")
+    # Quiet hours apply in each hospital's timezone (hospitals.timezone, else this one)
+    default_timezone: str = Field(default="Asia/Seoul", alias="REV_DEFAULT_TIMEZONE")
+    # Deferred notifications go out over this many minutes after quiet hours end,
+    # at most this many hospitals per release run (every minute)
+    notify_quiet_release_spread_min: int = Field(default=30, alias="REV_NOTIFY_QUIET_RELEASE_SPREAD_MIN")
+    notify_quiet_release_batch: int = Field(default=50, alias="REV_NOTIFY_QUIET_RELEASE_BATCH")
     callback_verify_token: Optional[str] = Field(default=None, alias="REV_CALLBACK_VERIFY_TOKEN")
+    # Delivery callbacks are queued on a Redis stream and applied in bulk by a periodic task
+    callback_events_maxlen: int = Field(default=100000, alias="REV_CALLBACK_EVENTS_MAXLEN")
+    callback_batch_size: int = Field(default=500, alias="REV_CALLBACK_BATCH_SIZE")
 
     # Performance
     log_level: str = Field(default="INFO", alias="REV_LOG_LEVEL")
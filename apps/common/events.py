@@ -0,0 +1,75 @@
+from typing import Iterable, List
+from redis import RedisError
+from apps.common.config import settings
+from apps.common.logger import get_logger
+from apps.common.redis_client import get_redis
+
+logger = get_logger(__name__)
+
+# Redis stream of newly inserted review IDs (consumed by apps.sentiment.consumer)
+NEW_REVIEWS_STREAM = "revmon:reviews:new"
+
+# Events that failed REV_SENTIMENT_CONSUMER_MAX_DELIVERIES times, kept for inspection
+NEW_REVIEWS_DEAD_STREAM = "revmon:reviews:new:dead"
+
+# Redis stream of provider delivery callbacks (applied by apps.notify.callbacks)
+DELIVERY_CALLBACKS_STREAM = "revmon:notify:callbacks"
+
+
+def publish_new_reviews(hospital_id: str, review_ids: Iterable) -> int:
+    """
+    Announce committed reviews on NEW_REVIEWS_STREAM.
+
+    Call only after the inserting transaction has committed. Failures are
+    logged and swallowed: the periodic sentiment sweep still picks the reviews up.
+
+    Returns:
+        int: Number of events published
+    """
+    review_ids = [str(review_id) for review_id in review_ids]
+    if not settings.review_events_enabled or not review_ids:
+        return 0
+
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for review_id in review_ids:
+            pipe.xadd(
+                NEW_REVIEWS_STREAM,
+                {"review_id": review_id, "hospital_id": str(hospital_id)},
+                maxlen=settings.review_events_maxlen,
+                approximate=True
+            )
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Failed to publish {len(review_ids)} new-review events: {e}")
+        return 0
+
+    return len(review_ids)
+
+
+def publish_delivery_callbacks(events: List[dict]) -> int:
+    """
+    Queue parsed delivery callbacks on DELIVERY_CALLBACKS_STREAM.
+
+    Returns:
+        int: Number of events queued; 0 on Redis failure, in which case the
+             caller must apply the events itself
+    """
+    if not events:
+        return 0
+
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for event in events:
+            pipe.xadd(
+                DELIVERY_CALLBACKS_STREAM,
+                {k: "" if v is None else str(v) for k, v in event.items()},
+                maxlen=settings.callback_events_maxlen,
+                approximate=True
+            )
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Failed to queue {len(events)} delivery callbacks: {e}")
+        return 0
+
+    return len(events)
@@ -0,0 +1,23 @@
+import redis
+from typing import Optional
+from apps.common.config import settings
+from apps.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Shared Redis client (one connection pool per process)
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Get or create the shared Redis client for application data (not the Celery broker)."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.redis_url,
+            decode_responses=True,
+            socket_timeout=2,
+            socket_connect_timeout=2,
+            health_check_interval=30
+        )
+    return _client
@@ -0,0 +1,5 @@
+def normalize_text(text: str) -> str:
+    """Normalize text for consistent hashing."""
+    # Remove extra whitespace, normalize line breaks
+    text = " ".join(text.split())
+    return text.strip().lower()
@@ -1,12 +1,6 @@
 import hashlib
 from typing import Optional
-
-
-def normalize_text(text: str) -> str:
-    """Normalize text for consistent hashing."""
-    # Remove extra whitespace, normalize line breaks
-    text = " ".join(text.split())
-    return text.strip().lower()
+from apps.common.text import normalize_text
 
 
 def generate_review_hash(content: str, rating: Optional[int], date_text: Optional[str]) -> str:
@@ -7,6 +7,7 @@ from apps.crawler.parser import ReviewParser
 from apps.crawler.dedupe import generate_review_hash
 from apps.storage import Repo
 from apps.common import settings, get_logger
+from apps.common.events import publish_new_reviews
 
 logger = get_logger(__name__)
 
@@ -67,52 +68,59 @@ class CrawlerWorker:
                 "error": "No reviews found"
             }
 
-        # Save reviews to database
+        # Save reviews and crawl time in one transaction (one pooled connection, one commit)
         new_count = 0
-        for review_data in parsed_reviews:
-            # Generate hash for deduplication
-            review_hash = generate_review_hash(
-                review_data["content"],
-                review_data.get("rating"),
-                review_data.get("date_text")
-            )
-
-            # Check if review already exists
-            if Repo.review_exists(review_hash):
-                logger.info(f"Review already exists (hash: {review_hash[:8]}...), stopping incremental crawl")
-                # For incremental crawls, stop when we hit a duplicate
-                if not is_initial:
-                    break
-                continue
-
-            # Save snapshot only if enabled (saves disk space)
-            snapshot_path = None
-            if self.snapshot_enabled:
+        new_review_ids = []
+        with Repo.transaction():
+            for review_data in parsed_reviews:
+                # Generate hash for deduplication
+                review_hash = generate_review_hash(
+                    review_data["content"],
+                    review_data.get("rating"),
+                    review_data.get("date_text")
+                )
+
+                # Check if review already exists
+                if Repo.review_exists(review_hash):
+                    logger.info(f"Review already exists (hash: {review_hash[:8]}...), stopping incremental crawl")
+                    # For incremental crawls, stop when we hit a duplicate
+                    if not is_initial:
+                        break
+                    continue
+
+                # Save snapshot only if enabled (saves disk space)
+                snapshot_path = None
+                if self.snapshot_enabled:
+                    try:
+                        snapshot_path = f"{self.snapshot_dir}/review_{review_hash[:16]}.html"
+                        with open(snapshot_path, 'w', encoding='utf-8') as f:
+                            f.write(review_data.get("raw_html", ""))
+                    except Exception as e:
+                        logger.error(f"Failed to save snapshot: {e}")
+
+                # Create review in database (savepoint: one bad row doesn't abort the batch)
                 try:
-                    snapshot_path = f"{self.snapshot_dir}/review_{review_hash[:16]}.html"
-                    with open(snapshot_path, 'w', encoding='utf-8') as f:
-                        f.write(review_data.get("raw_html", ""))
+                    with Repo.transaction():
+                        review = Repo.create_review(
+                            hospital_id=hospital_id,
+                            review_hash=review_hash,
+                            content=review_data["content"],
+                            rating=review_data.get("rating"),
+                            is_receipt=review_data.get("is_receipt", False),
+                            created_at_page_text=review_data.get("date_text"),
+                            raw_snapshot_path=snapshot_path
+                        )
+                    new_count += 1
+                    new_review_ids.append(review.id)
                 except Exception as e:
-                    logger.error(f"Failed to save snapshot: {e}")
-
-            # Create review in database
-            try:
-                Repo.create_review(
-                    hospital_id=hospital_id,
-                    review_hash=review_hash,
-                    content=review_data["content"],
-                    rating=review_data.get("rating"),
-                    is_receipt=review_data.get("is_receipt", False),
-                    created_at_page_text=review_data.get("date_text"),
-                    raw_snapshot_path=snapshot_path
-                )
-                new_count += 1
-            except Exception as e:
-                logger.error(f"Failed to save review: {e}")
-                continue
+                    logger.error(f"Failed to save review: {e}")
+                    continue
+
+            # Update hospital's last crawl time
+            Repo.update_hospital_crawl_time(hospital_id)
 
-        # Update hospital's last crawl time
-        Repo.update_hospital_crawl_time(hospital_id)
+        # Committed: hand new reviews to the sentiment consumer
+        publish_new_reviews(hospital_id, new_review_ids)
 
         logger.info(f"Crawl completed for hospital {hospital_id}: {new_count} new reviews")
 
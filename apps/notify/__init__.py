@@ -1,7 +1,8 @@
 from .worker import run_notification_worker, send_notification_for_review
+from .retry import run_notification_retries
 from .dedup import generate_dedup_key, check_duplicate
 
 __all__ = [
-    "run_notification_worker", "send_notification_for_review",
+    "run_notification_worker", "send_notification_for_review", "run_notification_retries",
     "generate_dedup_key", "check_duplicate"
 ]
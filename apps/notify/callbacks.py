@@ -0,0 +1,114 @@
+"""
+Delivery callback ingestion.
+
+The callback endpoint (api/kakao/callback.py) only parses and queues events
+on DELIVERY_CALLBACKS_STREAM, so a callback storm after a large send costs
+one Redis round-trip per invocation. apply_delivery_callbacks() drains the
+stream through a consumer group and applies the results in bulk.
+"""
+
+from typing import Any, Dict, List
+from redis import ResponseError
+from apps.storage import Repo
+from apps.notify.providers import get_provider, parse_delivery_callback
+from apps.common import settings, get_logger, get_redis
+from apps.common.events import DELIVERY_CALLBACKS_STREAM, publish_delivery_callbacks
+
+logger = get_logger(__name__)
+
+CONSUMER_GROUP = "delivery"
+CONSUMER_NAME = "applier"
+
+# Pending callbacks idle this long were read by a run that died before acking
+CLAIM_IDLE_MS = 60000
+
+
+def parse_callback(body: Any) -> List[Dict]:
+    """Parse a delivery callback body with the configured provider's format."""
+    provider = get_provider()
+    if provider is None:
+        return parse_delivery_callback(body)
+    return provider.parse_callback(body)
+
+
+def to_update(event: Dict) -> tuple:
+    return (
+        event['request_id'],
+        event.get('recipient_seq') or 0,
+        event['status'],
+        event.get('result_code'),
+        event.get('result_message')
+    )
+
+
+def ingest_callback_events(events: List[Dict]) -> str:
+    """
+    Queue events for bulk application; apply them directly if Redis is down.
+
+    Returns:
+        str: 'queued' or 'applied'
+    """
+    if publish_delivery_callbacks(events):
+        return 'queued'
+    Repo.apply_delivery_statuses([to_update(event) for event in events])
+    return 'applied'
+
+
+def _decode_event(fields: Dict[str, str]) -> Dict:
+    return {
+        'request_id': fields['request_id'],
+        'recipient_seq': int(fields['recipient_seq']) if fields.get('recipient_seq') else None,
+        'status': fields['status'],
+        'result_code': fields.get('result_code') or None,
+        'result_message': fields.get('result_message') or None
+    }
+
+
+def apply_delivery_callbacks(max_events: int = 20000) -> Dict:
+    """
+    Drain queued delivery callbacks and apply them in bulk.
+
+    Args:
+        max_events: Stop after this many events (the next run continues)
+
+    Returns:
+        dict: Events read and notification logs updated
+    """
+    client = get_redis()
+    try:
+        client.xgroup_create(DELIVERY_CALLBACKS_STREAM, CONSUMER_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+    batch_size = settings.callback_batch_size
+    total_events = 0
+    total_updated = 0
+
+    while total_events < max_events:
+        # Reclaim callbacks a crashed run read but never acknowledged
+        messages = client.xautoclaim(
+            DELIVERY_CALLBACKS_STREAM, CONSUMER_GROUP, CONSUMER_NAME,
+            min_idle_time=CLAIM_IDLE_MS, start_id="0-0", count=batch_size
+        )[1]
+        if not messages:
+            response = client.xreadgroup(
+                CONSUMER_GROUP, CONSUMER_NAME, {DELIVERY_CALLBACKS_STREAM: ">"}, count=batch_size
+            )
+            messages = response[0][1] if response else []
+        if not messages:
+            break
+
+        # Later callbacks for the same recipient win
+        latest = {}
+        for _, fields in messages:
+            event = _decode_event(fields)
+            latest[(event['request_id'], event['recipient_seq'])] = event
+
+        total_updated += Repo.apply_delivery_statuses([to_update(event) for event in latest.values()])
+        client.xack(DELIVERY_CALLBACKS_STREAM, CONSUMER_GROUP, *[message_id for message_id, _ in messages])
+        total_events += len(messages)
+
+    if total_events:
+        logger.info(f"Applied {total_events} delivery callbacks to {total_updated} notification logs")
+    return {"events": total_events, "updated": total_updated}
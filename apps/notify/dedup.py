@@ -1,10 +1,17 @@
 import hashlib
-from typing import Optional
+from typing import List, Optional
+from redis import RedisError
 from apps.storage import Repo
-from apps.common import get_logger
+from apps.common import settings, get_logger, get_redis
 
 logger = get_logger(__name__)
 
+DEDUP_KEY_PREFIX = "revmon:notify:dedup:"
+
+# A notification sent to the same recipient within this window is not sent again
+# (the claim is extended to this long once the send succeeds, see mark_sent)
+SENT_WINDOW_HOURS = 24
+
 
 def generate_dedup_key(hospital_id: str, review_id: str, recipient_phone: str) -> str:
     """
@@ -22,23 +29,53 @@ def generate_dedup_key(hospital_id: str, review_id: str, recipient_phone: str) -
     return hashlib.sha256(key_input.encode('utf-8')).hexdigest()
 
 
+def generate_batch_key(dedup_keys: List[str]) -> str:
+    """
+    Generate idempotency key for a multi-recipient request.
+
+    Args:
+        dedup_keys: Dedup keys of the request's recipients
+
+    Returns:
+        str: SHA256 hash over the sorted keys (same recipients, same key)
+    """
+    key_input = "|".join(sorted(dedup_keys))
+    return hashlib.sha256(key_input.encode('utf-8')).hexdigest()
+
+
 def check_duplicate(hospital_id: str, review_id: str, recipient_phone: str,
-                    hours: int = 24) -> bool:
+                    ttl_min: Optional[int] = None) -> bool:
     """
-    Check if notification was already sent recently.
+    Check if a notification is in flight or was sent within SENT_WINDOW_HOURS,
+    claiming it otherwise.
+
+    The claim is one atomic Redis SET NX EX on the dedup key, so concurrent
+    notifier processes cannot both send the same notification. It lives
+    REV_ALIM_IDEMPOTENCY_TTL_MIN, long enough to cover the send, and
+    mark_sent() extends it to SENT_WINDOW_HOURS once the send succeeds, so
+    the SET NX alone answers for the whole window. Only when Redis is
+    unavailable are the notification logs checked instead.
 
     Args:
         hospital_id: Hospital ID
         review_id: Review ID
         recipient_phone: Recipient phone number
-        hours: Time window in hours
+        ttl_min: Claim lifetime in minutes (default: REV_ALIM_IDEMPOTENCY_TTL_MIN)
 
     Returns:
-        bool: True if duplicate (already sent), False otherwise
+        bool: True if duplicate (in flight elsewhere or already sent), False otherwise
     """
-    is_duplicate = Repo.check_notification_sent_recently(
-        hospital_id, review_id, recipient_phone, hours
-    )
+    ttl_min = ttl_min or settings.alim_idempotency_ttl_min
+    dedup_key = generate_dedup_key(hospital_id, review_id, recipient_phone)
+
+    try:
+        # SET NX replies None when the key exists
+        is_duplicate = not get_redis().set(DEDUP_KEY_PREFIX + dedup_key, "1", nx=True, ex=ttl_min * 60)
+    except RedisError as e:
+        logger.warning(f"Dedup claim failed, checking notification logs: {e}")
+        is_duplicate = Repo.check_notification_sent_recently(
+            hospital_id, review_id, recipient_phone, hours=SENT_WINDOW_HOURS
+        )
 
     if is_duplicate:
         logger.info(
@@ -47,3 +84,38 @@ def check_duplicate(hospital_id: str, review_id: str, recipient_phone: str,
         )
 
     return is_duplicate
+
+
+def release_dedup_keys(dedup_keys: List[str]):
+    """
+    Drop claims for notifications that will not be sent after all (e.g. no
+    provider), so a later run can claim them again.
+
+    Args:
+        dedup_keys: Dedup keys claimed by check_duplicate
+    """
+    if not dedup_keys:
+        return
+    try:
+        get_redis().delete(*[DEDUP_KEY_PREFIX + key for key in dedup_keys])
+    except RedisError as e:
+        logger.warning(f"Failed to release {len(dedup_keys)} dedup claims: {e}")
+
+
+def mark_sent(dedup_keys: List[str]):
+    """
+    Keep the claims of sent notifications for SENT_WINDOW_HOURS, so
+    check_duplicate() suppresses resends without a DB lookup.
+
+    Args:
+        dedup_keys: Dedup keys of successfully sent notifications
+    """
+    if not dedup_keys:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key in dedup_keys:
+            pipe.set(DEDUP_KEY_PREFIX + key, "sent", ex=SENT_WINDOW_HOURS * 3600)
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Failed to mark {len(dedup_keys)} dedup claims as sent: {e}")
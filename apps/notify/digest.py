@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional
+from apps.storage.models import FlaggedReview
+from apps.common import settings
+
+DIGEST_SNIPPET_CHARS = 60
+
+
+def group_by_hospital(flagged_reviews: List[FlaggedReview]) -> Dict[str, List[FlaggedReview]]:
+    """Group flagged reviews by hospital, keeping flagged order."""
+    groups: Dict[str, List[FlaggedReview]] = {}
+    for flagged in flagged_reviews:
+        groups.setdefault(str(flagged.hospital_id), []).append(flagged)
+    return groups
+
+
+def hold_since(now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Start of the coalescing window: hospitals alerted at or after this time
+    are left out of the notifier's fetch (Repo.get_notification_batch).
+
+    Their flagged reviews stay un-notified and are picked up by the first
+    run after the window closes, together with anything else that arrived
+    meanwhile. Excluding them in SQL keeps a burst at one hospital from
+    filling every run's batch while it waits.
+
+    Returns:
+        datetime: Window start (UTC), or None when coalescing is off
+    """
+    window_min = settings.notify_digest_window_min
+    if window_min <= 0:
+        return None
+    return (now or datetime.now(timezone.utc)) - timedelta(minutes=window_min)
+
+
+def snippet(content: str, limit: int) -> str:
+    return content[:limit] + "..." if len(content) > limit else content
+
+
+def digest_params(hospital_name: str, review_link: str, flagged_reviews: List[FlaggedReview]) -> Dict[str, str]:
+    """
+    Template parameters for a digest of several flagged reviews; review_link
+    is the hospital's place page.
+
+    The most negative reviews (lowest rating, then lowest positive probability)
+    are quoted, up to REV_NOTIFY_DIGEST_MAX_SNIPPETS.
+    """
+    ranked = sorted(
+        flagged_reviews,
+        key=lambda f: (
+            f.rating if f.rating is not None else 5,
+            f.sentiment_score if f.sentiment_score is not None else 0.5
+        )
+    )
+    top = ranked[:settings.notify_digest_max_snippets]
+
+    return {
+        "hospitalName": hospital_name,
+        "reviewCount": str(len(flagged_reviews)),
+        "reviewSnippets": "\n".join(f"- {snippet(f.content, DIGEST_SNIPPET_CHARS)}" for f in top),
+        "reviewLink": review_link,
+        "howToRespond": "빠른 사과, 원인 확인, 재방문 유도"
+    }
@@ -0,0 +1,126 @@
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import List, Dict, NamedTuple, Optional, Tuple
+from apps.notify.providers import MessageProvider, ProviderThrottled
+from apps.notify.dedup import generate_batch_key
+from apps.notify.ratelimit import get_rate_limiter
+from apps.common import settings, get_logger
+
+logger = get_logger(__name__)
+
+# A throttled request is resent after the provider's Retry-After at most this
+# many times, and only while that wait is short; otherwise it fails and is
+# retried later with backoff (apps.notify.retry)
+MAX_THROTTLED_RESENDS = 3
+MAX_THROTTLE_WAIT_SEC = 30
+
+
+class DispatchLimiter:
+    """Bounds in-flight provider requests for one notification run, overall and per hospital."""
+
+    def __init__(self, max_concurrency: int, per_hospital: int):
+        self.global_slots = asyncio.Semaphore(max_concurrency)
+        self.per_hospital = per_hospital
+        self.hospital_slots: Dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def slot(self, *hospital_ids: str):
+        """
+        Hold a request slot plus one slot of every hospital the request covers.
+
+        Hospital slots are taken in sorted order, so requests spanning
+        overlapping hospitals cannot deadlock on each other.
+        """
+        async with AsyncExitStack() as stack:
+            # Per-hospital slots first: a hospital waiting on its own limit holds no global slot
+            for hospital_id in sorted(set(hospital_ids)):
+                hospital_slot = self.hospital_slots.setdefault(hospital_id, asyncio.Semaphore(self.per_hospital))
+                await stack.enter_async_context(hospital_slot)
+            await stack.enter_async_context(self.global_slots)
+            yield
+
+
+def create_dispatch_limiter() -> DispatchLimiter:
+    return DispatchLimiter(settings.notify_max_concurrency, settings.notify_per_hospital_concurrency)
+
+
+class OutboundMessage(NamedTuple):
+    """One message to one recipient, ready to send."""
+    hospital_id: str
+    recipient_phone: str
+    template_code: str
+    params: Dict[str, str]
+    # (review_id, flagged_id, dedup key) of each review the message covers;
+    # a digest covers several and each gets its own notification log
+    reviews: Tuple[Tuple[str, str, str], ...]
+    # Key recorded when the message was first sent (set on retries)
+    message_key: Optional[str] = None
+
+    @property
+    def idempotency_key(self) -> str:
+        if self.message_key:
+            return self.message_key
+        if len(self.reviews) == 1:
+            return self.reviews[0][2]
+        return generate_batch_key([dedup_key for _, _, dedup_key in self.reviews])
+
+
+class ProviderRequest(NamedTuple):
+    """Messages sent together in one provider request."""
+    idempotency_key: str
+    messages: List[OutboundMessage]
+
+
+def pack_requests(provider: MessageProvider, messages: List[OutboundMessage]) -> List[ProviderRequest]:
+    """Pack messages sharing a template into requests of up to provider.MAX_RECIPIENTS."""
+    by_template: Dict[str, List[OutboundMessage]] = {}
+    for message in messages:
+        by_template.setdefault(message.template_code, []).append(message)
+
+    requests = []
+    for template_messages in by_template.values():
+        for i in range(0, len(template_messages), provider.MAX_RECIPIENTS):
+            chunk = template_messages[i:i + provider.MAX_RECIPIENTS]
+            key = chunk[0].idempotency_key if len(chunk) == 1 else \
+                generate_batch_key([message.idempotency_key for message in chunk])
+            requests.append(ProviderRequest(key, chunk))
+    return requests
+
+
+async def send_requests(provider: MessageProvider, requests: List[ProviderRequest],
+                        limiter: DispatchLimiter) -> List[List[Dict]]:
+    """
+    Send requests concurrently within the limiter's bounds and the provider's
+    rate limit; per-recipient results per request.
+    """
+    bucket = get_rate_limiter(provider)
+
+    async def send_once(request: ProviderRequest) -> List[Dict]:
+        for resend in range(MAX_THROTTLED_RESENDS + 1):
+            if bucket:
+                await bucket.acquire()
+            try:
+                return await provider.send_batch(
+                    template_code=request.messages[0].template_code,
+                    recipients=[(message.recipient_phone, message.params) for message in request.messages],
+                    idempotency_key=request.idempotency_key
+                )
+            except ProviderThrottled as e:
+                # Nothing was sent: the same request (and key) can go again after the pause
+                if bucket:
+                    bucket.pause(e.retry_after)
+                if resend == MAX_THROTTLED_RESENDS or e.retry_after > MAX_THROTTLE_WAIT_SEC:
+                    logger.error(f"Provider {provider.name} throttled request for {len(request.messages)} recipients")
+                    return [{"success": False, "error": str(e)} for _ in request.messages]
+                if not bucket:
+                    await asyncio.sleep(e.retry_after)
+
+    async def send_one(request: ProviderRequest) -> List[Dict]:
+        try:
+            async with limiter.slot(*(str(message.hospital_id) for message in request.messages)):
+                return await send_once(request)
+        except Exception as e:
+            logger.error(f"Error sending notification request for {len(request.messages)} recipients: {e}")
+            return [{"success": False, "error": str(e)} for _ in request.messages]
+
+    return await asyncio.gather(*(send_one(request) for request in requests))
@@ -1,3 +1,10 @@
+from .base import MessageProvider, ProviderThrottled, parse_delivery_callback
+from .registry import register_provider, registered_providers, get_provider
 from .nhn_bizmessage import NHNBizMessageProvider
+from .nhn_sms import NHNSmsProvider
+from .mock import MockProvider
 
-__all__ = ["NHNBizMessageProvider"]
+__all__ = [
+    "MessageProvider", "ProviderThrottled", "parse_delivery_callback", "register_provider", "registered_providers", "get_provider",
+    "NHNBizMessageProvider", "NHNSmsProvider", "MockProvider"
+]
@@ -0,0 +1,186 @@
+import httpx
+import asyncio
+from abc import ABC, abstractmethod
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from apps.common import settings
+
+DELIVERED_CODES = ('0', '0000', '200', 'success')
+
+# Pause when a throttling response carries no usable Retry-After
+DEFAULT_RETRY_AFTER_SEC = 1.0
+
+
+class ProviderThrottled(Exception):
+    """The provider rejected a request for exceeding its rate limit; nothing was sent."""
+
+    def __init__(self, retry_after: float, message: str = "Throttled by provider"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class MessageProvider(ABC):
+    """
+    Interface shared by notification channels (AlimTalk, SMS fallback).
+
+    send_batch takes (phone, template parameters) pairs for one template and
+    returns one result dict per recipient in input order: success, request_id,
+    recipient_seq, result_code, result_message; or success and error when the
+    whole request failed, or raises ProviderThrottled when the provider
+    rejected it for its rate limit. parse_callback turns a delivery callback body into
+    events for apps.notify.callbacks.
+
+    Providers register under `name` (apps.notify.providers.registry) and are
+    used as one long-lived instance per process.
+    """
+
+    # Provider name recorded in NotificationLog.provider
+    name: str = ""
+
+    # Recipients per request accepted by the API
+    MAX_RECIPIENTS = 1
+
+    # Requests per second allowed by the provider (None: no client-side limit)
+    rate_limit_per_sec: Optional[float] = None
+
+    # Shared HTTP client per provider class for connection pooling
+    _client: Optional[httpx.AsyncClient] = None
+    _client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    async def get_client(cls) -> httpx.AsyncClient:
+        """Get or create shared HTTP client for connection pooling."""
+        # Pooled connections belong to the event loop that opened them; each
+        # Celery task runs its own loop (asyncio.run), so rebind per loop.
+        loop = asyncio.get_running_loop()
+        if cls._client is None or cls._client.is_closed or cls._client_loop is not loop:
+            cls._client = httpx.AsyncClient(
+                timeout=settings.notify_http_timeout_sec,
+                limits=httpx.Limits(
+                    max_connections=settings.notify_max_concurrency,
+                    max_keepalive_connections=settings.notify_max_concurrency
+                )
+            )
+            cls._client_loop = loop
+        return cls._client
+
+    @abstractmethod
+    async def send_batch(
+        self,
+        template_code: str,
+        recipients: List[Tuple[str, Dict[str, str]]],
+        idempotency_key: Optional[str] = None
+    ) -> List[Dict]:
+        """Send one request for up to MAX_RECIPIENTS recipients of a template."""
+
+    async def send(self, template_code: str, recipient_phone: str, params: Dict[str, str],
+                   idempotency_key: Optional[str] = None) -> Dict:
+        """Send one message; same result dict as one send_batch entry."""
+        results = await self.send_batch(template_code, [(recipient_phone, params)], idempotency_key)
+        return results[0]
+
+    def parse_callback(self, body: Any) -> List[Dict]:
+        """Delivery events (request_id, recipient_seq, status, result_code, result_message) from a callback body."""
+        return parse_delivery_callback(body)
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return DEFAULT_RETRY_AFTER_SEC
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_SEC
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def raise_if_throttled(response: httpx.Response):
+    """Raise ProviderThrottled for 429, or 503 with Retry-After."""
+    retry_after = response.headers.get("Retry-After")
+    if response.status_code == 429 or (response.status_code == 503 and retry_after):
+        raise ProviderThrottled(parse_retry_after(retry_after), f"HTTP {response.status_code}")
+
+
+def request_failed(count: int, error: str) -> List[Dict]:
+    """Results for a request that failed as a whole (no request_id: outcome unknown)."""
+    return [{"success": False, "error": error} for _ in range(count)]
+
+
+def map_send_results(count: int, request_id: Optional[str], send_results: List[Dict]) -> List[Dict]:
+    """Per-recipient results in request order from a response's result list."""
+    # recipientSeq is 1-based in request order
+    by_seq = {result.get("recipientSeq", i + 1): result for i, result in enumerate(send_results)}
+
+    results = []
+    for seq in range(1, count + 1):
+        result = by_seq.get(seq)
+        if result is None:
+            results.append({
+                "success": False,
+                "request_id": request_id,
+                "recipient_seq": seq,
+                "error": "No send result for recipient"
+            })
+            continue
+
+        result_code = str(result.get("resultCode"))
+        results.append({
+            "success": result_code in ("0", "0000"),
+            "request_id": request_id,
+            "recipient_seq": seq,
+            "result_code": result_code,
+            "result_message": result.get("resultMessage")
+        })
+    return results
+
+
+def _first(item: Dict, *names: str) -> Any:
+    """First present field among provider-specific names (0 is a valid value)."""
+    for name in names:
+        if item.get(name) is not None:
+            return item[name]
+    return None
+
+
+def delivery_status(result_code: Optional[str]) -> str:
+    """Map a provider result code to a NotificationLog status."""
+    return 'delivered' if result_code in DELIVERED_CODES else 'failed'
+
+
+def parse_delivery_callback(body: Any) -> List[Dict]:
+    """
+    Parse a callback body (one object, a list, or {"messages": [...]}) into events.
+
+    Field names vary by provider; requestId is required, recipientSeq is
+    optional (without it the event applies to every recipient of the request).
+
+    Returns:
+        list: Events with request_id, recipient_seq, status, result_code, result_message
+    """
+    items = body.get('messages', [body]) if isinstance(body, dict) else body
+    events = []
+    for item in items or []:
+        if not isinstance(item, dict):
+            continue
+        request_id = _first(item, 'requestId', 'request_id')
+        if not request_id:
+            continue
+
+        result_code = _first(item, 'resultCode', 'result_code', 'code')
+        result_code = None if result_code is None else str(result_code)
+        recipient_seq = _first(item, 'recipientSeq', 'recipient_seq')
+
+        events.append({
+            'request_id': str(request_id),
+            'recipient_seq': int(recipient_seq) if recipient_seq not in (None, '') else None,
+            'status': delivery_status(result_code),
+            'result_code': result_code,
+            'result_message': _first(item, 'resultMessage', 'result_message', 'message')
+        })
+    return events
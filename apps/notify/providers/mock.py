@@ -0,0 +1,61 @@
+import uuid
+import random
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from apps.notify.providers.base import MessageProvider, request_failed
+from apps.notify.providers.registry import register_provider
+from apps.common import settings, get_logger
+
+logger = get_logger(__name__)
+
+
+@register_provider
+class MockProvider(MessageProvider):
+    """
+    In-process provider for offline load tests (REV_ALIM_PROVIDER=mock).
+
+    Nothing leaves the process: each request sleeps REV_MOCK_PROVIDER_LATENCY_MS
+    and fails as a whole with REV_MOCK_PROVIDER_ERROR_RATE, or per recipient
+    with REV_MOCK_PROVIDER_RECIPIENT_ERROR_RATE. For the HTTP path against
+    NHN-shaped responses use scripts/mock_nhn_server.py instead.
+    """
+
+    name = "mock"
+
+    MAX_RECIPIENTS = 1000
+
+    def __init__(self):
+        self.latency_sec = settings.mock_provider_latency_ms / 1000
+        self.error_rate = settings.mock_provider_error_rate
+        self.recipient_error_rate = settings.mock_provider_recipient_error_rate
+        self.requests = 0
+        self.recipients = 0
+
+    async def send_batch(
+        self,
+        template_code: str,
+        recipients: List[Tuple[str, Dict[str, str]]],
+        idempotency_key: Optional[str] = None
+    ) -> List[Dict]:
+        if len(recipients) > self.MAX_RECIPIENTS:
+            raise ValueError(f"At most {self.MAX_RECIPIENTS} recipients per request, got {len(recipients)}")
+
+        self.requests += 1
+        self.recipients += len(recipients)
+        await asyncio.sleep(self.latency_sec)
+
+        if random.random() < self.error_rate:
+            return request_failed(len(recipients), "Injected mock error")
+
+        request_id = f"mock-{uuid.uuid4().hex[:16]}"
+        results = []
+        for seq in range(1, len(recipients) + 1):
+            failed = random.random() < self.recipient_error_rate
+            results.append({
+                "success": not failed,
+                "request_id": request_id,
+                "recipient_seq": seq,
+                "result_code": "-3018" if failed else "0",
+                "result_message": "Injected mock recipient error" if failed else "SUCCESS"
+            })
+        return results
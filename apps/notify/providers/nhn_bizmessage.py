@@ -1,32 +1,30 @@
 import httpx
 import uuid
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+from apps.notify.providers.base import (
+    MessageProvider, ProviderThrottled, map_send_results, raise_if_throttled, request_failed
+)
+from apps.notify.providers.registry import register_provider
 from apps.common import settings, get_logger
 
 logger = get_logger(__name__)
 
 
-class NHNBizMessageProvider:
+@register_provider
+class NHNBizMessageProvider(MessageProvider):
     """NHN Cloud Bizmessage AlimTalk API provider with connection pooling."""
 
-    # Shared HTTP client for connection pooling
-    _client: Optional[httpx.AsyncClient] = None
+    name = "nhn_bizmessage"
+
+    # Recipients per request accepted by the API (recipientList)
+    MAX_RECIPIENTS = 1000
 
     def __init__(self):
         self.appkey = settings.alim_appkey
         self.secret = settings.alim_secret
         self.sender_key = settings.alim_sender_key
-        self.base_url = f"https://api-alimtalk.cloud.toast.com/alimtalk/v2.3/appkeys/{self.appkey}/messages"
-
-    @classmethod
-    async def get_client(cls) -> httpx.AsyncClient:
-        """Get or create shared HTTP client for connection pooling."""
-        if cls._client is None or cls._client.is_closed:
-            cls._client = httpx.AsyncClient(
-                timeout=30.0,
-                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5)
-            )
-        return cls._client
+        self.base_url = f"{settings.alim_base_url}/alimtalk/v2.3/appkeys/{self.appkey}/messages"
+        self.rate_limit_per_sec = settings.alim_rate_limit_per_sec or None
 
     async def send_alimtalk(
         self,
@@ -47,6 +45,40 @@ class NHNBizMessageProvider:
         Returns:
             dict: Response with request_id and status
         """
+        results = await self.send_alimtalk_batch(
+            template_code, [(recipient_phone, params)], idempotency_key
+        )
+        return results[0]
+
+    async def send_batch(self, template_code: str, recipients: List[Tuple[str, Dict[str, str]]],
+                         idempotency_key: Optional[str] = None) -> List[Dict]:
+        return await self.send_alimtalk_batch(template_code, recipients, idempotency_key)
+
+    async def send_alimtalk_batch(
+        self,
+        template_code: str,
+        recipients: List[Tuple[str, Dict[str, str]]],
+        idempotency_key: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Send one AlimTalk request to several recipients of the same template.
+
+        Args:
+            template_code: Template code
+            recipients: (phone in E.164 format, template parameters) pairs,
+                at most MAX_RECIPIENTS
+            idempotency_key: Idempotency key for the whole request
+
+        Returns:
+            list: One result per recipient, in input order (success, request_id,
+                recipient_seq, result_code, result_message; or success and error)
+
+        Raises:
+            ProviderThrottled: The API rejected the request for its rate limit
+        """
+        if len(recipients) > self.MAX_RECIPIENTS:
+            raise ValueError(f"At most {self.MAX_RECIPIENTS} recipients per request, got {len(recipients)}")
+
         if not idempotency_key:
             idempotency_key = str(uuid.uuid4())
 
@@ -65,6 +97,7 @@ class NHNBizMessageProvider:
                     "recipientNo": recipient_phone,
                     "templateParameter": params
                 }
+                for recipient_phone, params in recipients
             ]
         }
 
@@ -77,52 +110,38 @@ class NHNBizMessageProvider:
                 headers=headers
             )
 
+            raise_if_throttled(response)
             response_data = response.json()
-
-                if response.status_code == 200:
-                    # Extract request ID and result
-                    request_id = response_data.get("header", {}).get("requestId")
-                    send_results = response_data.get("sendResults", [])
-
-                    if send_results:
-                        result = send_results[0]
-                        result_code = result.get("resultCode")
-                        result_message = result.get("resultMessage")
-
-                        if result_code == "0000":
-                            logger.info(f"AlimTalk sent successfully: {request_id}")
-                            return {
-                                "success": True,
-                                "request_id": request_id,
-                                "result_code": result_code,
-                                "result_message": result_message
-                            }
-                        else:
-                            logger.error(
-                                f"AlimTalk send failed: {result_code} - {result_message}"
-                            )
-                            return {
-                                "success": False,
-                                "request_id": request_id,
-                                "result_code": result_code,
-                                "result_message": result_message
-                            }
-
-                logger.error(f"Unexpected response format: {response_data}")
-                return {
-                    "success": False,
-                    "error": "Unexpected response format"
-                }
-
+            header = response_data.get("header", {})
+
+            if response.status_code != 200 or header.get("isSuccessful") is False:
+                logger.error(
+                    f"AlimTalk request rejected ({response.status_code}): "
+                    f"{header.get('resultCode')} - {header.get('resultMessage')}"
+                )
+                return request_failed(
+                    len(recipients), header.get("resultMessage") or f"HTTP {response.status_code}"
+                )
+
+            # v2.3 returns requestId and sendResults under "message"
+            message = response_data.get("message") or {}
+            request_id = message.get("requestId") or header.get("requestId")
+            send_results = message.get("sendResults") or response_data.get("sendResults", [])
+
+            results = map_send_results(len(recipients), request_id, send_results)
+
+            failed = sum(1 for result in results if not result["success"])
+            if failed:
+                logger.error(f"AlimTalk request {request_id}: {failed}/{len(results)} recipients failed")
+            else:
+                logger.info(f"AlimTalk sent successfully: {request_id} ({len(results)} recipients)")
+            return results
+
+        except ProviderThrottled:
+            raise
         except httpx.TimeoutException:
             logger.error("AlimTalk request timeout")
-            return {
-                "success": False,
-                "error": "Request timeout"
-            }
+            return request_failed(len(recipients), "Request timeout")
         except Exception as e:
             logger.error(f"AlimTalk send error: {e}")
-            return {
-                "success": False,
-                "error": str(e)
-            }
+            return request_failed(len(recipients), str(e))
@@ -0,0 +1,138 @@
+import httpx
+import uuid
+from typing import Dict, List, Optional, Tuple
+from apps.notify.providers.base import (
+    MessageProvider, ProviderThrottled, map_send_results, raise_if_throttled, request_failed
+)
+from apps.notify.providers.registry import register_provider
+from apps.common import settings, get_logger
+
+logger = get_logger(__name__)
+
+# SMS bodies per AlimTalk template; ##key## is replaced per recipient from the
+# same template parameters (NHN SMS templateParameter)
+ALERT_BODY = (
+    "[##hospitalName##] 부정 리뷰가 접수되었습니다.\n"
+    "\"##reviewSnippet##\"\n"
+    "리뷰 확인: ##reviewLink##\n"
+    "응대 가이드: ##howToRespond##"
+)
+DIGEST_BODY = (
+    "[##hospitalName##] 부정 리뷰 ##reviewCount##건이 접수되었습니다.\n"
+    "##reviewSnippets##\n"
+    "리뷰 확인: ##reviewLink##"
+)
+DEFAULT_BODY = "[##hospitalName##] 부정 리뷰 알림\n리뷰 확인: ##reviewLink##"
+
+
+def to_domestic_number(phone_e164: str) -> str:
+    """+821012345678 -> 01012345678 (the SMS API takes domestic numbers)."""
+    digits = ''.join(c for c in phone_e164 if c.isdigit())
+    if digits.startswith('82'):
+        digits = '0' + digits[2:]
+    return digits
+
+
+@register_provider
+class NHNSmsProvider(MessageProvider):
+    """NHN Cloud SMS (LMS) provider, the fallback channel for failed AlimTalk sends."""
+
+    name = "nhn_sms"
+
+    # Recipients per request accepted by the API (recipientList)
+    MAX_RECIPIENTS = 1000
+
+    def __init__(self):
+        self.appkey = settings.sms_appkey
+        self.secret = settings.sms_secret
+        self.send_no = settings.sms_sender_no
+        # LMS endpoint: review snippets do not fit the 90-byte SMS limit
+        self.base_url = f"{settings.sms_base_url}/sms/v3.0/appKeys/{self.appkey}/sender/mms"
+        self.rate_limit_per_sec = settings.sms_rate_limit_per_sec or None
+
+    @staticmethod
+    def body_for(template_code: str) -> str:
+        if template_code == settings.alim_template_code:
+            return ALERT_BODY
+        if template_code == settings.alim_digest_template_code:
+            return DIGEST_BODY
+        return DEFAULT_BODY
+
+    async def send_batch(
+        self,
+        template_code: str,
+        recipients: List[Tuple[str, Dict[str, str]]],
+        idempotency_key: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Send the SMS counterpart of an AlimTalk template to several recipients.
+
+        Args:
+            template_code: AlimTalk template code the message replaces
+            recipients: (phone in E.164 format, template parameters) pairs
+            idempotency_key: Idempotency key for the whole request
+
+        Returns:
+            list: One result per recipient, in input order
+
+        Raises:
+            ProviderThrottled: The API rejected the request for its rate limit
+        """
+        if len(recipients) > self.MAX_RECIPIENTS:
+            raise ValueError(f"At most {self.MAX_RECIPIENTS} recipients per request, got {len(recipients)}")
+
+        headers = {
+            "Content-Type": "application/json; charset=UTF-8",
+            "X-Secret-Key": self.secret,
+            "X-NC-API-IDEMPOTENCY-KEY": idempotency_key or str(uuid.uuid4())
+        }
+
+        body = {
+            "title": "리뷰 알림",
+            "body": self.body_for(template_code),
+            "sendNo": self.send_no,
+            "recipientList": [
+                {
+                    "recipientNo": to_domestic_number(recipient_phone),
+                    "templateParameter": params
+                }
+                for recipient_phone, params in recipients
+            ]
+        }
+
+        try:
+            client = await self.get_client()
+            response = await client.post(self.base_url, json=body, headers=headers)
+
+            raise_if_throttled(response)
+            response_data = response.json()
+            header = response_data.get("header", {})
+
+            if response.status_code != 200 or header.get("isSuccessful") is False:
+                logger.error(
+                    f"SMS request rejected ({response.status_code}): "
+                    f"{header.get('resultCode')} - {header.get('resultMessage')}"
+                )
+                return request_failed(
+                    len(recipients), header.get("resultMessage") or f"HTTP {response.status_code}"
+                )
+
+            data = (response_data.get("body") or {}).get("data") or {}
+            request_id = data.get("requestId")
+            results = map_send_results(len(recipients), request_id, data.get("sendResultList") or [])
+
+            failed = sum(1 for result in results if not result["success"])
+            if failed:
+                logger.error(f"SMS request {request_id}: {failed}/{len(results)} recipients failed")
+            else:
+                logger.info(f"SMS sent successfully: {request_id} ({len(results)} recipients)")
+            return results
+
+        except ProviderThrottled:
+            raise
+        except httpx.TimeoutException:
+            logger.error("SMS request timeout")
+            return request_failed(len(recipients), "Request timeout")
+        except Exception as e:
+            logger.error(f"SMS send error: {e}")
+            return request_failed(len(recipients), str(e))
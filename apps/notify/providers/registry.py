@@ -0,0 +1,42 @@
+import threading
+from typing import Dict, List, Optional, Type
+from apps.notify.providers.base import MessageProvider
+from apps.common import settings, get_logger
+
+logger = get_logger(__name__)
+
+_providers: Dict[str, Type[MessageProvider]] = {}
+_instances: Dict[str, MessageProvider] = {}
+_lock = threading.Lock()
+
+
+def register_provider(cls: Type[MessageProvider]) -> Type[MessageProvider]:
+    """Class decorator: make a provider selectable by its name (REV_ALIM_PROVIDER)."""
+    _providers[cls.name] = cls
+    return cls
+
+
+def registered_providers() -> List[str]:
+    return sorted(_providers)
+
+
+def get_provider(name: Optional[str] = None) -> Optional[MessageProvider]:
+    """
+    Get the process-wide instance of a provider.
+
+    Args:
+        name: Provider name (default: REV_ALIM_PROVIDER)
+
+    Returns:
+        MessageProvider: Shared instance, or None if no provider has that name
+    """
+    name = name or settings.alim_provider
+    with _lock:
+        provider = _instances.get(name)
+        if provider is None:
+            cls = _providers.get(name)
+            if cls is None:
+                logger.error(f"Unsupported provider: {name} (registered: {', '.join(registered_providers())})")
+                return None
+            provider = _instances[name] = cls()
+    return provider
@@ -0,0 +1,91 @@
+"""
+Quiet hours in the hospital's local time.
+
+Notifications for reviews flagged during quiet hours are not dropped: they are
+logged as `deferred` with next_attempt_at set to release_time() and sent by
+release_deferred_notifications() (apps/notify/worker.py). Release times are
+spread over REV_NOTIFY_QUIET_RELEASE_SPREAD_MIN after the window ends, a fixed
+offset per hospital, so the morning release does not reach the provider as
+one spike.
+"""
+
+import hashlib
+from datetime import datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from apps.common import settings, get_logger
+
+logger = get_logger(__name__)
+
+
+def parse_time(value: str) -> time:
+    """'22:00' -> time(22, 0)."""
+    hours, minutes = value.split(":")
+    return time(int(hours), int(minutes))
+
+
+def get_zone(tz_name: Optional[str] = None) -> ZoneInfo:
+    """IANA zone for a hospital, falling back to REV_DEFAULT_TIMEZONE."""
+    try:
+        return ZoneInfo(tz_name or settings.default_timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown timezone {tz_name!r}, using {settings.default_timezone}")
+        return ZoneInfo(settings.default_timezone)
+
+
+def is_quiet_hours(tz_name: Optional[str] = None, now: Optional[datetime] = None) -> bool:
+    """
+    Check if it is quiet hours in the given timezone.
+
+    Args:
+        tz_name: Hospital timezone (default: REV_DEFAULT_TIMEZONE)
+        now: Current time (default: now)
+
+    Returns:
+        bool: True within [quiet_hours_start, quiet_hours_end) local time
+    """
+    local = (now or datetime.now(timezone.utc)).astimezone(get_zone(tz_name)).time()
+
+    quiet_start = parse_time(settings.quiet_hours_start)
+    quiet_end = parse_time(settings.quiet_hours_end)
+
+    # Handle overnight quiet hours (e.g., 22:00 to 08:00)
+    if quiet_start > quiet_end:
+        return local >= quiet_start or local < quiet_end
+    return quiet_start <= local < quiet_end
+
+
+def quiet_hours_end(tz_name: Optional[str] = None, now: Optional[datetime] = None) -> datetime:
+    """Next end of quiet hours after `now`, in UTC."""
+    zone = get_zone(tz_name)
+    local = (now or datetime.now(timezone.utc)).astimezone(zone)
+
+    end = datetime.combine(local.date(), parse_time(settings.quiet_hours_end), tzinfo=zone)
+    if end <= local:
+        end = datetime.combine(local.date() + timedelta(days=1), parse_time(settings.quiet_hours_end), tzinfo=zone)
+    return end.astimezone(timezone.utc)
+
+
+def release_offset(hospital_id: str) -> timedelta:
+    """Fixed offset of a hospital's release within the spread window."""
+    spread_sec = settings.notify_quiet_release_spread_min * 60
+    if spread_sec <= 0:
+        return timedelta(0)
+    digest = hashlib.sha256(str(hospital_id).encode('utf-8')).hexdigest()
+    return timedelta(seconds=int(digest[:8], 16) % spread_sec)
+
+
+def release_time(hospital_id: str, tz_name: Optional[str] = None,
+                 now: Optional[datetime] = None) -> datetime:
+    """
+    When notifications deferred now for a hospital are released.
+
+    Args:
+        hospital_id: Hospital ID
+        tz_name: Hospital timezone
+        now: Current time (default: now)
+
+    Returns:
+        datetime: End of quiet hours plus the hospital's offset (UTC)
+    """
+    return quiet_hours_end(tz_name, now) + release_offset(hospital_id)
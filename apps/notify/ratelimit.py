@@ -0,0 +1,130 @@
+"""
+Client-side send rate limiting per provider.
+
+Each provider with a rate_limit_per_sec gets a token bucket kept in Redis, so
+every notifier process (worker, retries, deferred release) draws from the
+same budget. A throttling response from the provider pauses the bucket for
+its Retry-After, which stops all processes, not only the one that got it.
+If Redis is unavailable the bucket falls back to a per-process one.
+"""
+
+import time
+import asyncio
+import threading
+from typing import Dict, Optional
+from redis import RedisError
+from apps.notify.providers import MessageProvider
+from apps.common import get_logger, get_redis
+
+logger = get_logger(__name__)
+
+# KEYS: bucket hash, pause key; ARGV: rate per second, burst.
+# Returns milliseconds to wait before retrying, 0 once a token was taken.
+TAKE_TOKEN_SCRIPT = """
+local paused = redis.call('PTTL', KEYS[2])
+if paused > 0 then
+    return paused
+end
+
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return wait
+"""
+
+
+class TokenBucket:
+    """Token bucket of `rate` requests per second (bursts up to `burst`), shared through Redis."""
+
+    def __init__(self, name: str, rate: float, burst: Optional[float] = None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.bucket_key = f"revmon:ratelimit:{name}"
+        self.pause_key = f"revmon:ratelimit:{name}:pause"
+        # Per-process fallback state
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._redis_down = False
+
+    def _take_local(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if self._paused_until > now:
+                return self._paused_until - now
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def try_take(self) -> float:
+        """Take a token if one is available; otherwise seconds to wait before trying again."""
+        try:
+            wait_ms = get_redis().eval(
+                TAKE_TOKEN_SCRIPT, 2, self.bucket_key, self.pause_key, self.rate, self.burst
+            )
+        except RedisError as e:
+            if not self._redis_down:
+                logger.warning(f"Rate limiter {self.name}: Redis unavailable, limiting per process: {e}")
+                self._redis_down = True
+            return self._take_local()
+
+        self._redis_down = False
+        return int(wait_ms) / 1000
+
+    async def acquire(self):
+        """Wait until a request may be sent."""
+        while True:
+            wait = self.try_take()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stop all sends through this bucket for `seconds` (provider throttling)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        try:
+            client = get_redis()
+            # Keep the longer of an existing pause and this one
+            if client.pttl(self.pause_key) < seconds * 1000:
+                client.set(self.pause_key, "1", px=max(1, int(seconds * 1000)))
+        except RedisError as e:
+            logger.warning(f"Rate limiter {self.name}: failed to share pause: {e}")
+        logger.warning(f"Provider {self.name} throttled, pausing sends for {seconds:.1f}s")
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: MessageProvider) -> Optional[TokenBucket]:
+    """Process-wide token bucket for a provider, or None if it has no rate limit."""
+    rate = provider.rate_limit_per_sec
+    if not rate:
+        return None
+    with _buckets_lock:
+        bucket = _buckets.get(provider.name)
+        if bucket is None or bucket.rate != rate:
+            bucket = _buckets[provider.name] = TokenBucket(provider.name, rate)
+        return bucket
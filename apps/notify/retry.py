@@ -0,0 +1,236 @@
+"""
+Retries for failed notification sends.
+
+A failed send leaves its NotificationLog rows as `failed` with next_attempt_at
+set by exponential backoff with jitter. run_notification_retries() claims due
+rows, rebuilds their messages from the stored payload and resends them.
+Once REV_NOTIFY_RETRY_MAX_ATTEMPTS AlimTalk attempts have failed, the message
+is resent once by SMS when REV_SMS_FALLBACK_ENABLED (status `resend_sms` on
+success); otherwise, or if the SMS fails too, the row stays `failed` for good.
+
+Idempotency: when a request failed without being accepted (timeout, network
+or HTTP error) its outcome is unknown, so the retry replays the same request
+key and the provider can drop a duplicate. The key is only replayed when the
+claimed rows rebuild exactly the original request; a partial claim goes out
+under a key derived from its contents. A recipient the provider accepted and
+then rejected is retried alone under a new per-attempt key.
+
+All failed messages of a request share one next_attempt_at, so they come due
+(and are claimed) together.
+"""
+
+import random
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from apps.storage import Repo
+from apps.notify.dispatch import (
+    OutboundMessage, ProviderRequest, create_dispatch_limiter, pack_requests, send_requests
+)
+from apps.notify.dedup import generate_batch_key, mark_sent
+from apps.notify.providers import NHNSmsProvider, get_provider
+from apps.common import settings, get_logger
+
+logger = get_logger(__name__)
+
+# Claimed rows come due again after this long if a retry run dies mid-flight
+RETRY_LEASE_SEC = 300
+
+
+def backoff_delay(attempt: int) -> float:
+    """Seconds to wait after failed attempt number `attempt` (1-based): exponential, capped, equal jitter."""
+    delay = min(settings.notify_retry_max_sec, settings.notify_retry_base_sec * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def schedule_retry(attempts: int, provider_name: str, now: datetime) -> Optional[datetime]:
+    """When a message that failed `attempts` times is next due, or None if never."""
+    if provider_name == NHNSmsProvider.name:
+        return None  # SMS is the last resort
+    if attempts < settings.notify_retry_max_attempts:
+        return now + timedelta(seconds=backoff_delay(attempts))
+    if settings.sms_fallback_enabled:
+        return now
+    return None
+
+
+def attempt_key(message_key: str, attempt: int) -> str:
+    """Request key for a lone resend of a message the provider accepted and rejected."""
+    return hashlib.sha256(f"{message_key}|{attempt}".encode('utf-8')).hexdigest()
+
+
+def outcome_fields(provider_name: str, request: ProviderRequest, position: int, result: Dict,
+                   attempts: int, retry_at: Optional[datetime]) -> Dict:
+    """
+    NotificationLog columns recording one send attempt of request.messages[position].
+
+    Args:
+        provider_name: Provider the attempt went through
+        request: The provider request
+        position: Index of the message in the request
+        result: The provider's result for the message
+        attempts: Attempts made so far, including this one
+        retry_at: The request's next attempt if this message failed (schedule_retry)
+
+    Returns:
+        dict: status, provider, request/result fields and retry state
+    """
+    message = request.messages[position]
+    fields = {
+        "provider": provider_name,
+        "request_id": result.get("request_id"),
+        "recipient_seq": result.get("recipient_seq"),
+        "result_code": result.get("result_code"),
+        "result_message": result.get("result_message") or result.get("error"),
+        "attempts": attempts,
+        "next_attempt_at": None,
+        "payload": None
+    }
+
+    if result.get("success"):
+        fields["status"] = "resend_sms" if provider_name == NHNSmsProvider.name else "sent"
+        return fields
+
+    fields["status"] = "failed"
+    fields["next_attempt_at"] = retry_at
+    fields["payload"] = {
+        "params": message.params,
+        "message_key": message.idempotency_key,
+        "review_count": len(message.reviews)
+    }
+    if result.get("request_id") is None:
+        # No request_id: the request may or may not have landed, so replay it as is
+        fields["payload"].update(
+            request_key=request.idempotency_key, position=position, request_size=len(request.messages)
+        )
+    else:
+        fields["payload"].update(
+            request_key=attempt_key(message.idempotency_key, attempts + 1), position=0, request_size=1
+        )
+    return fields
+
+
+def message_key(record) -> str:
+    return (record.payload or {}).get("message_key") or record.idempotency_key
+
+
+def rebuild_requests(records: list) -> List[ProviderRequest]:
+    """
+    Group claimed rows back into requests (by request key) and messages (by
+    message key).
+
+    A request keeps its key only if every message and recipient of the
+    original came back; otherwise (e.g. the claim limit split it) the key is
+    derived from what was claimed, since the provider would drop a different
+    request replayed under the old key as a duplicate.
+    """
+    requests: Dict[str, Dict[str, list]] = {}
+    for record in records:
+        payload = record.payload or {}
+        request_key = payload.get("request_key") or record.idempotency_key
+        requests.setdefault(request_key, {}).setdefault(message_key(record), []).append(record)
+
+    rebuilt = []
+    for request_key, messages in requests.items():
+        ordered = sorted(messages.values(), key=lambda rows: (rows[0].payload or {}).get("position", 0))
+        payloads = [rows[0].payload or {} for rows in ordered]
+
+        complete_messages = [
+            len(rows) == (payload.get("review_count") or len(rows)) for rows, payload in zip(ordered, payloads)
+        ]
+        request_size = payloads[0].get("request_size") or len(ordered)
+        exact = all(complete_messages) and \
+            sorted(payload.get("position", 0) for payload in payloads) == list(range(request_size))
+
+        outbound = [
+            OutboundMessage(
+                hospital_id=rows[0].hospital_id,
+                recipient_phone=rows[0].recipient_phone,
+                template_code=rows[0].template_code,
+                params=payload.get("params") or {},
+                reviews=tuple((row.review_id, row.from_flagged_id, row.idempotency_key) for row in rows),
+                # A partial digest is a different message: let its key follow its rows
+                message_key=message_key(rows[0]) if complete else None
+            )
+            for rows, payload, complete in zip(ordered, payloads, complete_messages)
+        ]
+        if not exact:
+            logger.info(f"Retrying {len(outbound)} of the messages of request {request_key[:12]} under a new key")
+            request_key = generate_batch_key([request_key] + [message.idempotency_key for message in outbound])
+        rebuilt.append(ProviderRequest(request_key, outbound))
+    return rebuilt
+
+
+async def run_notification_retries(limit: int = 200) -> Dict:
+    """
+    Resend failed notifications whose next attempt is due.
+
+    Args:
+        limit: Maximum number of notification logs to claim
+
+    Returns:
+        dict: Results summary
+    """
+    records = Repo.claim_notification_retries(limit=limit, lease_sec=RETRY_LEASE_SEC)
+    if not records:
+        return {"retried": 0, "sent": 0, "sms": 0, "failed": 0}
+
+    rows_by_key = {record.idempotency_key: record for record in records}
+
+    # Rows past the AlimTalk attempt limit are due for the SMS fallback
+    alim_records = [r for r in records if r.attempts < settings.notify_retry_max_attempts]
+    sms_records = [r for r in records if r.attempts >= settings.notify_retry_max_attempts]
+
+    limiter = create_dispatch_limiter()
+    batches = []
+
+    if alim_records:
+        provider = get_provider()
+        if provider is not None:
+            requests = rebuild_requests(alim_records)
+            batches.append((provider, requests, await send_requests(provider, requests, limiter)))
+
+    if sms_records and not settings.sms_fallback_enabled:
+        # Fallback switched off since these were scheduled: give up on them
+        Repo.update_notification_attempts([{"id": r.id, "next_attempt_at": None} for r in sms_records])
+        sms_records = []
+
+    if sms_records:
+        sms_provider = get_provider(NHNSmsProvider.name)
+        messages = [m for request in rebuild_requests(sms_records) for m in request.messages]
+        requests = pack_requests(sms_provider, messages)
+        logger.info(f"Falling back to SMS for {len(messages)} notifications")
+        batches.append((sms_provider, requests, await send_requests(sms_provider, requests, limiter)))
+
+    now = datetime.now(timezone.utc)
+    counts = {"retried": 0, "sent": 0, "sms": 0, "failed": 0}
+    updates = []
+    sent_keys = []
+
+    for provider, requests, request_results in batches:
+        for request, results in zip(requests, request_results):
+            attempts = 1 + max(rows_by_key[message.reviews[0][2]].attempts for message in request.messages)
+            retry_at = schedule_retry(attempts, provider.name, now)
+            for position, (message, result) in enumerate(zip(request.messages, results)):
+                # A message's rows are exactly the reviews it covers (one row per dedup key)
+                rows = [rows_by_key[dedup_key] for _, _, dedup_key in message.reviews]
+                outcome = outcome_fields(
+                    provider.name, request, position, result, attempts=rows[0].attempts + 1, retry_at=retry_at
+                )
+                updates.extend({"id": row.id, **outcome} for row in rows)
+
+                counts["retried"] += 1
+                if outcome["status"] == "resend_sms":
+                    counts["sms"] += 1
+                elif outcome["status"] == "sent":
+                    counts["sent"] += 1
+                else:
+                    counts["failed"] += 1
+                if outcome["status"] != "failed":
+                    sent_keys.extend(row.idempotency_key for row in rows)
+
+    Repo.update_notification_attempts(updates)
+    mark_sent(sent_keys)
+
+    logger.info(f"Notification retries complete: {counts}")
+    return counts
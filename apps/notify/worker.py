@@ -1,32 +1,20 @@
-from datetime import datetime, time
-from typing import List, Dict
-from apps.storage import Repo
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple
+from apps.storage import Repo, HospitalRecord, NotificationBatch
 from apps.storage.models import FlaggedReview
-from apps.notify.providers import NHNBizMessageProvider
-from apps.notify.dedup import generate_dedup_key, check_duplicate
+from apps.notify.providers import MessageProvider, get_provider
+from apps.notify.dedup import generate_dedup_key, check_duplicate, release_dedup_keys, mark_sent
+from apps.notify.digest import group_by_hospital, hold_since, digest_params
+from apps.notify.dispatch import (
+    DispatchLimiter, OutboundMessage, create_dispatch_limiter, pack_requests, send_requests
+)
+from apps.notify.retry import RETRY_LEASE_SEC, outcome_fields, schedule_retry
+from apps.notify.quiet import is_quiet_hours, release_time
 from apps.common import settings, get_logger
 
 logger = get_logger(__name__)
 
 
-def is_quiet_hours() -> bool:
-    """Check if current time is within quiet hours."""
-    now = datetime.utcnow().time()
-
-    # Parse quiet hours
-    start_parts = settings.quiet_hours_start.split(":")
-    end_parts = settings.quiet_hours_end.split(":")
-
-    quiet_start = time(int(start_parts[0]), int(start_parts[1]))
-    quiet_end = time(int(end_parts[0]), int(end_parts[1]))
-
-    # Handle overnight quiet hours (e.g., 22:00 to 08:00)
-    if quiet_start > quiet_end:
-        return now >= quiet_start or now <= quiet_end
-    else:
-        return quiet_start <= now <= quiet_end
-
-
 def normalize_phone_e164(phone: str) -> str:
     """
     Normalize phone number to E.164 format.
@@ -51,15 +39,97 @@ def normalize_phone_e164(phone: str) -> str:
     return digits
 
 
-async def send_notification_for_review(flagged_review: FlaggedReview) -> Dict:
+def get_active_contacts(hospital_id: str, batch: Optional[NotificationBatch] = None) -> list:
+    # Contacts loaded with the work batch, else cached (a burst of reviews for one hospital costs one lookup)
+    contacts = batch.contacts.get(hospital_id, []) if batch else Repo.get_cached_contacts(hospital_id)
+
+    if not contacts:
+        logger.warning(f"No active contacts for hospital: {hospital_id}")
+        return []
+
+    # Limit to max 3 contacts
+    return contacts[:3]
+
+
+def get_hospital(hospital_id: str, batch: Optional[NotificationBatch] = None) -> Optional[HospitalRecord]:
+    if batch and hospital_id in batch.hospitals:
+        return batch.hospitals[hospital_id]
+    return Repo.get_cached_hospital(hospital_id)
+
+
+def get_hospital_name(hospital_id: str, batch: Optional[NotificationBatch] = None) -> str:
+    hospital = get_hospital(hospital_id, batch)
+    return hospital.name if hospital else "병원"
+
+
+def get_review_link(hospital_id: str, batch: Optional[NotificationBatch] = None) -> str:
+    # The hospital's place page lists its reviews
+    hospital = get_hospital(hospital_id, batch)
+    return hospital.naver_place_url if hospital and hospital.naver_place_url else "https://m.place.naver.com"
+
+
+def get_hospital_timezone(hospital_id: str, batch: Optional[NotificationBatch] = None) -> Optional[str]:
+    hospital = get_hospital(hospital_id, batch)
+    return hospital.timezone if hospital else None
+
+
+def defer_reviews(hospital_id: str, flagged_reviews: List[FlaggedReview], contacts: list,
+                  batch: Optional[NotificationBatch] = None) -> int:
     """
-    Send notifications for a flagged review.
+    Queue a hospital's notifications until its quiet hours end.
+
+    Each (review, contact) gets a `deferred` log due at the hospital's release
+    time; release_deferred_notifications() sends them.
 
     Args:
-        flagged_review: Flagged review to notify about
+        hospital_id: Hospital ID
+        flagged_reviews: The hospital's flagged reviews
+        contacts: Active contacts
+        batch: Work batch the reviews came from
 
     Returns:
-        dict: Results summary
+        int: Number of notifications deferred
+    """
+    release_at = release_time(hospital_id, get_hospital_timezone(hospital_id, batch))
+
+    deferred_logs = []
+    for flagged in flagged_reviews:
+        for contact in contacts:
+            phone_e164 = normalize_phone_e164(contact.phone)
+            deferred_logs.append({
+                "hospital_id": hospital_id,
+                "review_id": str(flagged.review_id),
+                "from_flagged_id": str(flagged.id),
+                "recipient_phone": phone_e164,
+                "provider": settings.alim_provider,
+                "template_code": settings.alim_template_code,
+                "idempotency_key": generate_dedup_key(hospital_id, str(flagged.review_id), phone_e164),
+                "status": "deferred",
+                "attempts": 0,
+                "next_attempt_at": release_at
+            })
+
+    Repo.create_notification_logs(deferred_logs)
+    logger.info(
+        f"In quiet hours, deferred {len(flagged_reviews)} flagged reviews "
+        f"for hospital {hospital_id} until {release_at.isoformat()}"
+    )
+    return len(deferred_logs)
+
+
+def prepare_messages(flagged_review: FlaggedReview,
+                     batch: Optional[NotificationBatch] = None) -> Tuple[List[OutboundMessage], int]:
+    """
+    Resolve contacts for a flagged review and drop recipients already notified.
+
+    Quiet hours defer every recipient (see defer_reviews).
+
+    Args:
+        flagged_review: Flagged review (ORM object or FlaggedReviewRecord)
+        batch: Work batch with the hospital and contacts (default: cached lookups)
+
+    Returns:
+        tuple: (messages to send, number of recipients skipped or deferred)
     """
     hospital_id = str(flagged_review.hospital_id)
     review_id = str(flagged_review.review_id)
@@ -67,115 +137,210 @@ async def send_notification_for_review(flagged_review: FlaggedReview) -> Dict:
 
     logger.info(f"Processing notification for flagged review: {flagged_id}")
 
-    # Get hospital contacts
-    contacts = Repo.get_hospital_contacts(hospital_id, active_only=True)
-
+    contacts = get_active_contacts(hospital_id, batch)
     if not contacts:
-        logger.warning(f"No active contacts for hospital: {hospital_id}")
-        return {"sent": 0, "skipped": 0, "failed": 0}
-
-    # Limit to max 3 contacts
-    contacts = contacts[:3]
+        return [], 0
+
+    # Check if in quiet hours (hospital's local time)
+    if is_quiet_hours(get_hospital_timezone(hospital_id, batch)):
+        return [], defer_reviews(hospital_id, [flagged_review], contacts, batch)
+
+    # Prepare template parameters
+    review_snippet = flagged_review.content[:120] + "..." if len(flagged_review.content) > 120 else flagged_review.content
+    params = {
+        "hospitalName": get_hospital_name(hospital_id, batch),
+        "reviewSnippet": review_snippet,
+        "reviewLink": get_review_link(hospital_id, batch),
+        "howToRespond": "빠른 사과, 원인 확인, 재방문 유도"
+    }
 
-    # Check if in quiet hours
-    if is_quiet_hours():
-        logger.info("In quiet hours, notifications suppressed")
-        # Create suppressed logs
+    skipped_count = 0
+    messages = []
+    try:
         for contact in contacts:
             phone_e164 = normalize_phone_e164(contact.phone)
-            dedup_key = generate_dedup_key(hospital_id, review_id, phone_e164)
 
-            Repo.create_notification_log(
+            # Check for duplicate
+            if check_duplicate(hospital_id, review_id, phone_e164):
+                skipped_count += 1
+                continue
+
+            messages.append(OutboundMessage(
                 hospital_id=hospital_id,
-                review_id=review_id,
-                from_flagged_id=flagged_id,
                 recipient_phone=phone_e164,
-                provider=settings.alim_provider,
                 template_code=settings.alim_template_code,
-                idempotency_key=dedup_key,
-                status="suppressed"
-            )
+                params=params,
+                reviews=((review_id, flagged_id, generate_dedup_key(hospital_id, review_id, phone_e164)),)
+            ))
+    except Exception:
+        # None of these will be sent: a later run must be able to claim them again
+        release_dedup_keys(message_dedup_keys(messages))
+        raise
 
-        return {"sent": 0, "skipped": len(contacts), "failed": 0}
+    return messages, skipped_count
 
-    # Initialize provider
-    if settings.alim_provider == "nhn_bizmessage":
-        provider = NHNBizMessageProvider()
-    else:
-        logger.error(f"Unsupported provider: {settings.alim_provider}")
-        return {"sent": 0, "skipped": 0, "failed": len(contacts)}
 
-    # Send to each contact
-    sent_count = 0
-    skipped_count = 0
-    failed_count = 0
+def prepare_hospital_messages(hospital_id: str, flagged_reviews: List[FlaggedReview],
+                              batch: Optional[NotificationBatch] = None) -> Tuple[List[OutboundMessage], int]:
+    """
+    Prepare one hospital's alerts: a single review keeps the regular alert
+    template, several are coalesced into one digest per contact. In the
+    hospital's quiet hours all of them are deferred.
 
-    for contact in contacts:
-        phone_e164 = normalize_phone_e164(contact.phone)
+    Args:
+        hospital_id: Hospital ID
+        flagged_reviews: The hospital's flagged reviews
+        batch: Work batch with the hospital and contacts (default: cached lookups)
 
-        # Check for duplicate
-        if check_duplicate(hospital_id, review_id, phone_e164, hours=24):
-            skipped_count += 1
-            continue
+    Returns:
+        tuple: (messages to send, number of review notifications skipped or deferred)
+    """
+    if len(flagged_reviews) == 1:
+        return prepare_messages(flagged_reviews[0], batch)
 
-        # Generate dedup key
-        dedup_key = generate_dedup_key(hospital_id, review_id, phone_e164)
+    contacts = get_active_contacts(hospital_id, batch)
+    if not contacts:
+        return [], 0
 
-        # Prepare template parameters
-        review_snippet = flagged_review.content[:120] + "..." if len(flagged_review.content) > 120 else flagged_review.content
+    if is_quiet_hours(get_hospital_timezone(hospital_id, batch)):
+        return [], defer_reviews(hospital_id, flagged_reviews, contacts, batch)
 
-        params = {
-            "hospitalName": flagged_review.hospital.name if hasattr(flagged_review, 'hospital') else "병원",
-            "reviewSnippet": review_snippet,
-            "reviewLink": "https://m.place.naver.com",  # TODO: Extract actual review link
-            "howToRespond": "빠른 사과, 원인 확인, 재방문 유도"
-        }
+    logger.info(f"Coalescing {len(flagged_reviews)} flagged reviews for hospital {hospital_id} into a digest")
 
-        try:
-            # Send notification
-            result = await provider.send_alimtalk(
-                template_code=settings.alim_template_code,
-                recipient_phone=phone_e164,
-                params=params,
-                idempotency_key=dedup_key
-            )
+    hospital_name = get_hospital_name(hospital_id, batch)
+    review_link = get_review_link(hospital_id, batch)
 
-            # Create log
-            status = "sent" if result.get("success") else "failed"
-            request_id = result.get("request_id")
-            result_code = result.get("result_code")
-            result_message = result.get("result_message")
+    skipped_count = 0
+    messages = []
+    claimed = []
+    try:
+        for contact in contacts:
+            phone_e164 = normalize_phone_e164(contact.phone)
 
-            Repo.create_notification_log(
+            # Each contact's digest only covers reviews not already sent to them
+            covered = []
+            for flagged in flagged_reviews:
+                if not check_duplicate(hospital_id, str(flagged.review_id), phone_e164):
+                    covered.append(flagged)
+                    claimed.append(generate_dedup_key(hospital_id, str(flagged.review_id), phone_e164))
+            skipped_count += len(flagged_reviews) - len(covered)
+            if not covered:
+                continue
+
+            messages.append(OutboundMessage(
                 hospital_id=hospital_id,
-                review_id=review_id,
-                from_flagged_id=flagged_id,
                 recipient_phone=phone_e164,
-                provider=settings.alim_provider,
-                template_code=settings.alim_template_code,
-                request_id=request_id,
-                idempotency_key=dedup_key,
-                status=status
-            )
+                template_code=settings.alim_digest_template_code,
+                params=digest_params(hospital_name, review_link, covered),
+                reviews=tuple(
+                    (str(f.review_id), str(f.id), generate_dedup_key(hospital_id, str(f.review_id), phone_e164))
+                    for f in covered
+                )
+            ))
+    except Exception:
+        # None of these will be sent: a later run must be able to claim them again
+        release_dedup_keys(claimed)
+        raise
+
+    return messages, skipped_count
+
+
+def message_dedup_keys(messages: List[OutboundMessage]) -> List[str]:
+    return [dedup_key for message in messages for _, _, dedup_key in message.reviews]
+
+
+async def dispatch_messages(provider: MessageProvider, messages: List[OutboundMessage],
+                            limiter: DispatchLimiter) -> Dict:
+    """
+    Send messages packed into multi-recipient requests and log each recipient.
+
+    Messages sharing a template go out together, up to the provider's
+    recipients-per-request limit; requests run concurrently within the
+    limiter's bounds. Each recipient's send result becomes its own
+    notification log, so one rejected number does not fail the rest; failed
+    recipients are scheduled for retry (apps.notify.retry).
+
+    Args:
+        provider: AlimTalk provider
+        messages: Prepared messages
+        limiter: Shared concurrency bounds
+
+    Returns:
+        dict: Counts of sent and failed messages
+    """
+    requests = pack_requests(provider, messages)
+    request_results = await send_requests(provider, requests, limiter)
+
+    # Logs are written together after all sends (no transaction held across HTTP calls)
+    now = datetime.now(timezone.utc)
+    sent_count = 0
+    failed_count = 0
+    pending_logs = []
+    sent_keys = []
+
+    for request, results in zip(requests, request_results):
+        retry_at = schedule_retry(1, provider.name, now)
+        for position, (message, result) in enumerate(zip(request.messages, results)):
+            outcome = outcome_fields(provider.name, request, position, result, attempts=1, retry_at=retry_at)
+            for review_id, flagged_id, dedup_key in message.reviews:
+                pending_logs.append({
+                    "hospital_id": message.hospital_id,
+                    "review_id": review_id,
+                    "from_flagged_id": flagged_id,
+                    "recipient_phone": message.recipient_phone,
+                    "template_code": message.template_code,
+                    "idempotency_key": dedup_key,
+                    **outcome
+                })
 
             if result.get("success"):
                 sent_count += 1
+                sent_keys.extend(dedup_key for _, _, dedup_key in message.reviews)
             else:
                 failed_count += 1
 
-        except Exception as e:
-            logger.error(f"Error sending notification to {phone_e164[:4]}***: {e}")
-            failed_count += 1
+    if pending_logs:
+        Repo.create_notification_logs(pending_logs)
+    mark_sent(sent_keys)
+
+    return {"sent": sent_count, "failed": failed_count, "requests": len(requests)}
+
+
+async def send_notification_for_review(flagged_review: FlaggedReview,
+                                       limiter: Optional[DispatchLimiter] = None) -> Dict:
+    """
+    Send notifications for a flagged review.
+
+    All of the review's recipients go out in one provider request; each gets
+    its own notification log.
+
+    Args:
+        flagged_review: Flagged review to notify about
+        limiter: Shared concurrency bounds (default: a fresh one for this review)
+
+    Returns:
+        dict: Results summary
+    """
+    messages, skipped_count = prepare_messages(flagged_review)
+    if not messages:
+        return {"sent": 0, "skipped": skipped_count, "failed": 0}
+
+    provider = get_provider()
+    if provider is None:
+        release_dedup_keys(message_dedup_keys(messages))
+        return {"sent": 0, "skipped": skipped_count, "failed": len(messages)}
+
+    result = await dispatch_messages(provider, messages, limiter or create_dispatch_limiter())
 
     logger.info(
-        f"Notification processing complete for flagged {flagged_id}: "
-        f"sent={sent_count}, skipped={skipped_count}, failed={failed_count}"
+        f"Notification processing complete for flagged {flagged_review.id}: "
+        f"sent={result['sent']}, skipped={skipped_count}, failed={result['failed']}"
     )
 
     return {
-        "sent": sent_count,
+        "sent": result["sent"],
         "skipped": skipped_count,
-        "failed": failed_count
+        "failed": result["failed"]
     }
 
 
@@ -191,8 +356,10 @@ async def run_notification_worker(limit: int = 100) -> Dict:
     """
     logger.info(f"Starting notification worker (limit={limit})")
 
-    # Get new flagged reviews
-    flagged_reviews = Repo.get_new_flagged_reviews(limit=limit)
+    # New flagged reviews with their hospitals and contacts, loaded up front; hospitals
+    # alerted within the digest window are left out and get one digest later
+    batch = Repo.get_notification_batch(limit=limit, hold_since=hold_since())
+    flagged_reviews = batch.flagged_reviews
 
     if not flagged_reviews:
         logger.info("No new flagged reviews to process")
@@ -205,15 +372,35 @@ async def run_notification_worker(limit: int = 100) -> Dict:
 
     logger.info(f"Processing {len(flagged_reviews)} flagged reviews")
 
-    total_sent = 0
+    groups = group_by_hospital(flagged_reviews)
+
     total_skipped = 0
+    messages = []
+
+    for hospital_id, hospital_reviews in groups.items():
+        try:
+            hospital_messages, skipped = prepare_hospital_messages(hospital_id, hospital_reviews, batch)
+        except Exception as e:
+            # prepare_hospital_messages released its dedup claims
+            logger.error(f"Notification processing failed for hospital {hospital_id}: {e}")
+            continue
+        messages.extend(hospital_messages)
+        total_skipped += skipped
+
+    total_sent = 0
     total_failed = 0
 
-    for flagged in flagged_reviews:
-        result = await send_notification_for_review(flagged)
-        total_sent += result["sent"]
-        total_skipped += result["skipped"]
-        total_failed += result["failed"]
+    if messages:
+        provider = get_provider()
+        if provider is None:
+            release_dedup_keys(message_dedup_keys(messages))
+            total_failed = len(messages)
+        else:
+            # Recipients of all reviews are packed into as few requests as the templates allow
+            result = await dispatch_messages(provider, messages, create_dispatch_limiter())
+            total_sent = result["sent"]
+            total_failed = result["failed"]
+            logger.info(f"Sent {len(messages)} notifications in {result['requests']} provider requests")
 
     logger.info(
         f"Notification worker complete: processed={len(flagged_reviews)}, "
@@ -226,3 +413,66 @@ async def run_notification_worker(limit: int = 100) -> Dict:
         "total_skipped": total_skipped,
         "total_failed": total_failed
     }
+
+
+async def release_deferred_notifications(limit: Optional[int] = None) -> Dict:
+    """
+    Send notifications deferred during quiet hours whose release time is due.
+
+    Due hospitals are released a batch per run; each hospital's reviews are
+    prepared together (one digest per contact when there are several) and
+    re-checked for duplicates. Released markers become `released`.
+
+    Args:
+        limit: Maximum number of hospitals to release (default: REV_NOTIFY_QUIET_RELEASE_BATCH)
+
+    Returns:
+        dict: Results summary
+    """
+    records = Repo.claim_deferred_notifications(
+        limit=limit or settings.notify_quiet_release_batch, lease_sec=RETRY_LEASE_SEC
+    )
+    if not records:
+        return {"hospitals": 0, "released": 0, "sent": 0, "skipped": 0, "failed": 0}
+
+    batch = Repo.get_notification_batch(flagged_ids=list({r.from_flagged_id for r in records}))
+    groups = group_by_hospital(batch.flagged_reviews)
+
+    total_skipped = 0
+    messages = []
+    for hospital_id, hospital_reviews in groups.items():
+        try:
+            hospital_messages, skipped = prepare_hospital_messages(hospital_id, hospital_reviews, batch)
+        except Exception as e:
+            # Markers stay claimed (dedup claims were released); they come due again when the lease expires
+            logger.error(f"Deferred notification release failed for hospital {hospital_id}: {e}")
+            records = [r for r in records if r.hospital_id != hospital_id]
+            continue
+        messages.extend(hospital_messages)
+        total_skipped += skipped
+
+    result = {"sent": 0, "failed": 0}
+    if messages:
+        provider = get_provider()
+        if provider is None:
+            # Leave the markers claimed: they are retried when the lease expires
+            release_dedup_keys(message_dedup_keys(messages))
+            return {"hospitals": len(groups), "released": 0, "sent": 0,
+                    "skipped": total_skipped, "failed": len(messages)}
+        result = await dispatch_messages(provider, messages, create_dispatch_limiter())
+
+    Repo.update_notification_attempts([
+        {"id": r.id, "status": "released", "next_attempt_at": None} for r in records
+    ])
+
+    logger.info(
+        f"Released deferred notifications for {len(groups)} hospitals: "
+        f"sent={result['sent']}, skipped={total_skipped}, failed={result['failed']}"
+    )
+    return {
+        "hospitals": len(groups),
+        "released": len(records),
+        "sent": result["sent"],
+        "skipped": total_skipped,
+        "failed": result["failed"]
+    }
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import task_postrun, worker_init, worker_process_init
 from datetime import timedelta
 import asyncio
 from apps.common import settings
@@ -28,6 +29,7 @@ app.conf.update(
     broker_connection_retry_on_startup=True,
     broker_pool_limit=5,  # Limit broker connection pool (reduced from default 10)
     worker_disable_rate_limits=True,  # Disable rate limits for better performance
+    worker_proc_alive_timeout=60,  # Pool children may load the sentiment model in worker_process_init
 )
 
 
@@ -46,11 +48,12 @@ def setup_periodic_tasks(sender, **kwargs):
         name='Hourly hospital review crawl'
     )
 
-    # Sentiment analysis every 30 minutes
+    # Catch-up sentiment sweep every 30 minutes (new reviews are analyzed on
+    # arrival by apps.sentiment.consumer)
     sender.add_periodic_task(
         timedelta(minutes=30),
         analyze_sentiments.s(),
-        name='Analyze new reviews'
+        name='Analyze missed reviews'
     )
 
     # Notification processing every 5 minutes
@@ -60,9 +63,85 @@ def setup_periodic_tasks(sender, **kwargs):
         name='Process flagged review notifications'
     )
 
+    # Due retries of failed notification sends (backoff, then SMS fallback)
+    sender.add_periodic_task(
+        timedelta(minutes=1),
+        retry_notifications.s(),
+        name='Retry failed notifications'
+    )
+
+    # Notifications deferred during quiet hours, released in batches once due
+    sender.add_periodic_task(
+        timedelta(minutes=1),
+        release_deferred_notifications.s(),
+        name='Release deferred notifications'
+    )
+
+    # Queued delivery callbacks, applied in bulk
+    sender.add_periodic_task(
+        timedelta(seconds=30),
+        apply_delivery_callbacks.s(),
+        name='Apply delivery callbacks'
+    )
+
     logger.info("Periodic tasks configured successfully")
 
 
+@worker_init.connect
+def preload_sentiment_model(sender=None, **kwargs):
+    """Load the sentiment model in the worker parent so forked pool children share it."""
+    if settings.sentiment_server_socket:
+        return  # The shared inference server holds the model
+
+    from apps.sentiment import parallel
+
+    # Pool children split the inference cores between them
+    parallel.set_core_sharers(getattr(sender, "concurrency", None) or 1)
+    if not settings.sentiment_preload:
+        return
+
+    from apps.sentiment.worker import preload_model
+    from apps.common import get_logger
+
+    try:
+        preload_model(before_fork=True)
+    except Exception as e:
+        # Children load it on their own in worker_process_init
+        get_logger(__name__).error(f"Sentiment model preload failed: {e}")
+
+
+@worker_process_init.connect
+def init_sentiment_model(**kwargs):
+    """Apply the child's thread share and make sure it has the model (no-op when inherited)."""
+    if settings.sentiment_server_socket:
+        return
+
+    from apps.sentiment import parallel
+    from apps.sentiment.worker import initialize_model
+    from apps.common import get_logger
+
+    layout = parallel.plan_layout(allow_sharding=False)
+    parallel.apply_thread_settings(layout.intra_op_threads, layout.inter_op_threads)
+    if not settings.sentiment_preload:
+        return
+
+    try:
+        initialize_model()
+    except Exception as e:
+        # analyze tasks retry the load lazily
+        get_logger(__name__).error(f"Sentiment model load failed: {e}")
+
+
+@task_postrun.connect
+def publish_db_metrics(**kwargs):
+    """Publish this worker process's DB metrics snapshot (throttled) for /api/metrics/db."""
+    if not settings.db_metrics_enabled:
+        return
+
+    from apps.storage.instrumentation import publish_snapshot
+    publish_snapshot()
+
+
 @app.task(name='revmon.crawl_hospital')
 def crawl_hospital(hospital_id: str, naver_place_url: str, is_initial: bool = False):
     """Crawl a single hospital's reviews."""
@@ -99,7 +178,7 @@ def crawl_all_hospitals():
 
 @app.task(name='revmon.analyze_sentiments')
 def analyze_sentiments():
-    """Analyze sentiment for unanalyzed reviews."""
+    """Analyze sentiment for unanalyzed reviews the stream consumer missed."""
     from apps.sentiment.worker import run_sentiment_analysis
     from apps.common import get_logger
 
@@ -123,5 +202,29 @@ def process_notifications():
     return result
 
 
+@app.task(name='revmon.retry_notifications')
+def retry_notifications():
+    """Resend failed notifications whose retry is due."""
+    from apps.notify.retry import run_notification_retries
+
+    return asyncio.run(run_notification_retries())
+
+
+@app.task(name='revmon.release_deferred_notifications')
+def release_deferred_notifications():
+    """Send notifications deferred during quiet hours once their release time is due."""
+    from apps.notify.worker import release_deferred_notifications as release_deferred
+
+    return asyncio.run(release_deferred())
+
+
+@app.task(name='revmon.apply_delivery_callbacks')
+def apply_delivery_callbacks():
+    """Apply queued provider delivery callbacks to notification logs."""
+    from apps.notify.callbacks import apply_delivery_callbacks as apply_callbacks
+
+    return apply_callbacks()
+
+
 if __name__ == '__main__':
     app.start()
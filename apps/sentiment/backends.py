@@ -0,0 +1,208 @@
+import os
+import inspect
+import numpy as np
+from typing import Dict, List, Optional
+from apps.common import settings, get_logger
+
+# torch / transformers / onnxruntime are imported where they are used: importing
+# apps.sentiment (e.g. from the scheduler or the API) must stay cheap.
+
+logger = get_logger(__name__)
+
+# Accepted drift of the ONNX (int8) backend against PyTorch fp32, checked by
+# scripts/export_onnx.py --verify: positive-probability scores may differ by at
+# most SCORE_TOLERANCE, and argmax labels must agree on LABEL_AGREEMENT_MIN of
+# the sample (near-tie reviews may flip after quantisation).
+SCORE_TOLERANCE = 0.05
+LABEL_AGREEMENT_MIN = 0.97
+
+ONNX_FP32_FILENAME = "model.onnx"
+ONNX_INT8_FILENAME = "model.int8.onnx"
+
+
+def softmax_rows(logits: np.ndarray) -> np.ndarray:
+    """Row-wise softmax over a (batch, num_labels) array."""
+    e_x = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return e_x / e_x.sum(axis=-1, keepdims=True)
+
+
+class InferenceBackend:
+    """Tokenizer plus a model that maps a numpy batch encoding to logits."""
+
+    name = "base"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.tokenizer = None
+
+    def logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        """Run the model on a padded batch encoding; returns (batch, num_labels) logits."""
+        raise NotImplementedError
+
+
+class TorchBackend(InferenceBackend):
+    """
+    Eager PyTorch inference (CUDA when available).
+
+    Weights load from model.safetensors when the checkpoint has one; safetensors
+    files are memory-mapped, and a model loaded before Celery forks its pool
+    is shared copy-on-write by the children.
+    """
+
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        super().__init__(model_name)
+        self._torch = torch
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        logger.info(f"Using device: {self.device}")
+
+        self.tokenizer = AutoTokenizer.from_pretrained(
+            model_name,
+            cache_dir=settings.transformers_cache
+        )
+        self.model = AutoModelForSequenceClassification.from_pretrained(
+            model_name,
+            cache_dir=settings.transformers_cache
+        ).to(self.device)
+        self.model.eval()
+
+    def logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        torch = self._torch
+        inputs = {k: torch.from_numpy(np.asarray(v)).to(self.device) for k, v in encoded.items()}
+        with torch.no_grad():
+            outputs = self.model(**inputs)
+        return outputs.logits.cpu().numpy()
+
+
+class OnnxBackend(InferenceBackend):
+    """ONNX Runtime CPU inference over an exported (optionally int8-quantised) graph."""
+
+    name = "onnx"
+
+    def __init__(self, model_name: str, onnx_path: Optional[str] = None):
+        super().__init__(model_name)
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "REV_SENTIMENT_BACKEND=onnx requires the onnxruntime package"
+            ) from e
+
+        self.onnx_path = onnx_path or settings.sentiment_onnx_path
+        if not os.path.exists(self.onnx_path):
+            raise FileNotFoundError(
+                f"ONNX model not found at {self.onnx_path}; run scripts/export_onnx.py first"
+            )
+
+        from transformers import AutoTokenizer
+
+        # Tokenizer is saved next to the graph by export_onnx
+        self.tokenizer = AutoTokenizer.from_pretrained(os.path.dirname(self.onnx_path))
+
+        from apps.sentiment.parallel import current_thread_settings
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = current_thread_settings()
+        if threads:
+            options.intra_op_num_threads, options.inter_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            self.onnx_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        logger.info(f"Loaded ONNX model: {self.onnx_path}")
+
+    def logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        feed = {name: np.asarray(encoded[name], dtype=np.int64) for name in self.input_names}
+        return self.session.run(["logits"], feed)[0]
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def create_backend(model_name: str, name: Optional[str] = None) -> InferenceBackend:
+    """Instantiate the configured backend (REV_SENTIMENT_BACKEND)."""
+    name = name or settings.sentiment_backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown sentiment backend: {name} (expected one of {list(BACKENDS)})")
+    return BACKENDS[name](model_name)
+
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = True) -> str:
+    """
+    Export the PyTorch model to ONNX (dynamic batch/sequence axes) and optionally
+    apply dynamic int8 quantisation. Returns the path of the graph to serve.
+    """
+    import torch
+
+    os.makedirs(output_dir, exist_ok=True)
+    backend = TorchBackend(model_name)
+    model = backend.model.to("cpu")
+    backend.tokenizer.save_pretrained(output_dir)
+
+    sample = backend.tokenizer(["예시 리뷰입니다"], return_tensors="pt")
+    input_names = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # Newer torch defaults to the dynamo exporter (needs onnxscript); keep TorchScript
+        export_kwargs["dynamo"] = False
+
+    fp32_path = os.path.join(output_dir, ONNX_FP32_FILENAME)
+    torch.onnx.export(
+        model,
+        tuple(sample[name] for name in input_names),
+        fp32_path,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=14,
+        **export_kwargs
+    )
+    logger.info(f"Exported ONNX graph: {fp32_path}")
+
+    if not quantize:
+        return fp32_path
+
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    int8_path = os.path.join(output_dir, ONNX_INT8_FILENAME)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    logger.info(
+        f"Quantised ONNX graph: {int8_path} "
+        f"({os.path.getsize(fp32_path) / 1e6:.0f}MB -> {os.path.getsize(int8_path) / 1e6:.0f}MB)"
+    )
+    return int8_path
+
+
+def compare_backends(reference: InferenceBackend, candidate: InferenceBackend,
+                     texts: List[str]) -> Dict:
+    """Compare candidate outputs against reference on texts (see SCORE_TOLERANCE)."""
+    def run(backend: InferenceBackend) -> np.ndarray:
+        encoded = backend.tokenizer(
+            texts, return_tensors="np", truncation=True, max_length=256, padding=True
+        )
+        return softmax_rows(backend.logits(dict(encoded)))
+
+    ref_probs = run(reference)
+    cand_probs = run(candidate)
+    score_diff = np.abs(ref_probs[:, 2] - cand_probs[:, 2])
+    agreement = float(np.mean(ref_probs.argmax(axis=-1) == cand_probs.argmax(axis=-1)))
+
+    return {
+        "samples": len(texts),
+        "max_score_diff": float(score_diff.max()),
+        "mean_score_diff": float(score_diff.mean()),
+        "label_agreement": agreement,
+        "within_tolerance": bool(
+            score_diff.max() <= SCORE_TOLERANCE and agreement >= LABEL_AGREEMENT_MIN
+        )
+    }
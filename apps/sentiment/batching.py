@@ -0,0 +1,43 @@
+import numpy as np
+from typing import Dict, List, Sequence
+
+
+def plan_batches(lengths: Sequence[int], token_budget: int, max_batch_items: int) -> List[List[int]]:
+    """
+    Group item indices into length-sorted batches.
+
+    Items are sorted by token length, and a batch is closed when adding the next
+    item would push its padded size (items x longest item) over token_budget, or
+    when it reaches max_batch_items. Short reviews therefore batch together
+    instead of paying for the padding of one long review.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_max = 0
+
+    for idx in order:
+        longest = max(current_max, lengths[idx])
+        if current and ((len(current) + 1) * longest > token_budget or len(current) >= max_batch_items):
+            batches.append(current)
+            current, longest = [], lengths[idx]
+        current.append(idx)
+        current_max = longest
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def pad_batch(encodings: Dict[str, List[List[int]]], indices: Sequence[int],
+              pad_token_id: int) -> Dict[str, np.ndarray]:
+    """Right-pad the selected unpadded encodings to the batch's longest item."""
+    longest = max(len(encodings["input_ids"][i]) for i in indices)
+    batch = {}
+    for key, rows in encodings.items():
+        pad_value = pad_token_id if key == "input_ids" else 0
+        arr = np.full((len(indices), longest), pad_value, dtype=np.int64)
+        for row, i in enumerate(indices):
+            arr[row, :len(rows[i])] = rows[i]
+        batch[key] = arr
+    return batch
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+from redis import RedisError
+from apps.common import settings, get_logger, get_redis, normalize_text
+
+logger = get_logger(__name__)
+
+
+def content_key(text: str) -> str:
+    """Content address of a review: SHA256 of its normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """
+    Sentiment results keyed by (model version, normalized review text).
+
+    A bounded in-process LRU sits in front of Redis; Redis entries carry a TTL
+    and are evicted by the server's allkeys-lru policy under memory pressure.
+    Changing the model version makes every old entry unreachable.
+    """
+
+    def __init__(self, local_size: int, ttl_sec: int):
+        self.local_size = local_size
+        self.ttl_sec = ttl_sec
+        self._local: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _redis_key(model_version: str, key: str) -> str:
+        return f"revmon:sentiment:{model_version}:{key}"
+
+    def _remember(self, cache_key: str, result: Tuple[str, float]):
+        with self._lock:
+            self._local[cache_key] = result
+            self._local.move_to_end(cache_key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def get_many(self, model_version: str, keys: Sequence[str]) -> List[Optional[Tuple[str, float]]]:
+        """Look up content keys; None for misses."""
+        results: List[Optional[Tuple[str, float]]] = [None] * len(keys)
+        remote = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._local.get(f"{model_version}:{key}")
+                if cached is not None:
+                    self._local.move_to_end(f"{model_version}:{key}")
+                    results[i] = cached
+                    self.local_hits += 1
+                else:
+                    remote.append(i)
+
+        if remote:
+            try:
+                values = get_redis().mget([self._redis_key(model_version, keys[i]) for i in remote])
+            except RedisError as e:
+                logger.warning(f"Sentiment cache: Redis lookup failed: {e}")
+                values = [None] * len(remote)
+
+            for i, raw in zip(remote, values):
+                if raw is None:
+                    continue
+                label, score = raw.split("|", 1)
+                results[i] = (label, float(score))
+                self._remember(f"{model_version}:{keys[i]}", results[i])
+
+        with self._lock:
+            hits = sum(1 for i in remote if results[i] is not None)
+            self.redis_hits += hits
+            self.misses += len(remote) - hits
+        return results
+
+    def put_many(self, model_version: str, entries: Dict[str, Tuple[str, float]]):
+        """Store results for content keys in both levels."""
+        for key, result in entries.items():
+            self._remember(f"{model_version}:{key}", result)
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for key, (label, score) in entries.items():
+                pipe.set(self._redis_key(model_version, key), f"{label}|{score}", ex=self.ttl_sec)
+            pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Sentiment cache: Redis store failed: {e}")
+
+    def stats(self) -> Dict:
+        """Cumulative hit/miss counters for this process."""
+        with self._lock:
+            hits = self.local_hits + self.redis_hits
+            total = hits + self.misses
+            return {
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0
+            }
+
+
+sentiment_cache = SentimentCache(
+    local_size=settings.sentiment_cache_local_size,
+    ttl_sec=settings.sentiment_cache_ttl_sec
+)
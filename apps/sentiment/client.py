@@ -0,0 +1,61 @@
+import json
+import socket
+from typing import List, Optional, Tuple
+from apps.common import settings
+
+
+class SentimentServerError(Exception):
+    """The shared sentiment server is unreachable or rejected the request."""
+
+
+class SentimentClient:
+    """Blocking client for apps.sentiment.server (one connection per call)."""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        self.socket_path = socket_path
+        self.timeout = timeout if timeout is not None else settings.sentiment_server_timeout_sec
+
+    def _call(self, request: dict) -> dict:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+                with sock.makefile("rb") as stream:
+                    line = stream.readline()
+        except OSError as e:
+            raise SentimentServerError(f"{self.socket_path}: {e}") from e
+
+        if not line:
+            raise SentimentServerError(f"{self.socket_path}: connection closed without a response")
+
+        response = json.loads(line)
+        if "error" in response:
+            raise SentimentServerError(response["error"])
+        return response
+
+    def analyze_texts(self, texts: List[str], failed: Optional[List[int]] = None) -> List[Tuple[str, float]]:
+        """Same contract as worker.analyze_texts: (label, score) per text, in order."""
+        if not texts:
+            return []
+        response = self._call({"texts": list(texts)})
+        if failed is not None:
+            failed.extend(response.get("failed", []))
+        return [(label, float(score)) for label, score in response["results"]]
+
+    def stats(self) -> dict:
+        """Batching counters of the running server."""
+        return self._call({"op": "stats"})["stats"]
+
+
+_client: Optional[SentimentClient] = None
+
+
+def get_client() -> Optional[SentimentClient]:
+    """Client for REV_SENTIMENT_SERVER_SOCKET, or None when the server is not configured."""
+    global _client
+    if not settings.sentiment_server_socket:
+        return None
+    if _client is None:
+        _client = SentimentClient(settings.sentiment_server_socket)
+    return _client
@@ -0,0 +1,213 @@
+"""
+New-review stream consumer.
+
+Reads review IDs published by the crawler (apps.common.events) through a Redis
+consumer group, analyzes them in small batches as they arrive and queues
+notification processing as soon as a negative review is flagged.
+
+    python -m apps.sentiment.consumer
+
+Several consumers may share the group; messages left unacknowledged by a
+crashed consumer are reclaimed after CLAIM_IDLE_MS. A message delivered
+REV_SENTIMENT_CONSUMER_MAX_DELIVERIES times is moved to NEW_REVIEWS_DEAD_STREAM
+and acknowledged instead of being retried forever. The periodic
+analyze_sentiments task remains as a catch-up sweep.
+"""
+
+import os
+import sys
+import time
+import socket
+import signal
+import statistics
+import redis
+from typing import List, Tuple
+from redis import RedisError, ResponseError
+from apps.sentiment import worker, parallel
+from apps.sentiment.client import get_client
+from apps.storage import Repo
+from apps.common import settings, get_logger
+from apps.common.events import NEW_REVIEWS_STREAM, NEW_REVIEWS_DEAD_STREAM
+
+logger = get_logger(__name__)
+
+CONSUMER_GROUP = "sentiment"
+
+# Pending messages idle this long are assumed orphaned by a dead consumer
+CLAIM_IDLE_MS = 60000
+
+_running = True
+
+
+def _stop(signum, frame):
+    global _running
+    _running = False
+
+
+def create_stream_client() -> redis.Redis:
+    """Dedicated client: XREADGROUP blocks longer than the shared client's socket timeout."""
+    return redis.Redis.from_url(
+        settings.redis_url,
+        decode_responses=True,
+        socket_timeout=settings.sentiment_consumer_block_ms / 1000 + 5,
+        socket_connect_timeout=2,
+        health_check_interval=30
+    )
+
+
+def ensure_group(client: redis.Redis):
+    """Create the consumer group (and stream) if missing."""
+    try:
+        client.xgroup_create(NEW_REVIEWS_STREAM, CONSUMER_GROUP, id="0", mkstream=True)
+        logger.info(f"Created consumer group {CONSUMER_GROUP} on {NEW_REVIEWS_STREAM}")
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def dead_letter(client: redis.Redis, messages: List[Tuple[str, dict]]) -> List[Tuple[str, dict]]:
+    """
+    Move reclaimed messages that keep failing to the dead-letter stream.
+
+    Args:
+        client: Stream Redis client
+        messages: Reclaimed (message id, fields) pairs
+
+    Returns:
+        The messages still worth retrying
+    """
+    max_deliveries = settings.sentiment_consumer_max_deliveries
+    if not messages or max_deliveries <= 0:
+        return messages
+
+    # One exact-ID lookup per message: a range over all of them could be filled
+    # by other pending entries and miss some
+    pipe = client.pipeline(transaction=False)
+    for message_id, _ in messages:
+        pipe.xpending_range(NEW_REVIEWS_STREAM, CONSUMER_GROUP, min=message_id, max=message_id, count=1)
+    deliveries = {
+        entry["message_id"]: entry["times_delivered"]
+        for entries in pipe.execute() for entry in entries
+    }
+
+    retry, dead = [], []
+    for message_id, fields in messages:
+        # The claim itself counts as a delivery
+        if deliveries.get(message_id, 0) > max_deliveries:
+            dead.append((message_id, fields))
+        else:
+            retry.append((message_id, fields))
+
+    if dead:
+        pipe = client.pipeline()
+        for message_id, fields in dead:
+            pipe.xadd(
+                NEW_REVIEWS_DEAD_STREAM,
+                {**fields, "source_id": message_id, "deliveries": deliveries[message_id]},
+                maxlen=settings.review_events_maxlen, approximate=True
+            )
+        pipe.xack(NEW_REVIEWS_STREAM, CONSUMER_GROUP, *[message_id for message_id, _ in dead])
+        pipe.execute()
+        logger.error(
+            f"Moved {len(dead)} new-review events to {NEW_REVIEWS_DEAD_STREAM} after "
+            f"{max_deliveries} deliveries: {[fields.get('review_id') for _, fields in dead]}"
+        )
+
+    return retry
+
+
+def read_batch(client: redis.Redis, consumer: str) -> List[Tuple[str, dict]]:
+    """Reclaim orphaned messages first, otherwise block for new ones."""
+    count = settings.sentiment_consumer_batch_size
+
+    claimed = client.xautoclaim(
+        NEW_REVIEWS_STREAM, CONSUMER_GROUP, consumer,
+        min_idle_time=CLAIM_IDLE_MS, start_id="0-0", count=count
+    )[1]
+    claimed = dead_letter(client, claimed)
+    if claimed:
+        logger.info(f"Reclaimed {len(claimed)} orphaned new-review events")
+        return claimed
+
+    response = client.xreadgroup(
+        CONSUMER_GROUP, consumer, {NEW_REVIEWS_STREAM: ">"},
+        count=count, block=settings.sentiment_consumer_block_ms
+    )
+    return response[0][1] if response else []
+
+
+def handle_batch(client: redis.Redis, messages: List[Tuple[str, dict]]) -> dict:
+    """
+    Analyze the reviews in a batch of stream messages and acknowledge them.
+
+    Args:
+        client: Stream Redis client
+        messages: (message id, fields) pairs
+
+    Returns:
+        dict: Results summary plus event-to-analysis lag
+    """
+    review_ids = list({fields["review_id"] for _, fields in messages if fields.get("review_id")})
+
+    # Already-analyzed reviews (e.g. handled by the sweep) are skipped
+    reviews = Repo.fetch_unanalyzed_reviews_by_ids(review_ids)
+    result = worker.process_reviews(reviews)
+
+    if result["flagged"]:
+        # Alert now instead of waiting for the next periodic notification run
+        from apps.scheduler.main import process_notifications
+        process_notifications.delay()
+
+    message_ids = [message_id for message_id, _ in messages]
+    client.xack(NEW_REVIEWS_STREAM, CONSUMER_GROUP, *message_ids)
+
+    # Stream IDs start with the publish time in ms
+    now_ms = time.time() * 1000
+    lags = [(now_ms - int(message_id.split("-")[0])) / 1000 for message_id in message_ids]
+    result["events"] = len(messages)
+    result["lag_p50_sec"] = round(statistics.median(lags), 2)
+    result["lag_max_sec"] = round(max(lags), 2)
+    return result
+
+
+def run_consumer():
+    """Consume new-review events until SIGINT/SIGTERM."""
+    consumer = f"{socket.gethostname()}:{os.getpid()}"
+    client = create_stream_client()
+
+    # Load the model up front unless the shared inference server holds it
+    if get_client() is None:
+        parallel.setup_inference_process()
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+    logger.info(f"Sentiment consumer {consumer} reading {NEW_REVIEWS_STREAM}")
+
+    group_ready = False
+    while _running:
+        try:
+            if not group_ready:
+                ensure_group(client)
+                group_ready = True
+
+            messages = read_batch(client, consumer)
+            if not messages:
+                continue
+
+            result = handle_batch(client, messages)
+            logger.info(f"Processed new-review events: {result}")
+
+        except RedisError as e:
+            logger.error(f"Redis error in sentiment consumer: {e}")
+            group_ready = False
+            time.sleep(5)
+        except Exception as e:
+            # Unacknowledged messages are reclaimed after CLAIM_IDLE_MS
+            logger.error(f"Error processing new-review events: {e}")
+            time.sleep(5)
+
+    logger.info("Sentiment consumer stopped")
+
+
+if __name__ == "__main__":
+    sys.exit(run_consumer())
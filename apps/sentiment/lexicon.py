@@ -0,0 +1,111 @@
+import threading
+from typing import Dict, Optional, Tuple
+from apps.common import normalize_text
+
+# Version of the rules below; bump when they change (recorded as provenance)
+LEXICON_VERSION = "lexicon:v1"
+
+POSITIVE_TERMS = (
+    "좋아요", "좋았어요", "좋습니다", "좋네요", "친절", "감사", "최고", "추천",
+    "만족", "꼼꼼", "깨끗", "편안", "잘 봐주", "잘해주", "잘 해주", "자세히",
+    "쾌적", "훌륭", "믿음", "신뢰", "세심",
+)
+
+# Any of these sends the review to the model. Negative vocabulary, negation and
+# contrast ("친절하지만 ...") are exactly where a lexicon is unreliable.
+ESCALATE_TERMS = (
+    # Negative vocabulary ("불친절" also keeps "친절" from matching it)
+    "불친절", "불쾌", "불편", "불만", "별로", "최악", "실망", "짜증", "화가", "화나",
+    "기분 나쁘", "비싸", "과잉", "오래 기다", "대기시간이 길", "대기 시간이 길", "엉망",
+    "무례", "후회", "다시는", "비추", "성의 없", "성의없", "대충", "돈 아까", "아쉽",
+    "아쉬웠", "그닥", "글쎄", "아프", "아팠",
+    # Negation
+    "안 ", "않", "못 ", "없",
+    # Contrast
+    "지만", "근데", "그런데", "다만",
+    # Sarcasm / distress markers
+    "ㅡㅡ", ";;", "ㅠ", "ㅜ", "?",
+)
+
+
+def classify(text: str, rating: Optional[int] = None) -> Optional[Tuple[str, float]]:
+    """
+    First-stage classifier for obviously positive reviews.
+
+    Only ever returns Positive: negatives always go through the transformer so
+    recall on the reviews we alert on is unchanged. The confidence grows with
+    distinct positive terms and a high star rating; callers escalate results
+    below their confidence threshold and store to_score() of the rest.
+
+    Returns:
+        (label, confidence), or None when the review must be escalated
+    """
+    if rating is not None and rating < 4:
+        return None
+
+    normalized = normalize_text(text)
+    if not normalized or any(term in normalized for term in ESCALATE_TERMS):
+        return None
+
+    positive_hits = sum(1 for term in POSITIVE_TERMS if term in normalized)
+    if positive_hits == 0:
+        return None
+
+    confidence = 0.55 + 0.15 * min(positive_hits, 3)
+    if rating == 5:
+        confidence += 0.15
+    elif rating == 4:
+        confidence += 0.05
+    if len(normalized) > 150:
+        confidence -= 0.1  # Long reviews tend to mix praise and complaints
+
+    return "Positive", round(min(confidence, 0.99), 4)
+
+
+def to_score(label: str, confidence: float) -> float:
+    """
+    Map a label's confidence onto the model's score scale (positive probability).
+
+    sentiment_score is P(Positive) everywhere (flagging uses score <= 0.35), so
+    a confident Negative has a low score, not a high one.
+    """
+    if label == "Positive":
+        return confidence
+    if label == "Negative":
+        return round(1.0 - confidence, 4)
+    return 0.5
+
+
+class CascadeStats:
+    """Per-process counters for the lexicon -> transformer cascade."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.accepted = 0
+        self.audited = 0
+        self.audit_agreed = 0
+
+    def record(self, total: int, accepted: int):
+        with self._lock:
+            self.total += total
+            self.accepted += accepted
+
+    def record_audit(self, audited: int, agreed: int):
+        """Accepted reviews that were also sent to the model, and how many labels matched."""
+        with self._lock:
+            self.audited += audited
+            self.audit_agreed += agreed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "total": self.total,
+                "accepted": self.accepted,
+                "escalation_rate": round(1 - self.accepted / self.total, 4) if self.total else 0.0,
+                "audited": self.audited,
+                "audit_agreement": round(self.audit_agreed / self.audited, 4) if self.audited else None
+            }
+
+
+cascade_stats = CascadeStats()
@@ -0,0 +1,189 @@
+"""
+CPU layout for sentiment inference.
+
+plan_layout() splits this machine's inference cores into intra-op threads per
+process and, for standalone processes (inference server, stream consumer,
+backfill), optionally a fork-based pool of shard processes that share the
+preloaded model copy-on-write. Celery pool children are daemonic and cannot
+fork a pool; they get their share of the cores as threads instead.
+"""
+
+import os
+import multiprocessing
+from typing import List, NamedTuple, Optional, Tuple
+from apps.common import settings, get_logger
+
+logger = get_logger(__name__)
+
+# Auto layout: intra-op scaling of batched ELECTRA-base inference flattens out
+# around this many threads, so bigger machines get more processes instead.
+# Tune per instance type with scripts/bench_sentiment.py.
+AUTO_THREADS_PER_SHARD = 4
+
+
+class Layout(NamedTuple):
+    processes: int
+    intra_op_threads: int
+    inter_op_threads: int
+
+
+# Processes that split this machine's inference cores (Celery pool size)
+_core_sharers = 1
+_threads: Optional[Tuple[int, int]] = None
+_pool: Optional["ShardPool"] = None
+
+
+def available_cores() -> int:
+    """Cores this process may run on (respects CPU affinity / cgroup cpusets)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def set_core_sharers(count: int):
+    """Declare how many sibling processes run inference on this machine (call before fork)."""
+    global _core_sharers
+    _core_sharers = max(1, count)
+
+
+def plan_layout(allow_sharding: bool = True) -> Layout:
+    """
+    Pick processes and threads for this process's share of the cores.
+
+    Explicit REV_SENTIMENT_SHARD_PROCESSES / _INTRA_OP_THREADS / _INTER_OP_THREADS
+    win; otherwise machines with at least 2 x AUTO_THREADS_PER_SHARD cores
+    shard, and every process gets an equal slice of the cores as threads.
+    """
+    cores = max(1, (settings.sentiment_cpu_cores or available_cores()) // _core_sharers)
+
+    processes = settings.sentiment_shard_processes
+    if processes is None:
+        processes = cores // AUTO_THREADS_PER_SHARD if cores >= 2 * AUTO_THREADS_PER_SHARD else 1
+    if not allow_sharding or multiprocessing.current_process().daemon:
+        processes = 1
+    processes = max(1, min(processes, cores))
+
+    return Layout(
+        processes=processes,
+        intra_op_threads=settings.sentiment_intra_op_threads or max(1, cores // processes),
+        inter_op_threads=settings.sentiment_inter_op_threads or 1
+    )
+
+
+def apply_thread_settings(intra_op_threads: int, inter_op_threads: int):
+    """Set this process's inference threads (torch now, ONNX Runtime at session creation)."""
+    global _threads
+    _threads = (intra_op_threads, inter_op_threads)
+
+    if settings.sentiment_backend == "torch":
+        import torch
+        torch.set_num_threads(intra_op_threads)
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError:
+            pass  # Only settable before the first inter-op parallel work
+
+
+def current_thread_settings() -> Optional[Tuple[int, int]]:
+    """(intra, inter) applied to this process, or None for library defaults."""
+    return _threads
+
+
+def _init_shard_worker(intra_op_threads: int, inter_op_threads: int):
+    from apps.sentiment import worker
+    apply_thread_settings(intra_op_threads, inter_op_threads)
+    worker.initialize_model()  # No-op when inherited from the parent
+
+
+def _analyze_shard(texts: List[str]) -> Tuple[List[tuple], List[int]]:
+    from apps.sentiment import worker
+    failed: List[int] = []
+    return worker.analyze_texts(texts, failed), failed
+
+
+class ShardedResult:
+    """Pending results of ShardPool.submit()."""
+
+    def __init__(self, size: int, shards: List[List[int]], pending: list):
+        self.size = size
+        self.shards = shards
+        self.pending = pending
+
+    def get(self, timeout: Optional[float] = None, failed: Optional[List[int]] = None) -> List[tuple]:
+        results: List[tuple] = [None] * self.size
+        for shard, pending in zip(self.shards, self.pending):
+            shard_results, shard_failed = pending.get(timeout)
+            for i, result in zip(shard, shard_results):
+                results[i] = result
+            if failed is not None:
+                failed.extend(shard[j] for j in shard_failed)
+        return results
+
+
+class ShardPool:
+    """
+    Fork-based process pool that splits a batch of texts across processes.
+
+    Create it before this process runs any inference: an OpenMP thread pool
+    started before fork deadlocks the children. Once a pool exists, route all
+    inference through it (the pool re-forks replacements for dead workers).
+    """
+
+    def __init__(self, layout: Layout, min_shard_items: Optional[int] = None):
+        self.layout = layout
+        self.min_shard_items = min_shard_items or settings.sentiment_shard_min_items
+        self._pool = multiprocessing.get_context("fork").Pool(
+            layout.processes,
+            initializer=_init_shard_worker,
+            initargs=(layout.intra_op_threads, layout.inter_op_threads)
+        )
+
+    def submit(self, texts: List[str]) -> ShardedResult:
+        # Deal length-sorted texts round-robin so shards carry similar token counts
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        count = max(1, min(self.layout.processes, len(texts) // self.min_shard_items))
+        shards = [order[k::count] for k in range(count)]
+        pending = [
+            self._pool.apply_async(_analyze_shard, ([texts[i] for i in shard],))
+            for shard in shards
+        ]
+        return ShardedResult(len(texts), shards, pending)
+
+    def analyze(self, texts: List[str], failed: Optional[List[int]] = None) -> List[tuple]:
+        """Same contract as worker.analyze_texts."""
+        if not texts:
+            return []
+        return self.submit(texts).get(failed=failed)
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+
+def get_shard_pool() -> Optional[ShardPool]:
+    return _pool
+
+
+def setup_inference_process(allow_sharding: bool = True) -> Layout:
+    """
+    Apply the planned layout to this process and load the model (or start the
+    shard pool, whose workers inherit or load it).
+    """
+    global _pool
+    from apps.sentiment import worker
+
+    layout = plan_layout(allow_sharding)
+    if layout.processes > 1 and _pool is None:
+        # Load before fork where the backend allows it so shards share the weights
+        worker.preload_model(before_fork=True)
+        _pool = ShardPool(layout)
+    elif _pool is None:
+        apply_thread_settings(layout.intra_op_threads, layout.inter_op_threads)
+        worker.initialize_model()
+
+    logger.info(
+        f"Sentiment inference layout: {layout.processes} process(es) x "
+        f"{layout.intra_op_threads} intra-op / {layout.inter_op_threads} inter-op threads"
+    )
+    return layout
@@ -0,0 +1,215 @@
+"""
+Shared sentiment inference server.
+
+Loads the model once per machine and serves every Celery worker process over a
+Unix socket. Requests arriving within a short window are merged into one
+inference call, so concurrent tasks fill batches together. Large merged
+batches are sharded across processes per apps.sentiment.parallel.
+
+    python -m apps.sentiment.server --socket /tmp/revmon-sentiment.sock
+
+Protocol: one JSON object per line.
+    {"texts": ["...", ...]}  ->  {"results": [["Negative", 0.12], ...], "failed": [indices]}
+    {"op": "stats"}          ->  {"stats": {...}}
+Errors are returned as {"error": "..."}.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import hashlib
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+from apps.sentiment import worker, parallel
+from apps.common import settings, get_logger
+
+logger = get_logger(__name__)
+
+# Max size of one request line (a few thousand reviews)
+STREAM_LIMIT = 32 * 1024 * 1024
+
+
+class MicroBatcher:
+    """
+    Collects analysis requests and runs them as merged batches.
+
+    A batch is dispatched once window_ms has passed since its first request or
+    it holds max_items texts. Requests that arrive while the model is busy
+    queue up and form the next batch. A request for exactly the texts of one
+    still queued or running (a client resubmitting after its timeout) waits
+    for that one instead of being analyzed again.
+    """
+
+    def __init__(self, window_ms: int, max_items: int):
+        self.window_sec = window_ms / 1000
+        self.max_items = max_items
+        self.queue: asyncio.Queue = asyncio.Queue()
+        # Model calls are serialised on one thread; the event loop keeps accepting requests
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sentiment")
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.joined = 0
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+        self.inference_sec = 0.0
+
+    async def submit(self, texts: List[str]) -> Tuple[List[Tuple[str, float]], List[int]]:
+        """(label, score) per text, and indices of texts that got the error default."""
+        key = hashlib.sha256("\x00".join(texts).encode("utf-8")).hexdigest()
+        future = self.inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.inflight[key] = future
+            future.add_done_callback(lambda _: self.inflight.pop(key, None))
+            await self.queue.put((texts, future))
+        else:
+            self.joined += 1
+        # Shielded: a caller that disconnects must not cancel the result for the others
+        return await asyncio.shield(future)
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        pending = [await self.queue.get()]
+        count = len(pending[0][0])
+        deadline = loop.time() + self.window_sec
+
+        while count < self.max_items:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            pending.append(item)
+            count += len(item[0])
+
+        return pending
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = await self._collect()
+            texts = [t for request_texts, _ in pending for t in request_texts]
+
+            start = time.perf_counter()
+            try:
+                failed: List[int] = []
+                results = await loop.run_in_executor(self.executor, worker.analyze_local, texts, failed)
+            except Exception as e:
+                logger.error(f"Batch of {len(texts)} texts failed: {e}")
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.inference_sec += time.perf_counter() - start
+
+            self.requests += len(pending)
+            self.batches += 1
+            self.texts += len(texts)
+
+            offset = 0
+            for request_texts, future in pending:
+                if not future.done():
+                    end = offset + len(request_texts)
+                    future.set_result((
+                        results[offset:end],
+                        [i - offset for i in failed if offset <= i < end]
+                    ))
+                offset += len(request_texts)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "joined_inflight": self.joined,
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_texts_per_batch": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "avg_requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "inference_sec": round(self.inference_sec, 3),
+            "queued": self.queue.qsize()
+        }
+
+
+async def handle_connection(batcher: MicroBatcher, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+
+            try:
+                request = json.loads(line)
+                if request.get("op") == "stats":
+                    response = {"stats": batcher.stats()}
+                else:
+                    texts = request["texts"]
+                    results, failed = await batcher.submit(texts) if texts else ([], [])
+                    response = {"results": [[label, score] for label, score in results], "failed": failed}
+            except Exception as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+
+            writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+            await writer.drain()
+    except (ConnectionResetError, BrokenPipeError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(socket_path: str, window_ms: int, max_items: int):
+    """Load the model and serve until SIGINT/SIGTERM."""
+    parallel.setup_inference_process()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # Stale socket from a previous run
+
+    batcher = MicroBatcher(window_ms, max_items)
+    batch_task = asyncio.create_task(batcher.run())
+    server = await asyncio.start_unix_server(
+        lambda r, w: handle_connection(batcher, r, w),
+        path=socket_path,
+        limit=STREAM_LIMIT
+    )
+    os.chmod(socket_path, 0o660)
+    logger.info(
+        f"Sentiment server listening on {socket_path} "
+        f"(window={window_ms}ms, max_items={max_items})"
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with server:
+        await stop.wait()
+
+    batch_task.cancel()
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    logger.info(f"Sentiment server stopped: {batcher.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared sentiment inference server")
+    parser.add_argument("--socket", default=settings.sentiment_server_socket,
+                        help="Unix socket path (default: REV_SENTIMENT_SERVER_SOCKET)")
+    parser.add_argument("--window-ms", type=int, default=settings.sentiment_server_batch_window_ms)
+    parser.add_argument("--max-items", type=int, default=settings.sentiment_server_max_items)
+    args = parser.parse_args()
+
+    if not args.socket:
+        parser.error("--socket or REV_SENTIMENT_SERVER_SOCKET is required")
+
+    asyncio.run(serve(args.socket, args.window_ms, args.max_items))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,16 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import gc
+import time
+import random
 import numpy as np
-from datetime import datetime
-from typing import List
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 from apps.storage import Repo
 from apps.storage.models import Review
+from apps.sentiment.backends import InferenceBackend, create_backend, softmax_rows
+from apps.sentiment.batching import plan_batches, pad_batch
+from apps.sentiment.cache import sentiment_cache, content_key
+from apps.sentiment.client import SentimentServerError, get_client
+from apps.sentiment import lexicon, parallel
 from apps.common import settings, get_logger
 
 logger = get_logger(__name__)
@@ -12,42 +18,62 @@ logger = get_logger(__name__)
 # Model configuration
 MODEL_NAME = "jinmang2/koelectra-base-discriminator"
 LABELS = ["Negative", "Neutral", "Positive"]
+MAX_LENGTH = 256
 
-# Global model and tokenizer (loaded once per worker)
-tokenizer = None
-model = None
-device = None
+# Global inference backend (loaded once per worker)
+backend: InferenceBackend = None
 
 
 def initialize_model():
     """Initialize model and tokenizer (called once per worker)."""
-    global tokenizer, model, device
+    global backend
 
-    if model is not None:
+    if backend is not None:
         return
 
-    logger.info(f"Loading sentiment model: {MODEL_NAME}")
-
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    logger.info(f"Using device: {device}")
+    logger.info(f"Loading sentiment model: {MODEL_NAME} (backend={settings.sentiment_backend})")
 
     try:
-        tokenizer = AutoTokenizer.from_pretrained(
-            MODEL_NAME,
-            cache_dir=settings.transformers_cache
-        )
-        model = AutoModelForSequenceClassification.from_pretrained(
-            MODEL_NAME,
-            cache_dir=settings.transformers_cache
-        ).to(device)
-        model.eval()
-
+        backend = create_backend(MODEL_NAME)
         logger.info("Sentiment model loaded successfully")
     except Exception as e:
         logger.error(f"Failed to load model: {e}")
         raise
 
 
+def preload_model(before_fork: bool = False):
+    """
+    Load the model ahead of the first task instead of on it.
+
+    Args:
+        before_fork: Loading in the Celery parent process so pool children
+            inherit the weights copy-on-write. Only done for the CPU torch
+            backend (CUDA contexts and ONNX Runtime sessions do not survive
+            fork), with torch held to one thread during the load: an OpenMP
+            thread pool started before fork deadlocks the child.
+    """
+    if not before_fork:
+        initialize_model()
+        return
+
+    if settings.sentiment_backend != "torch":
+        return
+
+    import torch
+    if torch.cuda.is_available():
+        return
+
+    threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    try:
+        initialize_model()
+    finally:
+        torch.set_num_threads(threads)
+
+    # Keep the loaded objects out of GC passes so children don't dirty their pages
+    gc.freeze()
+
+
 def softmax(x):
     """Compute softmax values."""
     e_x = np.exp(x - np.max(x))
@@ -62,21 +88,18 @@ def analyze_review(text: str) -> tuple:
         tuple: (label, score) where label is Negative/Neutral/Positive
                and score is the positive probability (0-1)
     """
-    if model is None:
+    if backend is None:
         initialize_model()
 
     try:
-        inputs = tokenizer(
+        inputs = backend.tokenizer(
             text,
-            return_tensors="pt",
+            return_tensors="np",
             truncation=True,
-            max_length=256
-        ).to(device)
-
-        with torch.no_grad():
-            outputs = model(**inputs)
+            max_length=MAX_LENGTH
+        )
 
-        logits = outputs.logits[0].cpu().numpy()
+        logits = backend.logits(dict(inputs))[0]
         probs = softmax(logits)
 
         # Score is positive probability
@@ -92,118 +115,271 @@ def analyze_review(text: str) -> tuple:
         raise
 
 
-def analyze_batch(reviews: List[Review]) -> List[tuple]:
+def analyze_texts(texts: List[str], failed: Optional[List[int]] = None) -> List[tuple]:
     """
-    Analyze multiple reviews in a batch for better performance.
+    Analyze texts with length-bucketed dynamic batching.
+
+    Texts are tokenized once without padding, grouped into length-sorted batches
+    under a padded-token budget, run through the backend, and mapped back to the
+    input order. Softmax and argmax run once per batch as array ops.
+
+    Args:
+        texts: Texts to analyze
+        failed: If given, indices of texts that could not be analyzed (and got
+            the Neutral default) are appended to it
 
     Returns:
-        List of (label, score) tuples
+        List of (label, score) tuples in input order
     """
-    if model is None:
+    if backend is None:
         initialize_model()
 
-    batch_size = settings.sentiment_batch_size
-    results = []
+    if not texts:
+        return []
 
-    for i in range(0, len(reviews), batch_size):
-        batch = reviews[i:i + batch_size]
-        texts = [r.content for r in batch]
+    encodings = backend.tokenizer(texts, truncation=True, max_length=MAX_LENGTH)
+    encodings = {k: encodings[k] for k in ("input_ids", "attention_mask", "token_type_ids") if k in encodings}
+    lengths = [len(ids) for ids in encodings["input_ids"]]
 
+    token_budget = settings.sentiment_token_budget or settings.sentiment_batch_size * MAX_LENGTH
+    batches = plan_batches(lengths, token_budget, settings.sentiment_max_batch_items)
+
+    scores = np.empty(len(texts), dtype=np.float64)
+    label_ids = np.empty(len(texts), dtype=np.int64)
+    for indices in batches:
         try:
-            # Batch tokenization
-            inputs = tokenizer(
-                texts,
-                return_tensors="pt",
-                truncation=True,
-                max_length=256,
-                padding=True
-            ).to(device)
-
-            with torch.no_grad():
-                outputs = model(**inputs)
-
-            logits = outputs.logits.cpu().numpy()
-
-            for logit in logits:
-                probs = softmax(logit)
-                score = float(probs[2])
-                label = LABELS[int(np.argmax(probs))]
-                results.append((label, score))
+            inputs = pad_batch(encodings, indices, backend.tokenizer.pad_token_id)
+            probs = softmax_rows(backend.logits(inputs))
+            scores[indices] = probs[:, 2]  # Score is positive probability
+            label_ids[indices] = probs.argmax(axis=-1)
 
         except Exception as e:
             logger.error(f"Error analyzing batch: {e}")
             # Fallback to individual analysis
-            for review in batch:
+            for i in indices:
                 try:
-                    result = analyze_review(review.content)
-                    results.append(result)
+                    label, score = analyze_review(texts[i])
                 except:
-                    results.append(("Neutral", 0.5))  # Default on error
+                    label, score = "Neutral", 0.5  # Default on error
+                    if failed is not None:
+                        failed.append(int(i))
+                scores[i] = score
+                label_ids[i] = LABELS.index(label)
 
-    return results
+    return [(LABELS[label_id], float(score)) for label_id, score in zip(label_ids, scores)]
 
 
-async def run_sentiment_analysis(limit: int = 200) -> dict:
+def analyze_local(texts: List[str], failed: Optional[List[int]] = None) -> List[tuple]:
+    """In-process inference, sharded across the process pool when one is running."""
+    pool = parallel.get_shard_pool()
+    if pool is not None:
+        return pool.analyze(texts, failed)
+    return analyze_texts(texts, failed)
+
+
+def infer_texts(texts: List[str], failed: Optional[List[int]] = None) -> List[tuple]:
     """
-    Run sentiment analysis on unanalyzed reviews with batch processing.
+    Analyze texts on the shared inference server when configured
+    (REV_SENTIMENT_SERVER_SOCKET), otherwise with the in-process model.
 
-    Args:
-        limit: Maximum number of reviews to process
+    An unreachable server (e.g. still loading, or restarting) is retried with
+    backoff for up to REV_SENTIMENT_SERVER_WAIT_SEC, then the error is raised
+    so the caller retries later. A resubmission after a timeout joins the
+    server's still-running request for the same texts rather than adding work. There is no in-process fallback: it would
+    load a full model copy into every worker process.
+    Indices of texts that got the error default are appended to `failed`.
 
     Returns:
-        dict: Results summary
+        List of (label, score) tuples in input order
+
+    Raises:
+        SentimentServerError: The server stayed unavailable
     """
-    logger.info(f"Starting sentiment analysis (limit={limit})")
+    client = get_client()
+    if client is None:
+        return analyze_local(texts, failed)
 
-    # Initialize model if not already loaded
-    initialize_model()
+    deadline = time.monotonic() + settings.sentiment_server_wait_sec
+    delay = 0.5
+    while True:
+        try:
+            return client.analyze_texts(texts, failed)
+        except SentimentServerError as e:
+            if time.monotonic() + delay > deadline:
+                logger.error(f"Sentiment server unavailable, giving up: {e}")
+                raise
+            logger.warning(f"Sentiment server unavailable, retrying in {delay:.1f}s: {e}")
+            time.sleep(delay)
+            delay = min(delay * 2, 5.0)
 
-    # Fetch unanalyzed reviews
-    reviews = Repo.fetch_unanalyzed_reviews(limit=limit)
 
+def get_model_version() -> str:
+    """Identifier of the model producing results (cache key and provenance)."""
+    return settings.sentiment_model_version or f"{MODEL_NAME}:{settings.sentiment_backend}"
+
+
+def analyze_texts_cached(texts: List[str]) -> Tuple[List[tuple], int]:
+    """
+    Analyze texts, serving repeated content from the sentiment cache.
+
+    Texts are keyed by normalized content; only distinct cache misses reach
+    the model. Texts the model failed on are not cached, so a transient error
+    does not pin their content to the default result.
+
+    Returns:
+        tuple: ((label, score) list in input order, number of cache hits)
+    """
+    if not settings.sentiment_cache_enabled:
+        return infer_texts(texts), 0
+
+    version = get_model_version()
+    keys = [content_key(t) for t in texts]
+    results = sentiment_cache.get_many(version, keys)
+    hits = sum(1 for r in results if r is not None)
+
+    # Distinct misses only: the same stock phrase is analyzed once per batch
+    missing: Dict[str, str] = {}
+    for key, text, result in zip(keys, texts, results):
+        if result is None and key not in missing:
+            missing[key] = text
+
+    if missing:
+        failed: List[int] = []
+        fresh = dict(zip(missing.keys(), infer_texts(list(missing.values()), failed)))
+        failed_keys = {list(missing)[i] for i in failed}
+        sentiment_cache.put_many(version, {k: r for k, r in fresh.items() if k not in failed_keys})
+        results = [r if r is not None else fresh[k] for k, r in zip(keys, results)]
+
+    return results, hits
+
+
+def analyze_batch(reviews: List[Review]) -> List[tuple]:
+    """
+    Analyze multiple reviews in a batch for better performance.
+
+    Returns:
+        List of (label, score) tuples
+    """
+    return infer_texts([r.content for r in reviews])
+
+
+def analyze_reviews_cascade(reviews: List[Review]) -> Tuple[List[tuple], List[str], int]:
+    """
+    Two-stage analysis: the lexical pre-classifier labels confident positives,
+    everything else is escalated to the (cached) transformer.
+
+    A REV_SENTIMENT_PREFILTER_AUDIT_RATE sample of accepted reviews is also run
+    through the model to track agreement (lexicon.cascade_stats).
+
+    Returns:
+        tuple: ((label, score) list in input order, model version per result, cache hits)
+    """
+    results: List[tuple] = [None] * len(reviews)
+    audit: List[int] = []
+
+    if settings.sentiment_prefilter_enabled:
+        for i, review in enumerate(reviews):
+            result = lexicon.classify(review.content, review.rating)
+            if result is not None and result[1] >= settings.sentiment_prefilter_threshold:
+                label, confidence = result
+                results[i] = (label, lexicon.to_score(label, confidence))
+                if random.random() < settings.sentiment_prefilter_audit_rate:
+                    audit.append(i)
+
+    escalated = [i for i, r in enumerate(results) if r is None]
+    to_model = escalated + audit
+    model_results, cache_hits = analyze_texts_cached([reviews[i].content for i in to_model])
+
+    for i, result in zip(escalated, model_results):
+        results[i] = result
+    agreed = sum(
+        1 for i, result in zip(audit, model_results[len(escalated):]) if result[0] == results[i][0]
+    )
+
+    lexicon.cascade_stats.record(len(reviews), len(reviews) - len(escalated))
+    lexicon.cascade_stats.record_audit(len(audit), agreed)
+
+    versions = [lexicon.LEXICON_VERSION] * len(reviews)
+    for i in escalated:
+        versions[i] = get_model_version()
+    return results, versions, cache_hits
+
+
+def process_reviews(reviews: List[Review]) -> dict:
+    """
+    Analyze reviews and persist sentiment, flagging negatives.
+
+    Shared by the periodic sweep and the new-review stream consumer.
+
+    Args:
+        reviews: Detached, unanalyzed reviews
+
+    Returns:
+        dict: Results summary
+    """
     if not reviews:
-        logger.info("No unanalyzed reviews found")
         return {
             "analyzed": 0,
-            "flagged": 0
+            "flagged": 0,
+            "cache_hits": 0,
+            "prefiltered": 0
         }
 
     logger.info(f"Analyzing {len(reviews)} reviews in batches")
 
-    # Batch analysis for better performance
-    batch_results = analyze_batch(reviews)
+    # Batch analysis for better performance (prefiltered and cached results skip the model)
+    batch_results, versions, cache_hits = analyze_reviews_cascade(reviews)
+    prefiltered = versions.count(lexicon.LEXICON_VERSION)
+    if cache_hits:
+        logger.info(
+            f"Sentiment cache: {cache_hits}/{len(reviews)} hits this run, "
+            f"cumulative {sentiment_cache.stats()}"
+        )
+    if prefiltered:
+        logger.info(
+            f"Sentiment prefilter: {prefiltered}/{len(reviews)} labeled without the model, "
+            f"cumulative {lexicon.cascade_stats.stats()}"
+        )
 
     analyzed_count = 0
     flagged_count = 0
 
-    for review, (label, score) in zip(reviews, batch_results):
-        try:
-            # Update review with sentiment data
-            Repo.update_sentiment(
-                review_id=str(review.id),
-                label=label,
-                score=score,
-                analyzed_at=datetime.utcnow()
-            )
-            analyzed_count += 1
-
-            # Flag if negative
-            if label == "Negative" or score <= 0.35:
-                # Update review object for flagging
-                review.sentiment_label = label
-                review.sentiment_score = score
-                Repo.flag_review(review)
-                flagged_count += 1
-
-                if flagged_count <= 5:  # Log only first 5 to reduce noise
-                    logger.info(
-                        f"Flagged negative review: {review.id}, "
-                        f"label={label}, score={score:.2f}"
+    # One transaction for the whole batch; each review gets a savepoint so a
+    # single failure is skipped without losing the rest
+    with Repo.transaction():
+        for review, (label, score), model_version in zip(reviews, batch_results, versions):
+            try:
+                with Repo.transaction():
+                    # Update review with sentiment data
+                    Repo.update_sentiment(
+                        review_id=str(review.id),
+                        label=label,
+                        score=score,
+                        analyzed_at=datetime.utcnow(),
+                        model_version=model_version
                     )
 
-        except Exception as e:
-            logger.error(f"Error processing review {review.id}: {e}")
-            continue
+                    # Flag if negative
+                    is_negative = label == "Negative" or score <= 0.35
+                    if is_negative:
+                        # Update review object for flagging
+                        review.sentiment_label = label
+                        review.sentiment_score = score
+                        Repo.flag_review(review)
+
+                analyzed_count += 1
+                if is_negative:
+                    flagged_count += 1
+
+                    if flagged_count <= 5:  # Log only first 5 to reduce noise
+                        logger.info(
+                            f"Flagged negative review: {review.id}, "
+                            f"label={label}, score={score:.2f}"
+                        )
+
+            except Exception as e:
+                logger.error(f"Error processing review {review.id}: {e}")
+                continue
 
     logger.info(
         f"Sentiment analysis complete: {analyzed_count} analyzed, "
@@ -212,5 +388,37 @@ async def run_sentiment_analysis(limit: int = 200) -> dict:
 
     return {
         "analyzed": analyzed_count,
-        "flagged": flagged_count
+        "flagged": flagged_count,
+        "cache_hits": cache_hits,
+        "prefiltered": prefiltered
     }
+
+
+async def run_sentiment_analysis(limit: int = 200) -> dict:
+    """
+    Catch-up sweep: analyze reviews the new-review consumer has not handled.
+
+    Reviews collected within REV_SENTIMENT_SWEEP_GRACE_MIN are left to the
+    consumer (apps.sentiment.consumer); the sweep covers missed events, e.g.
+    while Redis or the consumer was down.
+
+    Args:
+        limit: Maximum number of reviews to process
+
+    Returns:
+        dict: Results summary
+    """
+    logger.info(f"Starting sentiment analysis (limit={limit})")
+
+    # Initialize model if not already loaded (the shared server holds it otherwise)
+    if get_client() is None:
+        initialize_model()
+
+    # Fetch unanalyzed reviews
+    collected_before = datetime.utcnow() - timedelta(minutes=settings.sentiment_sweep_grace_min)
+    reviews = Repo.fetch_unanalyzed_reviews(limit=limit, collected_before=collected_before)
+
+    if not reviews:
+        logger.info("No unanalyzed reviews found")
+
+    return process_reviews(reviews)
@@ -1,12 +1,17 @@
 from .models import (
     Base, Hospital, Review, FlaggedReview,
-    HospitalContact, NotificationLog, FeatureFlag
+    HospitalContact, NotificationLog, FeatureFlag,
+    HospitalStats, HospitalDailyStats
 )
-from .db import get_db_session, init_db, engine
-from .repo import Repo
+from .db import get_db_session, unit_of_work, init_db, engine
+from .repo import Repo, FlaggedReviewRecord, NotificationBatch
+from .cache import HospitalRecord, ContactRecord, get_cache_stats
+from .instrumentation import metrics as db_metrics
 
 __all__ = [
     "Base", "Hospital", "Review", "FlaggedReview",
     "HospitalContact", "NotificationLog", "FeatureFlag",
-    "get_db_session", "init_db", "engine", "Repo"
+    "HospitalStats", "HospitalDailyStats",
+    "get_db_session", "unit_of_work", "init_db", "engine", "Repo", "FlaggedReviewRecord", "NotificationBatch",
+    "HospitalRecord", "ContactRecord", "get_cache_stats", "db_metrics"
 ]
@@ -0,0 +1,202 @@
+import json
+import time
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from redis import RedisError
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from apps.storage.models import Hospital, HospitalContact
+from apps.common import settings, get_logger, get_redis
+
+logger = get_logger(__name__)
+
+
+class HospitalRecord(NamedTuple):
+    """Lightweight, session-independent view of a hospital."""
+    id: str
+    name: str
+    naver_place_url: str
+    status: Optional[str]
+    timezone: Optional[str] = None  # Absent in entries cached before the column existed
+
+
+class ContactRecord(NamedTuple):
+    """Lightweight, session-independent view of a hospital contact."""
+    id: str
+    hospital_id: str
+    name: str
+    phone: str
+    priority: Optional[int]
+
+
+class ReadThroughCache:
+    """
+    Two-level read-through cache: a short-lived in-process dict in front of Redis.
+
+    Values must be JSON-serializable. Misses on both levels call the loader and
+    populate both levels. Redis failures degrade to the loader, never to an error.
+    """
+
+    def __init__(self, namespace: str, ttl_sec: int, local_ttl_sec: int,
+                 encode: Callable[[Any], Any] = lambda v: v,
+                 decode: Callable[[Any], Any] = lambda v: v):
+        self.namespace = namespace
+        self.ttl_sec = ttl_sec
+        self.local_ttl_sec = local_ttl_sec
+        self._encode = encode
+        self._decode = decode
+        self._local: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def _redis_key(self, key: str) -> str:
+        return f"revmon:cache:{self.namespace}:{key}"
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Return cached value for key, loading and caching it on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry and entry[0] > now:
+                self.local_hits += 1
+                return entry[1]
+
+        try:
+            raw = get_redis().get(self._redis_key(key))
+        except RedisError as e:
+            logger.warning(f"Cache {self.namespace}: Redis get failed, using DB: {e}")
+            raw = None
+
+        if raw is not None:
+            value = self._decode(json.loads(raw))
+            with self._lock:
+                self.redis_hits += 1
+                self._local[key] = (now + self.local_ttl_sec, value)
+            return value
+
+        value = loader()
+        with self._lock:
+            self.misses += 1
+            self._local[key] = (now + self.local_ttl_sec, value)
+
+        try:
+            get_redis().set(self._redis_key(key), json.dumps(self._encode(value)), ex=self.ttl_sec)
+        except RedisError as e:
+            logger.warning(f"Cache {self.namespace}: Redis set failed: {e}")
+
+        return value
+
+    def invalidate(self, key: str):
+        """Drop key from both levels."""
+        with self._lock:
+            self._local.pop(key, None)
+        try:
+            get_redis().delete(self._redis_key(key))
+        except RedisError as e:
+            logger.warning(f"Cache {self.namespace}: Redis invalidate failed: {e}")
+
+    def clear_local(self):
+        """Drop all in-process entries (Redis entries expire by TTL)."""
+        with self._lock:
+            self._local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process."""
+        with self._lock:
+            hits = self.local_hits + self.redis_hits
+            total = hits + self.misses
+            return {
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0
+            }
+
+
+def _encode_hospital(record: Optional[HospitalRecord]):
+    return record._asdict() if record else None
+
+
+def _decode_hospital(data) -> Optional[HospitalRecord]:
+    return HospitalRecord(**data) if data else None
+
+
+def _encode_contacts(records: List[ContactRecord]):
+    return [r._asdict() for r in records]
+
+
+def _decode_contacts(data) -> List[ContactRecord]:
+    return [ContactRecord(**d) for d in data]
+
+
+hospital_cache = ReadThroughCache(
+    "hospital",
+    ttl_sec=settings.hospital_cache_ttl_sec,
+    local_ttl_sec=settings.hospital_cache_local_ttl_sec,
+    encode=_encode_hospital,
+    decode=_decode_hospital
+)
+
+contacts_cache = ReadThroughCache(
+    "contacts",
+    ttl_sec=settings.hospital_cache_ttl_sec,
+    local_ttl_sec=settings.hospital_cache_local_ttl_sec,
+    encode=_encode_contacts,
+    decode=_decode_contacts
+)
+
+
+def invalidate_hospital(hospital_id: str):
+    """Invalidate cached hospital record and contact list for a hospital."""
+    hospital_id = str(hospital_id)
+    hospital_cache.invalidate(hospital_id)
+    contacts_cache.invalidate(hospital_id)
+    logger.info(f"Invalidated hospital cache: {hospital_id}")
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters for all hospital caches in this process."""
+    return {
+        "hospital": hospital_cache.stats(),
+        "contacts": contacts_cache.stats()
+    }
+
+
+# Invalidation hooks: any session that writes a Hospital or HospitalContact
+# (Repo methods, scripts, admin sessions) drops the cache after commit.
+_PENDING_KEY = "revmon_cache_invalidate"
+_CACHED_HOSPITAL_FIELDS = ("name", "naver_place_url", "status", "timezone")
+
+
+def _hospital_record_changed(hospital: Hospital) -> bool:
+    # Skip invalidation for writes that only touch uncached fields (e.g. last_crawled_at)
+    state = inspect(hospital)
+    return any(state.attrs[field].history.has_changes() for field in _CACHED_HOSPITAL_FIELDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_hospitals(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Hospital):
+            pending.add(str(obj.id))
+        elif isinstance(obj, HospitalContact):
+            pending.add(str(obj.hospital_id))
+    for obj in session.dirty:
+        if isinstance(obj, Hospital) and _hospital_record_changed(obj):
+            pending.add(str(obj.id))
+        elif isinstance(obj, HospitalContact):
+            pending.add(str(obj.hospital_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_hospitals(session):
+    for hospital_id in session.info.pop(_PENDING_KEY, set()):
+        invalidate_hospital(hospital_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_hospitals(session):
+    session.info.pop(_PENDING_KEY, None)
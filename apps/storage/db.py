@@ -1,15 +1,18 @@
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
 from apps.common import settings, get_logger
+from apps.storage import instrumentation
 
 logger = get_logger(__name__)
 
 # Create engine with optimized pooling
 engine = create_engine(
     settings.db_url,
-    poolclass=QueuePool,
+    poolclass=instrumentation.InstrumentedQueuePool if settings.db_metrics_enabled else QueuePool,
     pool_pre_ping=True,
     pool_size=settings.db_pool_size,
     max_overflow=settings.db_max_overflow,
@@ -30,6 +33,10 @@ def receive_connect(dbapi_conn, connection_record):
     cursor.execute("SET timezone='UTC'")
     cursor.close()
 
+# Statement latency / row count / slow-query instrumentation
+if settings.db_metrics_enabled:
+    instrumentation.install(engine)
+
 # Create session factory with optimized settings
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -39,9 +46,24 @@ SessionLocal = sessionmaker(
 )
 
 
+# Session of the active unit of work, if any (see unit_of_work)
+_current_session: ContextVar[Optional[Session]] = ContextVar("_current_session", default=None)
+
+
 @contextmanager
 def get_db_session() -> Session:
-    """Context manager for database sessions."""
+    """
+    Context manager for database sessions.
+
+    Inside an active unit of work the shared session is reused: pending changes
+    are flushed on exit, and commit/rollback is left to the unit of work.
+    """
+    ambient = _current_session.get()
+    if ambient is not None:
+        yield ambient
+        ambient.flush()
+        return
+
     session = SessionLocal()
     try:
         yield session
@@ -54,8 +76,72 @@ def get_db_session() -> Session:
         session.close()
 
 
+@contextmanager
+def unit_of_work() -> Session:
+    """
+    Run several repository operations over one session, connection and commit.
+
+    Every Repo call made inside the block joins the same transaction, which is
+    committed on exit or rolled back on error. Nesting opens a SAVEPOINT, so an
+    inner block can fail and be caught without aborting the outer transaction.
+    """
+    ambient = _current_session.get()
+    if ambient is not None:
+        with ambient.begin_nested():
+            yield ambient
+        return
+
+    session = SessionLocal()
+    token = _current_session.set(session)
+    try:
+        yield session
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Unit of work rolled back: {e}")
+        raise
+    finally:
+        _current_session.reset(token)
+        session.close()
+
+
+# Columns added to existing tables after their first release (create_all skips
+# existing tables). Must be nullable or have a server default.
+ADDED_COLUMNS = [
+    ("reviews", "model_version", "TEXT"),
+    ("hospitals", "timezone", "TEXT NOT NULL DEFAULT 'Asia/Seoul'"),
+    ("notification_logs", "recipient_seq", "INTEGER"),
+    ("notification_logs", "attempts", "INTEGER NOT NULL DEFAULT 1"),
+    ("notification_logs", "next_attempt_at", "TIMESTAMPTZ"),
+    ("notification_logs", "payload", "JSONB"),
+]
+
+
+# Bigram index for 2-character search terms, which trigrams cannot serve (see
+# apps.storage.search); created only where the pg_bigm extension is available
+BIGRAM_INDEX_DDL = "CREATE INDEX IF NOT EXISTS idx_reviews_content_bigm ON reviews USING gin (content gin_bigm_ops)"
+
+
 def init_db():
     """Initialize database tables."""
     from apps.storage.models import Base
+    with engine.begin() as conn:
+        # Trigram index on reviews.content (Korean keyword search)
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
     Base.metadata.create_all(bind=engine)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_bigm"))
+            conn.execute(text(BIGRAM_INDEX_DDL))
+    except Exception as e:
+        logger.warning(
+            f"pg_bigm unavailable, 2-character search terms will scan reviews.content: {e}"
+        )
+    # create_all skips existing tables; add columns and indexes introduced since they were created
+    with engine.begin() as conn:
+        for table, column, ddl in ADDED_COLUMNS:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {ddl}"))
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
     logger.info("Database tables created successfully")
@@ -0,0 +1,320 @@
+import os
+import re
+import json
+import time
+import socket
+import bisect
+import functools
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from apps.common import settings, get_logger, get_redis
+
+logger = get_logger(__name__)
+
+# Latency bucket upper bounds in milliseconds (last bucket is +Inf)
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+METRICS_KEY_PREFIX = "revmon:metrics:db"
+METRICS_KEY_TTL_SEC = 300
+
+# Repo method currently executing in this context (statements are attributed to it)
+_current_repo_method: ContextVar[Optional[str]] = ContextVar("_current_repo_method", default=None)
+
+_IN_LIST_RE = re.compile(r"\bIN \((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (milliseconds)."""
+
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def percentile(self, q: float) -> float:
+        """Approximate percentile (bucket upper bound), q in [0, 1]."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return float(self.buckets[i]) if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.total, 3),
+            "max_ms": round(self.max, 3),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts))
+        }
+
+
+class _StatementStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.rows = 0
+        self.errors = 0
+
+
+class DBMetrics:
+    """In-process registry of statement, Repo method and pool metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.statements: Dict[str, _StatementStats] = {}
+            self.repo_methods: Dict[str, _StatementStats] = {}
+            self.repo_method_db_time: Dict[str, float] = {}
+            self.pool_wait = Histogram()
+            self.pool_checked_out = 0
+            self.pool_capacity = 0
+            self.pool_saturation_max = 0.0
+            self.slow_queries = 0
+            self.failed_queries = 0
+            self.started_at = time.time()
+
+    def record_statement(self, statement: str, elapsed_ms: float, rowcount: int,
+                         repo_method: Optional[str], slow: bool = False):
+        with self._lock:
+            stats = self.statements.setdefault(statement, _StatementStats())
+            stats.latency.observe(elapsed_ms)
+            stats.rows += max(rowcount, 0)
+            if slow:
+                self.slow_queries += 1
+            if repo_method:
+                self.repo_method_db_time[repo_method] = (
+                    self.repo_method_db_time.get(repo_method, 0.0) + elapsed_ms
+                )
+
+    def record_failure(self, statement: str, elapsed_ms: float, repo_method: Optional[str]):
+        with self._lock:
+            stats = self.statements.setdefault(statement, _StatementStats())
+            stats.latency.observe(elapsed_ms)
+            stats.errors += 1
+            self.failed_queries += 1
+            if repo_method:
+                self.repo_method_db_time[repo_method] = (
+                    self.repo_method_db_time.get(repo_method, 0.0) + elapsed_ms
+                )
+
+    def record_repo_call(self, method: str, elapsed_ms: float):
+        with self._lock:
+            self.repo_methods.setdefault(method, _StatementStats()).latency.observe(elapsed_ms)
+
+    def record_checkout(self, wait_ms: float, checked_out: int, capacity: int):
+        with self._lock:
+            self.pool_wait.observe(wait_ms)
+            self.pool_checked_out = checked_out
+            self.pool_capacity = capacity
+            if capacity:
+                self.pool_saturation_max = max(self.pool_saturation_max, checked_out / capacity)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable view of all metrics."""
+        with self._lock:
+            statements = sorted(
+                self.statements.items(), key=lambda kv: kv[1].latency.total, reverse=True
+            )
+            return {
+                "host": socket.gethostname(),
+                "pid": os.getpid(),
+                "started_at": self.started_at,
+                "captured_at": time.time(),
+                "slow_queries": self.slow_queries,
+                "failed_queries": self.failed_queries,
+                "pool": {
+                    "checkout_wait": self.pool_wait.to_dict(),
+                    "checked_out": self.pool_checked_out,
+                    "capacity": self.pool_capacity,
+                    "saturation": round(self.pool_checked_out / self.pool_capacity, 4)
+                    if self.pool_capacity else 0.0,
+                    "saturation_max": round(self.pool_saturation_max, 4)
+                },
+                "repo_methods": {
+                    name: {
+                        **stats.latency.to_dict(),
+                        "db_time_ms": round(self.repo_method_db_time.get(name, 0.0), 3)
+                    }
+                    for name, stats in self.repo_methods.items()
+                },
+                "statements": [
+                    {"statement": sql, "rows": stats.rows, "errors": stats.errors, **stats.latency.to_dict()}
+                    for sql, stats in statements
+                ]
+            }
+
+
+metrics = DBMetrics()
+
+
+def normalize_statement(statement: str) -> str:
+    """Collapse whitespace and expanded IN lists so equivalent statements group together."""
+    statement = _WHITESPACE_RE.sub(" ", statement).strip()
+    statement = _IN_LIST_RE.sub("IN (...)", statement)
+    return statement[:300]
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Replace bound parameter values with their type names (no PII in logs)."""
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: describe the first row and the batch size
+            return {"rows": len(parameters), "first": redact_parameters(parameters[0])}
+        return [type(v).__name__ for v in parameters]
+    return type(parameters).__name__
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time and saturation."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait_ms = (time.perf_counter() - start) * 1000
+            metrics.record_checkout(
+                wait_ms, self.checkedout(), self.size() + max(self._max_overflow, 0)
+            )
+
+
+def install(engine: Engine):
+    """Attach cursor-execute listeners to the engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("revmon_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("revmon_query_start")
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        repo_method = _current_repo_method.get()
+        normalized = normalize_statement(statement)
+        slow = elapsed_ms >= settings.db_slow_query_ms
+        metrics.record_statement(normalized, elapsed_ms, cursor.rowcount, repo_method, slow)
+
+        if slow:
+            logger.warning(
+                f"Slow query ({elapsed_ms:.1f}ms, method={repo_method or '-'}, "
+                f"rows={cursor.rowcount}): {normalized} "
+                f"params={redact_parameters(parameters)}"
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        # A failed statement never reaches after_cursor_execute: drop its start time here
+        # (the list would otherwise grow for the life of the pooled connection)
+        conn = context.connection
+        if conn is None or context.statement is None:
+            return
+        starts = conn.info.get("revmon_query_start")
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        metrics.record_failure(normalize_statement(context.statement), elapsed_ms, _current_repo_method.get())
+
+
+def instrument_repo(cls):
+    """Wrap every static method of a repository class with latency tracking."""
+
+    def wrap(name: str, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = _current_repo_method.set(name)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.record_repo_call(name, (time.perf_counter() - start) * 1000)
+                _current_repo_method.reset(token)
+        return wrapper
+
+    for name, attr in list(vars(cls).items()):
+        # transaction() only returns a context manager; timing it is meaningless
+        if isinstance(attr, staticmethod) and name != "transaction":
+            setattr(cls, name, staticmethod(wrap(f"{cls.__name__}.{name}", attr.__func__)))
+    return cls
+
+
+def render_prometheus(snapshots: List[Dict[str, Any]]) -> str:
+    """Render published snapshots in Prometheus text exposition format."""
+    lines = []
+
+    def histogram(metric: str, labels: str, data: Dict[str, Any]):
+        cumulative = 0
+        for bound, count in data["buckets"].items():
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{metric}_sum{{{labels}}} {data['sum_ms']}")
+        lines.append(f"{metric}_count{{{labels}}} {data['count']}")
+
+    for snap in snapshots:
+        proc = f'host="{snap["host"]}",pid="{snap["pid"]}"'
+        pool = snap["pool"]
+        histogram("revmon_db_pool_checkout_wait_ms", proc, pool["checkout_wait"])
+        lines.append(f"revmon_db_pool_checked_out{{{proc}}} {pool['checked_out']}")
+        lines.append(f"revmon_db_pool_saturation{{{proc}}} {pool['saturation']}")
+        lines.append(f"revmon_db_slow_queries_total{{{proc}}} {snap['slow_queries']}")
+        lines.append(f"revmon_db_failed_queries_total{{{proc}}} {snap.get('failed_queries', 0)}")
+        for method, data in snap["repo_methods"].items():
+            labels = f'{proc},method="{method}"'
+            histogram("revmon_db_repo_method_ms", labels, data)
+            lines.append(f"revmon_db_repo_method_db_time_ms{{{labels}}} {data['db_time_ms']}")
+
+    return "\n".join(lines) + "\n"
+
+
+_last_publish = 0.0
+
+
+def publish_snapshot(force: bool = False):
+    """Publish this process's snapshot to Redis for the metrics endpoint (throttled)."""
+    global _last_publish
+    now = time.monotonic()
+    if not force and now - _last_publish < settings.db_metrics_publish_interval_sec:
+        return
+    _last_publish = now
+
+    snap = metrics.snapshot()
+    key = f"{METRICS_KEY_PREFIX}:{snap['host']}:{snap['pid']}"
+    try:
+        get_redis().set(key, json.dumps(snap), ex=METRICS_KEY_TTL_SEC)
+    except Exception as e:
+        logger.warning(f"Failed to publish DB metrics: {e}")
+
+
+def load_published_snapshots() -> List[Dict[str, Any]]:
+    """Read all live process snapshots published to Redis."""
+    client = get_redis()
+    keys = list(client.scan_iter(match=f"{METRICS_KEY_PREFIX}:*", count=100))
+    if not keys:
+        return []
+    return [json.loads(raw) for raw in client.mget(keys) if raw]
@@ -1,9 +1,9 @@
 from sqlalchemy import (
-    Column, String, Integer, Float, Boolean, Text, DateTime, ForeignKey, Index
+    Column, String, Integer, Float, Boolean, Text, Date, DateTime, ForeignKey, Index
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 import uuid
 
 Base = declarative_base()
@@ -17,6 +17,7 @@ class Hospital(Base):
     naver_place_url = Column(Text, nullable=False, unique=True)
     last_crawled_at = Column(DateTime(timezone=True), nullable=True)
     status = Column(String(50), default="active")  # active, quarantined, disabled
+    timezone = Column(Text, nullable=False, default="Asia/Seoul", server_default="Asia/Seoul")  # Quiet hours apply in local time
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -41,6 +42,7 @@ class Review(Base):
     sentiment_label = Column(Text, nullable=True)  # Positive, Neutral, Negative
     sentiment_score = Column(Float, nullable=True)  # 0~1
     analyzed_at = Column(DateTime(timezone=True), nullable=True)
+    model_version = Column(Text, nullable=True)  # Model (or lexicon) that produced the label
 
     hospital = relationship("Hospital", back_populates="reviews")
     flagged = relationship("FlaggedReview", back_populates="review", uselist=False)
@@ -49,6 +51,13 @@ class Review(Base):
         Index("idx_reviews_hospital_id", "hospital_id"),
         Index("idx_reviews_review_hash", "review_hash"),
         Index("idx_reviews_sentiment_label", "sentiment_label"),
+        # Keyword search (requires pg_trgm, created by init_db) and keyset pagination
+        Index(
+            "idx_reviews_content_trgm", "content",
+            postgresql_using="gin", postgresql_ops={"content": "gin_trgm_ops"}
+        ),
+        Index("idx_reviews_collected_at_id", "collected_at", "id"),
+        Index("idx_reviews_hospital_collected_at_id", "hospital_id", "collected_at", "id"),
     )
 
 
@@ -105,10 +114,15 @@ class NotificationLog(Base):
     provider = Column(Text, nullable=False)  # nhn_bizmessage, kakao_bizmessage
     template_code = Column(Text, nullable=False)
     request_id = Column(Text, nullable=True)
+    recipient_seq = Column(Integer, nullable=True)  # Position in a multi-recipient request
     idempotency_key = Column(Text, nullable=False)
-    status = Column(Text, default="queued")  # queued, sent, delivered, failed, resend_sms, suppressed
+    status = Column(Text, default="queued")  # queued, sent, delivered, failed, resend_sms, deferred, released
     result_code = Column(Text, nullable=True)
     result_message = Column(Text, nullable=True)
+    # Retry state for failed sends (apps/notify/retry.py); next_attempt_at is NULL once final
+    attempts = Column(Integer, nullable=False, default=1, server_default="1")
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    payload = Column(JSONB(none_as_null=True), nullable=True)  # Template parameters and request key needed to resend
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -120,9 +134,50 @@ class NotificationLog(Base):
         Index("idx_notif_logs_hospital_id", "hospital_id"),
         Index("idx_notif_logs_status", "status"),
         Index("idx_notif_logs_idempotency_key", "idempotency_key"),
+        # Delivery callbacks identify a recipient by (requestId, recipientSeq)
+        Index("idx_notif_logs_request_id", "request_id", "recipient_seq"),
+        Index(
+            "idx_notif_logs_retry_due", "next_attempt_at",
+            postgresql_where=text("status = 'failed' AND next_attempt_at IS NOT NULL")
+        ),
+        # Quiet-hours notifications waiting for release (apps/notify/quiet.py)
+        Index(
+            "idx_notif_logs_deferred_due", "next_attempt_at",
+            postgresql_where=text("status = 'deferred'")
+        ),
     )
 
 
+# Per-hospital review aggregates, maintained incrementally by Repo writes
+# (see apps/storage/stats.py; scripts/rebuild_hospital_stats.py repairs them)
+class HospitalStats(Base):
+    __tablename__ = "hospital_stats"
+
+    hospital_id = Column(UUID(as_uuid=True), ForeignKey("hospitals.id"), primary_key=True)
+    total_reviews = Column(Integer, nullable=False, default=0)
+    analyzed_reviews = Column(Integer, nullable=False, default=0)
+    positive_count = Column(Integer, nullable=False, default=0)
+    neutral_count = Column(Integer, nullable=False, default=0)
+    negative_count = Column(Integer, nullable=False, default=0)
+    flagged_count = Column(Integer, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    sentiment_score_sum = Column(Float, nullable=False, default=0.0)
+    last_review_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# Daily buckets by review collected_at (UTC) for rolling 7/30-day counts
+class HospitalDailyStats(Base):
+    __tablename__ = "hospital_daily_stats"
+
+    hospital_id = Column(UUID(as_uuid=True), ForeignKey("hospitals.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
+    negative_count = Column(Integer, nullable=False, default=0)
+    flagged_count = Column(Integer, nullable=False, default=0)
+
+
 class FeatureFlag(Base):
     __tablename__ = "feature_flags"
 
@@ -1,14 +1,68 @@
-from typing import List, Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta
-from sqlalchemy import and_
+from sqlalchemy import and_, case, column, func, insert, null, or_, tuple_, update, values, Float, Integer, Text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from apps.storage.models import Hospital, Review, FlaggedReview, HospitalContact, NotificationLog
-from apps.storage.db import get_db_session
+from apps.storage.db import get_db_session, unit_of_work
+from apps.storage import stats, search
+from apps.storage.instrumentation import instrument_repo
+from apps.storage.cache import (
+    HospitalRecord, ContactRecord, hospital_cache, contacts_cache, invalidate_hospital
+)
 from apps.common import get_logger
 
 logger = get_logger(__name__)
 
 
+class NotificationRetryRecord(NamedTuple):
+    """Failed notification log claimed for a retry."""
+    id: str
+    hospital_id: str
+    review_id: str
+    from_flagged_id: str
+    recipient_phone: str
+    provider: str
+    template_code: str
+    idempotency_key: str
+    attempts: int
+    payload: Optional[dict]
+
+
+class FlaggedReviewRecord(NamedTuple):
+    """Lightweight, session-independent view of a flagged review."""
+    id: str
+    review_id: str
+    hospital_id: str
+    content: str
+    rating: Optional[int]
+    sentiment_score: Optional[float]
+    flagged_at: Optional[datetime]
+
+
+class NotificationBatch(NamedTuple):
+    """Notifier work: flagged reviews with their hospitals and active contacts (priority order)."""
+    flagged_reviews: List[FlaggedReviewRecord]
+    hospitals: Dict[str, HospitalRecord]
+    contacts: Dict[str, List[ContactRecord]]
+
+
+class DeferredNotificationRecord(NamedTuple):
+    """Quiet-hours notification log claimed for release."""
+    id: str
+    hospital_id: str
+    from_flagged_id: str
+
+
+@instrument_repo
 class Repo:
+    @staticmethod
+    def transaction():
+        """
+        Unit of work: Repo calls inside `with Repo.transaction() as uow:` share one
+        session and commit once. Nested blocks become savepoints.
+        """
+        return unit_of_work()
+
     @staticmethod
     def create_hospital(name: str, naver_place_url: str) -> Hospital:
         """Create a new hospital."""
@@ -60,6 +114,7 @@ class Repo:
             session.add(review)
             session.flush()
             session.refresh(review)
+            stats.record_review_created(session, review)
             logger.info(f"Created review: {review.id} for hospital: {hospital_id}")
             return review
 
@@ -74,27 +129,150 @@ class Repo:
             ).scalar()
 
     @staticmethod
-    def fetch_unanalyzed_reviews(limit: int = 200) -> List[Review]:
+    def fetch_unanalyzed_reviews(limit: int = 200, collected_before: Optional[datetime] = None) -> List[Review]:
         """Fetch reviews that haven't been analyzed for sentiment."""
+        with get_db_session() as session:
+            query = session.query(Review).filter(
+                Review.sentiment_label.is_(None)
+            )
+            if collected_before is not None:
+                query = query.filter(Review.collected_at < collected_before)
+            reviews = query.limit(limit).all()
+            # Detach from session
+            session.expunge_all()
+            return reviews
+
+    @staticmethod
+    def fetch_unanalyzed_reviews_by_ids(review_ids: List[str]) -> List[Review]:
+        """Fetch the given reviews, skipping any already analyzed."""
+        if not review_ids:
+            return []
         with get_db_session() as session:
             reviews = session.query(Review).filter(
+                Review.id.in_(review_ids),
                 Review.sentiment_label.is_(None)
-            ).limit(limit).all()
+            ).all()
             # Detach from session
             session.expunge_all()
             return reviews
 
     @staticmethod
-    def update_sentiment(review_id: str, label: str, score: float, analyzed_at: datetime):
+    def search_reviews(query: str, hospital_id: Optional[str] = None,
+                       since: Optional[datetime] = None, cursor: Optional[str] = None,
+                       limit: int = 50) -> Tuple[List[Review], Optional[str]]:
+        """
+        Search review content for all whitespace-separated terms, newest first.
+
+        Returns a page of reviews and the cursor for the next page (None on the last page).
+        """
+        with get_db_session() as session:
+            reviews, next_cursor = search.search(
+                session, query, hospital_id=hospital_id, since=since, cursor=cursor, limit=limit
+            )
+            session.expunge_all()
+            return reviews, next_cursor
+
+    @staticmethod
+    def update_sentiment(review_id: str, label: str, score: float, analyzed_at: datetime,
+                         model_version: Optional[str] = None):
         """Update review's sentiment analysis results."""
         with get_db_session() as session:
             review = session.query(Review).filter(Review.id == review_id).first()
             if review:
+                stats.record_sentiment_change(
+                    session, review,
+                    old_label=review.sentiment_label, old_score=review.sentiment_score,
+                    new_label=label, new_score=score
+                )
                 review.sentiment_label = label
                 review.sentiment_score = score
                 review.analyzed_at = analyzed_at
+                review.model_version = model_version
                 logger.info(f"Updated sentiment for review {review_id}: {label} ({score})")
 
+    @staticmethod
+    def fetch_reviews_for_rescoring(model_version: str, after: Optional[Tuple] = None,
+                                    limit: int = 1000, hospital_id: Optional[str] = None) -> List[Tuple]:
+        """
+        Keyset page of (id, content, collected_at) for analyzed reviews not
+        scored by model_version, in (collected_at, id) order.
+
+        Unanalyzed reviews are left to the sentiment pipeline, which also flags
+        them; re-scoring never flags. `after` is the (collected_at, id) of the
+        last row of the previous page.
+        """
+        with get_db_session() as session:
+            query = session.query(Review.id, Review.content, Review.collected_at).filter(
+                Review.sentiment_label.isnot(None),
+                Review.model_version.is_distinct_from(model_version)
+            )
+            if hospital_id is not None:
+                query = query.filter(Review.hospital_id == hospital_id)
+            if after is not None:
+                # Row-value comparison so Postgres can seek the (collected_at, id) index
+                query = query.filter(tuple_(Review.collected_at, Review.id) > tuple_(*after))
+            rows = query.order_by(Review.collected_at, Review.id).limit(limit).all()
+            return [tuple(row) for row in rows]
+
+    @staticmethod
+    def count_reviews_for_rescoring(model_version: str, hospital_id: Optional[str] = None) -> int:
+        """Count analyzed reviews not scored by model_version."""
+        with get_db_session() as session:
+            query = session.query(func.count(Review.id)).filter(
+                Review.sentiment_label.isnot(None),
+                Review.model_version.is_distinct_from(model_version)
+            )
+            if hospital_id is not None:
+                query = query.filter(Review.hospital_id == hospital_id)
+            return query.scalar()
+
+    @staticmethod
+    def bulk_update_sentiment(results: List[Tuple], model_version: str, analyzed_at: datetime) -> int:
+        """
+        Re-score many reviews at once: (review_id, label, score) tuples.
+
+        Locks the rows, applies one UPDATE ... FROM (VALUES ...) and batched stats
+        deltas. Flagged reviews are left alone (no alerts for historical reviews).
+        """
+        if not results:
+            return 0
+        with get_db_session() as session:
+            ids = [review_id for review_id, _, _ in results]
+            current = {
+                row.id: row for row in session.query(
+                    Review.id, Review.hospital_id, Review.collected_at,
+                    Review.sentiment_label, Review.sentiment_score
+                ).filter(Review.id.in_(ids)).with_for_update().all()
+            }
+
+            rows = values(
+                column("id", PG_UUID(as_uuid=True)), column("label", Text), column("score", Float),
+                name="rescored"
+            ).data([
+                (review_id, label, score) for review_id, label, score in results if review_id in current
+            ])
+            session.execute(
+                update(Review)
+                .where(Review.id == rows.c.id)
+                .values(
+                    sentiment_label=rows.c.label,
+                    sentiment_score=rows.c.score,
+                    analyzed_at=analyzed_at,
+                    model_version=model_version
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+            stats.record_sentiment_changes(session, [
+                (
+                    current[review_id].hospital_id, current[review_id].collected_at,
+                    current[review_id].sentiment_label, current[review_id].sentiment_score,
+                    label, score
+                )
+                for review_id, label, score in results if review_id in current
+            ])
+            return len(current)
+
     @staticmethod
     def flag_review(review: Review):
         """Flag a review as negative and store in flagged_reviews."""
@@ -119,8 +297,21 @@ class Repo:
             )
             session.add(flagged)
             session.flush()
+            stats.record_flagged(session, flagged)
             logger.info(f"Flagged review: {review.id} for hospital: {review.hospital_id}")
 
+    @staticmethod
+    def get_hospital_stats(hospital_id: str) -> Optional[dict]:
+        """Get review aggregates and rolling 7/30-day counts for a hospital."""
+        with get_db_session() as session:
+            return stats.read_stats(session, hospital_id)
+
+    @staticmethod
+    def rebuild_hospital_stats(hospital_id: Optional[str] = None) -> int:
+        """Recompute hospital stats from source tables (all hospitals if no ID given)."""
+        with get_db_session() as session:
+            return stats.rebuild(session, hospital_id)
+
     @staticmethod
     def get_hospital_contacts(hospital_id: str, active_only: bool = True) -> List[HospitalContact]:
         """Get hospital contacts."""
@@ -135,6 +326,45 @@ class Repo:
             session.expunge_all()
             return contacts
 
+    @staticmethod
+    def get_cached_hospital(hospital_id: str) -> Optional[HospitalRecord]:
+        """Get hospital record through the read-through cache."""
+        def load() -> Optional[HospitalRecord]:
+            hospital = Repo.get_hospital_by_id(hospital_id)
+            if not hospital:
+                return None
+            return HospitalRecord(
+                id=str(hospital.id),
+                name=hospital.name,
+                naver_place_url=hospital.naver_place_url,
+                status=hospital.status,
+                timezone=hospital.timezone
+            )
+
+        return hospital_cache.get(str(hospital_id), load)
+
+    @staticmethod
+    def get_cached_contacts(hospital_id: str) -> List[ContactRecord]:
+        """Get active hospital contacts (priority order) through the read-through cache."""
+        def load() -> List[ContactRecord]:
+            return [
+                ContactRecord(
+                    id=str(c.id),
+                    hospital_id=str(c.hospital_id),
+                    name=c.name,
+                    phone=c.phone,
+                    priority=c.priority
+                )
+                for c in Repo.get_hospital_contacts(hospital_id, active_only=True)
+            ]
+
+        return contacts_cache.get(str(hospital_id), load)
+
+    @staticmethod
+    def invalidate_hospital_cache(hospital_id: str):
+        """Explicitly drop cached hospital record and contacts (e.g. after raw SQL edits)."""
+        invalidate_hospital(hospital_id)
+
     @staticmethod
     def get_new_flagged_reviews(limit: int = 100) -> List[FlaggedReview]:
         """Get new flagged reviews that haven't been notified."""
@@ -149,11 +379,91 @@ class Repo:
             session.expunge_all()
             return flagged
 
+    @staticmethod
+    def get_notification_batch(limit: int = 100, flagged_ids: Optional[List[str]] = None,
+                               hold_since: Optional[datetime] = None) -> NotificationBatch:
+        """
+        Load notifier work in two queries: flagged reviews joined with their
+        hospitals, then the active contacts of those hospitals.
+
+        Without flagged_ids, takes up to `limit` flagged reviews that have no
+        notification log yet (as get_new_flagged_reviews), skipping hospitals
+        alerted at or after hold_since (digest window); with them, those reviews.
+        """
+        with get_db_session() as session:
+            query = session.query(
+                FlaggedReview.id, FlaggedReview.review_id, FlaggedReview.hospital_id,
+                FlaggedReview.content, FlaggedReview.rating, FlaggedReview.sentiment_score,
+                FlaggedReview.flagged_at,
+                Hospital.name, Hospital.naver_place_url, Hospital.status, Hospital.timezone
+            ).join(Hospital, Hospital.id == FlaggedReview.hospital_id).order_by(FlaggedReview.flagged_at)
+
+            if flagged_ids is None:
+                notified = session.query(NotificationLog.from_flagged_id).distinct()
+                query = query.filter(~FlaggedReview.id.in_(notified))
+                if hold_since is not None:
+                    held = session.query(NotificationLog.hospital_id).filter(
+                        NotificationLog.created_at >= hold_since,
+                        NotificationLog.status.in_(["sent", "delivered", "resend_sms"])
+                    )
+                    query = query.filter(~FlaggedReview.hospital_id.in_(held))
+                query = query.limit(limit)
+            elif flagged_ids:
+                query = query.filter(FlaggedReview.id.in_(flagged_ids))
+            else:
+                return NotificationBatch([], {}, {})
+
+            rows = query.all()
+
+            flagged_reviews = []
+            hospitals: Dict[str, HospitalRecord] = {}
+            for row in rows:
+                hospital_id = str(row.hospital_id)
+                flagged_reviews.append(FlaggedReviewRecord(
+                    id=str(row.id),
+                    review_id=str(row.review_id),
+                    hospital_id=hospital_id,
+                    content=row.content,
+                    rating=row.rating,
+                    sentiment_score=row.sentiment_score,
+                    flagged_at=row.flagged_at
+                ))
+                hospitals[hospital_id] = HospitalRecord(
+                    id=hospital_id,
+                    name=row.name,
+                    naver_place_url=row.naver_place_url,
+                    status=row.status,
+                    timezone=row.timezone
+                )
+
+            contacts: Dict[str, List[ContactRecord]] = {hospital_id: [] for hospital_id in hospitals}
+            if hospitals:
+                contact_rows = session.query(
+                    HospitalContact.id, HospitalContact.hospital_id, HospitalContact.name,
+                    HospitalContact.phone, HospitalContact.priority
+                ).filter(
+                    HospitalContact.hospital_id.in_(list(hospitals)),
+                    HospitalContact.is_active == True
+                ).order_by(HospitalContact.hospital_id, HospitalContact.priority).all()
+
+                for c in contact_rows:
+                    contacts[str(c.hospital_id)].append(ContactRecord(
+                        id=str(c.id),
+                        hospital_id=str(c.hospital_id),
+                        name=c.name,
+                        phone=c.phone,
+                        priority=c.priority
+                    ))
+
+            return NotificationBatch(flagged_reviews, hospitals, contacts)
+
     @staticmethod
     def create_notification_log(hospital_id: str, review_id: str, from_flagged_id: str,
                                recipient_phone: str, provider: str, template_code: str,
                                idempotency_key: str, request_id: Optional[str] = None,
-                               status: str = "queued") -> NotificationLog:
+                               status: str = "queued", recipient_seq: Optional[int] = None,
+                               result_code: Optional[str] = None,
+                               result_message: Optional[str] = None) -> NotificationLog:
         """Create notification log."""
         with get_db_session() as session:
             log = NotificationLog(
@@ -164,8 +474,11 @@ class Repo:
                 provider=provider,
                 template_code=template_code,
                 request_id=request_id,
+                recipient_seq=recipient_seq,
                 idempotency_key=idempotency_key,
-                status=status
+                status=status,
+                result_code=result_code,
+                result_message=result_message
             )
             session.add(log)
             session.flush()
@@ -173,6 +486,16 @@ class Repo:
             logger.info(f"Created notification log: {log.id}")
             return log
 
+    @staticmethod
+    def create_notification_logs(logs: List[dict]) -> int:
+        """Insert many notification logs (create_notification_log keyword dicts) in one statement."""
+        if not logs:
+            return 0
+        with get_db_session() as session:
+            session.execute(insert(NotificationLog), logs)
+            logger.info(f"Created {len(logs)} notification logs")
+            return len(logs)
+
     @staticmethod
     def update_notification_status(log_id: str, status: str,
                                    result_code: Optional[str] = None,
@@ -187,9 +510,152 @@ class Repo:
                 log.updated_at = datetime.utcnow()
                 logger.info(f"Updated notification log {log_id}: {status}")
 
+    @staticmethod
+    def get_last_notification_times(hospital_ids: List[str], since: datetime) -> Dict[str, datetime]:
+        """Latest sent/delivered notification per hospital at or after `since` (hospitals without one are omitted)."""
+        if not hospital_ids:
+            return {}
+        with get_db_session() as session:
+            rows = session.query(
+                NotificationLog.hospital_id, func.max(NotificationLog.created_at)
+            ).filter(
+                NotificationLog.hospital_id.in_(hospital_ids),
+                NotificationLog.created_at >= since,
+                NotificationLog.status.in_(["sent", "delivered", "resend_sms"])
+            ).group_by(NotificationLog.hospital_id).all()
+            return {str(hospital_id): last_sent for hospital_id, last_sent in rows}
+
+    @staticmethod
+    def claim_notification_retries(limit: int = 200, lease_sec: int = 300) -> List[NotificationRetryRecord]:
+        """
+        Claim failed notification logs whose next attempt is due.
+
+        Claimed rows are pushed lease_sec into the future, so concurrent retry
+        runs skip them and a crashed run's rows come due again.
+        """
+        with get_db_session() as session:
+            now = func.now()
+            logs = session.query(NotificationLog).filter(
+                NotificationLog.status == "failed",
+                NotificationLog.next_attempt_at <= now
+            ).order_by(NotificationLog.next_attempt_at).limit(limit).with_for_update(skip_locked=True).all()
+
+            if not logs:
+                return []
+
+            session.execute(
+                update(NotificationLog)
+                .where(NotificationLog.id.in_([log.id for log in logs]))
+                .values(next_attempt_at=now + timedelta(seconds=lease_sec))
+            )
+            return [
+                NotificationRetryRecord(
+                    id=str(log.id),
+                    hospital_id=str(log.hospital_id),
+                    review_id=str(log.review_id),
+                    from_flagged_id=str(log.from_flagged_id),
+                    recipient_phone=log.recipient_phone,
+                    provider=log.provider,
+                    template_code=log.template_code,
+                    idempotency_key=log.idempotency_key,
+                    attempts=log.attempts,
+                    payload=log.payload
+                )
+                for log in logs
+            ]
+
+    @staticmethod
+    def claim_deferred_notifications(limit: int = 50, lease_sec: int = 300) -> List[DeferredNotificationRecord]:
+        """
+        Claim due quiet-hours notification logs of up to `limit` hospitals.
+
+        A hospital's due rows are claimed together so its reviews can go out
+        as one digest; claimed rows are leased like claim_notification_retries.
+        """
+        with get_db_session() as session:
+            now = func.now()
+            due_hospitals = session.query(NotificationLog.hospital_id).filter(
+                NotificationLog.status == "deferred",
+                NotificationLog.next_attempt_at <= now
+            ).group_by(NotificationLog.hospital_id).order_by(
+                func.min(NotificationLog.next_attempt_at)
+            ).limit(limit)
+
+            logs = session.query(
+                NotificationLog.id, NotificationLog.hospital_id, NotificationLog.from_flagged_id
+            ).filter(
+                NotificationLog.status == "deferred",
+                NotificationLog.next_attempt_at <= now,
+                NotificationLog.hospital_id.in_(due_hospitals.scalar_subquery())
+            ).with_for_update(skip_locked=True).all()
+
+            if not logs:
+                return []
+
+            session.execute(
+                update(NotificationLog)
+                .where(NotificationLog.id.in_([log.id for log in logs]))
+                .values(next_attempt_at=now + timedelta(seconds=lease_sec))
+            )
+            return [
+                DeferredNotificationRecord(
+                    id=str(log.id),
+                    hospital_id=str(log.hospital_id),
+                    from_flagged_id=str(log.from_flagged_id)
+                )
+                for log in logs
+            ]
+
+    @staticmethod
+    def update_notification_attempts(updates: List[dict]) -> int:
+        """Apply retry outcomes: dicts of NotificationLog columns keyed by id, one bulk UPDATE by primary key."""
+        if not updates:
+            return 0
+        with get_db_session() as session:
+            session.execute(update(NotificationLog), updates)
+            logger.info(f"Updated {len(updates)} notification logs after retry")
+            return len(updates)
+
+    @staticmethod
+    def apply_delivery_statuses(updates: List[Tuple]) -> int:
+        """
+        Apply delivery results in one UPDATE ... FROM (VALUES ...):
+        (request_id, recipient_seq or 0 for every recipient, status, result_code, result_message).
+
+        Same semantics as update_notification_status, matched by request instead
+        of log id. A delivered message is never retried.
+        """
+        if not updates:
+            return 0
+        with get_db_session() as session:
+            rows = values(
+                column("request_id", Text), column("recipient_seq", Integer), column("status", Text),
+                column("result_code", Text), column("result_message", Text),
+                name="delivery"
+            ).data(updates)
+            result = session.execute(
+                update(NotificationLog)
+                .where(
+                    NotificationLog.request_id == rows.c.request_id,
+                    or_(rows.c.recipient_seq == 0, NotificationLog.recipient_seq == rows.c.recipient_seq)
+                )
+                .values(
+                    status=rows.c.status,
+                    result_code=rows.c.result_code,
+                    result_message=rows.c.result_message,
+                    updated_at=func.now(),
+                    next_attempt_at=case(
+                        (rows.c.status == "delivered", null()), else_=NotificationLog.next_attempt_at
+                    )
+                )
+                .execution_options(synchronize_session=False)
+            )
+            logger.info(f"Applied {len(updates)} delivery results to {result.rowcount} notification logs")
+            return result.rowcount
+
     @staticmethod
     def check_notification_sent_recently(hospital_id: str, review_id: str,
-                                        recipient_phone: str, hours: int = 24) -> bool:
+                                        recipient_phone: str, hours: float = 24) -> bool:
         """Check if notification was sent recently to avoid duplicates."""
         with get_db_session() as session:
             cutoff = datetime.utcnow() - timedelta(hours=hours)
@@ -199,7 +665,7 @@ class Repo:
                     NotificationLog.review_id == review_id,
                     NotificationLog.recipient_phone == recipient_phone,
                     NotificationLog.created_at >= cutoff,
-                    NotificationLog.status.in_(["sent", "delivered"])
+                    NotificationLog.status.in_(["sent", "delivered", "resend_sms"])
                 )
             ).count()
             return count > 0
@@ -0,0 +1,80 @@
+import json
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from apps.storage.models import Review
+
+MAX_PAGE_SIZE = 200
+
+# Shortest term an index can serve: 3+ characters use the pg_trgm index, 2 the
+# pg_bigm one (when installed, see init_db). A query needs at least one such term.
+MIN_TERM_CHARS = 2
+
+
+def encode_cursor(review: Review) -> str:
+    """Opaque keyset cursor for the position after this review."""
+    payload = json.dumps([review.collected_at.isoformat(), str(review.id)])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        collected_at, review_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(collected_at), UUID(review_id)
+    except Exception as e:
+        raise ValueError(f"Invalid search cursor: {cursor}") from e
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _term_filter(term: str):
+    """
+    Substring match for one term. Terms without cased letters (Hangul, digits)
+    use LIKE, which pg_bigm's index supports; ILIKE, which it does not, is only
+    needed for Latin text. pg_trgm serves both.
+    """
+    pattern = f"%{_escape_like(term)}%"
+    if term.lower() == term.upper():
+        return Review.content.like(pattern, escape="\\")
+    return Review.content.ilike(pattern, escape="\\")
+
+
+def search(session: Session, query: str, hospital_id=None, since: Optional[datetime] = None,
+           cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[Review], Optional[str]]:
+    """
+    Substring search over review content, newest first.
+
+    Every whitespace-separated term must appear in the content. Terms of 3+
+    characters are served by the pg_trgm GIN index on reviews.content, and
+    2-character terms (common in Korean, e.g. "주차") by the pg_bigm one. (Korean
+    is agglutinative, so substring matching finds "불친절" inside "불친절해요";
+    a tsvector with the 'simple' parser would not.) Single characters cannot
+    use either, so a query made only of them is rejected.
+    """
+    terms = query.split()
+    if not terms:
+        raise ValueError("Search query must not be empty")
+    if all(len(t) < MIN_TERM_CHARS for t in terms):
+        raise ValueError(f"Search query needs a term of at least {MIN_TERM_CHARS} characters")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    q = session.query(Review).filter(*[_term_filter(t) for t in terms])
+    if hospital_id is not None:
+        q = q.filter(Review.hospital_id == hospital_id)
+    if since is not None:
+        q = q.filter(Review.collected_at >= since)
+    if cursor:
+        cursor_at, cursor_id = decode_cursor(cursor)
+        # Row-value comparison so Postgres can seek the (collected_at, id) index
+        q = q.filter(tuple_(Review.collected_at, Review.id) < tuple_(cursor_at, cursor_id))
+
+    # Fetch one extra row to know whether another page exists
+    rows = q.order_by(Review.collected_at.desc(), Review.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,255 @@
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from apps.storage.models import Review, FlaggedReview, HospitalStats, HospitalDailyStats
+from apps.common import get_logger
+
+logger = get_logger(__name__)
+
+# Sentiment label -> HospitalStats counter column
+LABEL_COLUMNS = {
+    "Positive": "positive_count",
+    "Neutral": "neutral_count",
+    "Negative": "negative_count",
+}
+
+ROLLING_WINDOWS_DAYS = (7, 30)
+
+
+def _bucket_day(ts: Optional[datetime]) -> date:
+    return (ts or datetime.utcnow()).date()
+
+
+def _apply(session: Session, hospital_id, day: date,
+           totals: Dict[str, float], daily: Dict[str, int],
+           last_review_at: Optional[datetime] = None):
+    """Add deltas to the hospital's aggregate row and daily bucket (upsert, no read)."""
+    if totals or last_review_at is not None:
+        values = {"hospital_id": hospital_id, **totals}
+        if last_review_at is not None:
+            values["last_review_at"] = last_review_at
+        stmt = pg_insert(HospitalStats).values(**values)
+        set_ = {
+            col: getattr(HospitalStats, col) + getattr(stmt.excluded, col)
+            for col in totals
+        }
+        if last_review_at is not None:
+            set_["last_review_at"] = func.greatest(
+                HospitalStats.last_review_at, stmt.excluded.last_review_at
+            )
+        set_["updated_at"] = func.now()
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[HospitalStats.hospital_id], set_=set_
+        ))
+
+    if daily:
+        stmt = pg_insert(HospitalDailyStats).values(hospital_id=hospital_id, day=day, **daily)
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[HospitalDailyStats.hospital_id, HospitalDailyStats.day],
+            set_={
+                col: getattr(HospitalDailyStats, col) + getattr(stmt.excluded, col)
+                for col in daily
+            }
+        ))
+
+
+def record_review_created(session: Session, review: Review):
+    """Count a newly inserted review."""
+    totals = {"total_reviews": 1}
+    if review.rating is not None:
+        totals["rating_count"] = 1
+        totals["rating_sum"] = review.rating
+    _apply(
+        session, review.hospital_id, _bucket_day(review.collected_at),
+        totals, {"review_count": 1},
+        last_review_at=review.collected_at or datetime.utcnow()
+    )
+
+
+def _sentiment_deltas(old_label: Optional[str], old_score: Optional[float],
+                      new_label: str, new_score: float) -> Tuple[Dict[str, float], Dict[str, int]]:
+    totals: Dict[str, float] = {}
+    if old_label is None:
+        totals["analyzed_reviews"] = 1
+    if old_label != new_label:
+        if old_label in LABEL_COLUMNS:
+            totals[LABEL_COLUMNS[old_label]] = -1
+        if new_label in LABEL_COLUMNS:
+            totals[LABEL_COLUMNS[new_label]] = 1
+    old_contribution = (old_score or 0.0) if old_label is not None else 0.0
+    score_delta = (new_score or 0.0) - old_contribution
+    if score_delta:
+        totals["sentiment_score_sum"] = score_delta
+
+    daily = {}
+    negative_delta = int(new_label == "Negative") - int(old_label == "Negative")
+    if negative_delta:
+        daily["negative_count"] = negative_delta
+    return totals, daily
+
+
+def record_sentiment_change(session: Session, review: Review,
+                            old_label: Optional[str], old_score: Optional[float],
+                            new_label: str, new_score: float):
+    """Move a review between label counters (handles first analysis and re-scoring)."""
+    totals, daily = _sentiment_deltas(old_label, old_score, new_label, new_score)
+    if totals or daily:
+        _apply(session, review.hospital_id, _bucket_day(review.collected_at), totals, daily)
+
+
+def record_sentiment_changes(session: Session, changes: Iterable[Tuple]):
+    """
+    Batched record_sentiment_change for bulk re-scoring: one upsert per hospital
+    and per (hospital, day) instead of per review.
+
+    changes: (hospital_id, collected_at, old_label, old_score, new_label, new_score)
+    """
+    hospital_totals: Dict = defaultdict(lambda: defaultdict(int))
+    day_counts: Dict = defaultdict(lambda: defaultdict(int))
+
+    for hospital_id, collected_at, old_label, old_score, new_label, new_score in changes:
+        totals, daily = _sentiment_deltas(old_label, old_score, new_label, new_score)
+        for col, delta in totals.items():
+            hospital_totals[hospital_id][col] += delta
+        for col, delta in daily.items():
+            day_counts[(hospital_id, _bucket_day(collected_at))][col] += delta
+
+    for hospital_id, totals in hospital_totals.items():
+        totals = {col: delta for col, delta in totals.items() if delta}
+        if totals:
+            _apply(session, hospital_id, None, totals, {})
+    for (hospital_id, day), daily in day_counts.items():
+        daily = {col: delta for col, delta in daily.items() if delta}
+        if daily:
+            _apply(session, hospital_id, day, {}, daily)
+
+
+def record_flagged(session: Session, flagged: FlaggedReview):
+    """Count a newly flagged review."""
+    _apply(
+        session, flagged.hospital_id, _bucket_day(flagged.collected_at),
+        {"flagged_count": 1}, {"flagged_count": 1}
+    )
+
+
+def read_stats(session: Session, hospital_id) -> Optional[Dict]:
+    """Aggregate row plus rolling-window counts (at most 30 daily rows read)."""
+    stats = session.get(HospitalStats, hospital_id)
+    if stats is None:
+        return None
+
+    today = datetime.utcnow().date()
+    since = today - timedelta(days=max(ROLLING_WINDOWS_DAYS) - 1)
+    buckets = session.query(HospitalDailyStats).filter(
+        HospitalDailyStats.hospital_id == hospital_id,
+        HospitalDailyStats.day >= since
+    ).all()
+
+    result = {
+        "hospital_id": str(stats.hospital_id),
+        "total_reviews": stats.total_reviews,
+        "analyzed_reviews": stats.analyzed_reviews,
+        "positive_count": stats.positive_count,
+        "neutral_count": stats.neutral_count,
+        "negative_count": stats.negative_count,
+        "flagged_count": stats.flagged_count,
+        "avg_rating": stats.rating_sum / stats.rating_count if stats.rating_count else None,
+        "avg_sentiment_score": (
+            stats.sentiment_score_sum / stats.analyzed_reviews if stats.analyzed_reviews else None
+        ),
+        "last_review_at": stats.last_review_at,
+    }
+    for days in ROLLING_WINDOWS_DAYS:
+        window_start = today - timedelta(days=days - 1)
+        in_window = [b for b in buckets if b.day >= window_start]
+        result[f"reviews_{days}d"] = sum(b.review_count for b in in_window)
+        result[f"negative_{days}d"] = sum(b.negative_count for b in in_window)
+        result[f"flagged_{days}d"] = sum(b.flagged_count for b in in_window)
+    return result
+
+
+_REBUILD_TOTALS_SQL = """
+INSERT INTO hospital_stats (
+    hospital_id, total_reviews, analyzed_reviews, positive_count, neutral_count,
+    negative_count, flagged_count, rating_count, rating_sum, sentiment_score_sum,
+    last_review_at, updated_at
+)
+SELECT
+    r.hospital_id,
+    COUNT(*),
+    COUNT(r.sentiment_label),
+    COUNT(*) FILTER (WHERE r.sentiment_label = 'Positive'),
+    COUNT(*) FILTER (WHERE r.sentiment_label = 'Neutral'),
+    COUNT(*) FILTER (WHERE r.sentiment_label = 'Negative'),
+    (SELECT COUNT(*) FROM flagged_reviews f WHERE f.hospital_id = r.hospital_id),
+    COUNT(r.rating),
+    COALESCE(SUM(r.rating), 0),
+    COALESCE(SUM(r.sentiment_score) FILTER (WHERE r.sentiment_label IS NOT NULL), 0),
+    MAX(r.collected_at),
+    now()
+FROM reviews r
+{where}
+GROUP BY r.hospital_id
+ON CONFLICT (hospital_id) DO UPDATE SET
+    total_reviews = EXCLUDED.total_reviews,
+    analyzed_reviews = EXCLUDED.analyzed_reviews,
+    positive_count = EXCLUDED.positive_count,
+    neutral_count = EXCLUDED.neutral_count,
+    negative_count = EXCLUDED.negative_count,
+    flagged_count = EXCLUDED.flagged_count,
+    rating_count = EXCLUDED.rating_count,
+    rating_sum = EXCLUDED.rating_sum,
+    sentiment_score_sum = EXCLUDED.sentiment_score_sum,
+    last_review_at = EXCLUDED.last_review_at,
+    updated_at = EXCLUDED.updated_at
+"""
+
+_REBUILD_DAILY_SQL = """
+INSERT INTO hospital_daily_stats (hospital_id, day, review_count, negative_count, flagged_count)
+SELECT hospital_id, day, SUM(review_count), SUM(negative_count), SUM(flagged_count)
+FROM (
+    SELECT r.hospital_id, r.collected_at::date AS day, 1 AS review_count,
+           CASE WHEN r.sentiment_label = 'Negative' THEN 1 ELSE 0 END AS negative_count,
+           0 AS flagged_count
+    FROM reviews r {where}
+    UNION ALL
+    SELECT r.hospital_id, COALESCE(r.collected_at, r.flagged_at)::date, 0, 0, 1
+    FROM flagged_reviews r {where}
+) t
+GROUP BY hospital_id, day
+ON CONFLICT (hospital_id, day) DO UPDATE SET
+    review_count = EXCLUDED.review_count,
+    negative_count = EXCLUDED.negative_count,
+    flagged_count = EXCLUDED.flagged_count
+"""
+
+
+def rebuild(session: Session, hospital_id=None) -> int:
+    """
+    Recompute aggregates from reviews/flagged_reviews. Returns hospitals rebuilt.
+
+    The inserts upsert: an incremental _apply() committed between the delete
+    and the insert would otherwise fail the rebuild with a unique violation.
+    """
+    params = {}
+    where = ""
+    if hospital_id is not None:
+        where = "WHERE r.hospital_id = :hospital_id"
+        params["hospital_id"] = hospital_id
+        session.query(HospitalDailyStats).filter(
+            HospitalDailyStats.hospital_id == hospital_id
+        ).delete(synchronize_session=False)
+        session.query(HospitalStats).filter(
+            HospitalStats.hospital_id == hospital_id
+        ).delete(synchronize_session=False)
+    else:
+        session.query(HospitalDailyStats).delete(synchronize_session=False)
+        session.query(HospitalStats).delete(synchronize_session=False)
+
+    result = session.execute(text(_REBUILD_TOTALS_SQL.format(where=where)), params)
+    session.execute(text(_REBUILD_DAILY_SQL.format(where=where)), params)
+    logger.info(f"Rebuilt hospital stats for {result.rowcount} hospitals")
+    return result.rowcount
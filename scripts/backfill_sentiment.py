@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Re-score review history with the current sentiment model.
+
+Walks analyzed reviews not yet scored by the target model version in
+(collected_at, id) order (keyset pagination), analyzes each chunk across a
+fork-based process pool that shares the preloaded model, and writes results in
+bulk together with hospital stats deltas. The last committed position is
+checkpointed, so an interrupted run resumes where it stopped. Reviews whose
+inference failed are not written, so they keep their old model version; a
+completed walk clears the checkpoint position, so the next run retries them.
+Flagged reviews are not touched: re-scoring history must not send alerts.
+Reviews that were never analyzed are left to the sentiment pipeline, which
+flags them.
+
+    python scripts/backfill_sentiment.py --workers 4 --max-rows-per-sec 500
+    python scripts/backfill_sentiment.py --model-version koelectra-v2 --restart
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+from uuid import UUID
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apps.sentiment import worker
+from apps.sentiment.parallel import Layout, ShardPool, plan_layout, available_cores
+from apps.storage import Repo
+from apps.common import get_logger
+
+logger = get_logger(__name__)
+
+
+def load_checkpoint(path: str, model_version: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("model_version") != model_version:
+        logger.warning(
+            f"Checkpoint {path} is for {state.get('model_version')}, not {model_version}; starting over"
+        )
+        return {}
+    if state.get("last_id") and not state.get("last_collected_at"):
+        # Written by a version that paged on id alone; finished rows are skipped anyway
+        logger.warning(f"Checkpoint {path} has no collected_at position; starting over")
+        return {}
+    return state
+
+
+def save_checkpoint(path: str, state: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)  # Atomic: a crash never leaves a torn checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Model name or local checkpoint (default: worker MODEL_NAME)")
+    parser.add_argument("--model-version", help="Version recorded on re-scored reviews (default: current model version)")
+    parser.add_argument("--hospital-id", help="Only re-score this hospital's reviews")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Reviews per keyset page / bulk write")
+    parser.add_argument("--workers", type=int, help="Inference processes (default: one per core)")
+    parser.add_argument("--threads", type=int, help="Intra-op threads per process (default: cores / workers)")
+    parser.add_argument("--max-rows-per-sec", type=float, default=0, help="Throttle DB writes (0 = unthrottled)")
+    parser.add_argument("--checkpoint", default="backfill_sentiment.checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="Analyze without writing results or checkpoints")
+    args = parser.parse_args()
+
+    if args.model:
+        worker.MODEL_NAME = args.model
+    model_version = args.model_version or worker.get_model_version()
+
+    state = {} if args.restart else load_checkpoint(args.checkpoint, model_version)
+    after = None
+    if state.get("last_id"):
+        after = (datetime.fromisoformat(state["last_collected_at"]), UUID(state["last_id"]))
+    processed = state.get("processed", 0)
+    updated = state.get("updated", 0)
+    failed_total = state.get("failed", 0)
+    if after:
+        logger.info(f"Resuming after review {after[1]} ({processed} already processed)")
+
+    # Throughput over latency: default to one single-threaded process per core
+    workers = args.workers or available_cores()
+    layout = Layout(
+        processes=workers,
+        intra_op_threads=args.threads or max(1, available_cores() // workers),
+        inter_op_threads=plan_layout().inter_op_threads
+    )
+
+    remaining = Repo.count_reviews_for_rescoring(model_version, args.hospital_id)
+    logger.info(f"Backfilling {remaining} reviews to {model_version} with layout {layout}")
+
+    # Load once here; forked pool processes share the weights copy-on-write
+    worker.preload_model(before_fork=True)
+    pool = ShardPool(layout, min_shard_items=1)
+
+    def submit(rows):
+        return pool.submit([content for _, content, _ in rows])
+
+    start = last_write = time.perf_counter()
+    done_this_run = 0
+    fetch_after = after
+    pending = None  # (rows, sharded result): inference of chunk N overlaps the fetch of N+1
+
+    try:
+        while True:
+            rows = Repo.fetch_reviews_for_rescoring(
+                model_version, after=fetch_after, limit=args.chunk_size, hospital_id=args.hospital_id
+            )
+            next_pending = (rows, submit(rows)) if rows else None
+            if rows:
+                fetch_after = (rows[-1][2], rows[-1][0])
+
+            if pending is not None:
+                chunk_rows, sharded = pending
+                failed = []
+                results = sharded.get(failed=failed)
+                failed_total += len(failed)
+                if failed:
+                    logger.warning(f"Inference failed for {len(failed)} reviews in this chunk; leaving them for a later run")
+
+                if not args.dry_run:
+                    skip = set(failed)
+                    updated += Repo.bulk_update_sentiment(
+                        [
+                            (review_id, label, score)
+                            for i, ((review_id, _, _), (label, score)) in enumerate(zip(chunk_rows, results))
+                            if i not in skip
+                        ],
+                        model_version, datetime.utcnow()
+                    )
+
+                processed += len(chunk_rows)
+                done_this_run += len(chunk_rows)
+                if not args.dry_run:
+                    save_checkpoint(args.checkpoint, {
+                        "model_version": model_version,
+                        "last_id": str(chunk_rows[-1][0]),
+                        "last_collected_at": chunk_rows[-1][2].isoformat(),
+                        "processed": processed,
+                        "updated": updated,
+                        "failed": failed_total,
+                        "updated_at": datetime.utcnow().isoformat()
+                    })
+
+                rate = done_this_run / (time.perf_counter() - start)
+                eta_min = (remaining - done_this_run) / rate / 60 if rate else 0
+                logger.info(
+                    f"Backfill: {done_this_run}/{remaining} this run ({rate:.0f} reviews/s, "
+                    f"ETA {max(eta_min, 0):.1f} min)"
+                )
+
+                if args.max_rows_per_sec:
+                    min_interval = len(chunk_rows) / args.max_rows_per_sec
+                    time.sleep(max(0.0, min_interval - (time.perf_counter() - last_write)))
+                last_write = time.perf_counter()
+
+            pending = next_pending
+            if pending is None:
+                break
+    finally:
+        pool.close()
+
+    if not args.dry_run and failed_total:
+        # Walk finished: start the next run from the beginning, where only the failed reviews still match
+        save_checkpoint(args.checkpoint, {
+            "model_version": model_version,
+            "processed": processed,
+            "updated": updated,
+            "failed": failed_total,
+            "updated_at": datetime.utcnow().isoformat()
+        })
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "model_version": model_version,
+        "processed_this_run": done_this_run,
+        "processed_total": processed,
+        "updated_total": updated,
+        "failed_total": failed_total,
+        "elapsed_sec": round(elapsed, 1),
+        "reviews_per_sec": round(done_this_run / elapsed, 1) if elapsed else 0.0,
+        "dry_run": args.dry_run
+    }
+    logger.info(f"Backfill complete: {json.dumps(summary)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
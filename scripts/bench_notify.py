@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Load-test notification dispatch (packing, concurrency limits, provider calls)
+with synthetic messages; nothing touches the database.
+
+In-process mock provider:
+
+    python scripts/bench_notify.py --provider mock --messages 20000 --hospitals 500 \\
+        --latency-ms 80 --error-rate 0.02
+
+Real HTTP path against scripts/mock_nhn_server.py:
+
+    REV_ALIM_BASE_URL=http://127.0.0.1:8089 REV_ALIM_SECRET=x \\
+    python scripts/bench_notify.py --provider nhn_bizmessage --messages 5000
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apps.common import settings, get_logger
+from apps.notify.dedup import generate_dedup_key
+from apps.notify.dispatch import OutboundMessage, create_dispatch_limiter, pack_requests, send_requests
+from apps.notify.providers import get_provider, registered_providers
+
+logger = get_logger(__name__)
+
+
+def synthetic_messages(count: int, hospitals: int, seed: int) -> list:
+    rng = random.Random(seed)
+    hospital_ids = [f"bench-hospital-{i}" for i in range(hospitals)]
+    messages = []
+    for i in range(count):
+        hospital_id = rng.choice(hospital_ids)
+        phone = f"+8210{rng.randint(10000000, 99999999)}"
+        review_id = f"bench-review-{i}"
+        messages.append(OutboundMessage(
+            hospital_id=hospital_id,
+            recipient_phone=phone,
+            template_code=settings.alim_template_code,
+            params={"hospitalName": hospital_id, "reviewSnippet": "대기시간이 너무 길어요",
+                    "reviewLink": "https://m.place.naver.com", "howToRespond": "빠른 사과"},
+            reviews=((review_id, review_id, generate_dedup_key(hospital_id, review_id, phone)),)
+        ))
+    return messages
+
+
+async def run(args) -> dict:
+    provider = get_provider(args.provider)
+    if provider is None:
+        raise SystemExit(f"Unknown provider {args.provider}; registered: {', '.join(registered_providers())}")
+
+    messages = synthetic_messages(args.messages, args.hospitals, args.seed)
+
+    # Small requests model the per-hospital sends of a run; --max-recipients 0 packs to the provider limit
+    if args.max_recipients:
+        provider.MAX_RECIPIENTS = args.max_recipients
+    requests = pack_requests(provider, messages)
+
+    start = time.perf_counter()
+    request_results = await send_requests(provider, requests, create_dispatch_limiter())
+    elapsed = time.perf_counter() - start
+
+    results = [result for results in request_results for result in results]
+    sent = sum(1 for result in results if result.get("success"))
+    return {
+        "provider": provider.name,
+        "messages": len(messages),
+        "requests": len(requests),
+        "sent": sent,
+        "failed": len(results) - sent,
+        "elapsed_sec": round(elapsed, 3),
+        "messages_per_sec": round(len(messages) / elapsed, 1) if elapsed else None,
+        "max_concurrency": settings.notify_max_concurrency
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", default="mock", help="Registered provider name")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--hospitals", type=int, default=200)
+    parser.add_argument("--max-recipients", type=int, default=10, help="Recipients per request (0 = provider limit)")
+    parser.add_argument("--latency-ms", type=int, help="Mock provider latency (REV_MOCK_PROVIDER_LATENCY_MS)")
+    parser.add_argument("--error-rate", type=float, help="Mock provider request error rate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON report to this path")
+    args = parser.parse_args()
+
+    if args.latency_ms is not None:
+        settings.mock_provider_latency_ms = args.latency_ms
+    if args.error_rate is not None:
+        settings.mock_provider_error_rate = args.error_rate
+
+    report = asyncio.run(run(args))
+    logger.info(json.dumps(report))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
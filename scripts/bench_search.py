@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark Repo.search_reviews against a local Postgres filled with synthetic Korean reviews.
+
+Use a throwaway database: this script inserts --rows reviews into REV_DB_URL.
+
+    REV_DB_URL=postgresql+psycopg://localhost/revmon_bench python scripts/bench_search.py --rows 1000000
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import hashlib
+import argparse
+import statistics
+import uuid
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from apps.storage import Repo, init_db, engine
+from apps.common import get_logger
+
+logger = get_logger(__name__)
+
+SUBJECTS = ["의사 선생님", "간호사분들", "접수 직원", "원장님", "병원 시설", "주차", "대기실", "진료"]
+POSITIVE = ["친절해요", "꼼꼼하게 봐주셨어요", "설명을 잘 해주세요", "깨끗해요", "추천합니다", "만족합니다"]
+NEGATIVE = ["불친절해요", "대기시간이 너무 길어요", "설명이 부족해요", "과잉진료 같아요", "불쾌했어요", "다시는 안 가요"]
+FILLER = ["오늘 방문했는데", "아이와 함께 갔어요", "예약하고 갔는데도", "처음 가봤는데", "재방문입니다", "주말이라 그런지"]
+
+DEFAULT_QUERIES = ["불친절", "대기시간", "친절해요 원장님", "과잉진료", "주차", "설명이 부족"]
+# 2-character terms: served by the pg_bigm index, or a sequential scan without it
+SHORT_QUERIES = ["주차", "진료", "원장 주차"]
+
+
+def synthetic_review(rng: random.Random) -> str:
+    parts = [rng.choice(FILLER)]
+    for _ in range(rng.randint(1, 4)):
+        pool = NEGATIVE if rng.random() < 0.2 else POSITIVE
+        parts.append(f"{rng.choice(SUBJECTS)} {rng.choice(pool)}")
+    return " ".join(parts)
+
+
+def populate(rows: int, hospitals: int, seed: int):
+    """Bulk load hospitals and reviews with COPY."""
+    rng = random.Random(seed)
+    hospital_ids = [uuid.uuid4() for _ in range(hospitals)]
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        for hid in hospital_ids:
+            conn.execute(
+                text("INSERT INTO hospitals (id, name, naver_place_url) VALUES (:id, :name, :url)"),
+                {"id": hid, "name": f"벤치 병원 {hid.hex[:6]}", "url": f"https://bench.local/{hid}"}
+            )
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        start = time.perf_counter()
+        with cursor.copy(
+            "COPY reviews (id, hospital_id, review_hash, content, rating, collected_at) FROM STDIN"
+        ) as copy:
+            for i in range(rows):
+                content = synthetic_review(rng)
+                copy.write_row((
+                    uuid.uuid4(),
+                    rng.choice(hospital_ids),
+                    hashlib.sha256(f"{seed}|{i}|{content}".encode("utf-8")).hexdigest(),
+                    content,
+                    rng.randint(1, 5),
+                    now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+                ))
+        raw.commit()
+        logger.info(f"Inserted {rows} reviews in {time.perf_counter() - start:.1f}s")
+        cursor.execute("ANALYZE reviews")
+        raw.commit()
+    finally:
+        raw.close()
+
+    return hospital_ids
+
+
+def time_call(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "max_ms": round(ordered[-1], 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=0, help="Synthetic reviews to insert first (0 = use existing data)")
+    parser.add_argument("--hospitals", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5, help="Pages to walk with the cursor per query")
+    parser.add_argument("--query", action="append", help="Query to benchmark (repeatable)")
+    parser.add_argument("--no-short", action="store_true", help="Skip the 2-character term cases")
+    parser.add_argument("--output", help="Write JSON report to this path")
+    args = parser.parse_args()
+
+    init_db()
+    hospital_ids = populate(args.rows, args.hospitals, args.seed) if args.rows else []
+
+    with engine.connect() as conn:
+        total = conn.execute(text("SELECT COUNT(*) FROM reviews")).scalar()
+        if not hospital_ids:
+            hospital_ids = [r[0] for r in conn.execute(text("SELECT id FROM hospitals LIMIT 10"))]
+    logger.info(f"Benchmarking search over {total} reviews")
+
+    with engine.connect() as conn:
+        has_bigm = bool(conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_bigm'")).scalar())
+    if not has_bigm:
+        logger.warning("pg_bigm is not installed: 2-character terms scan reviews.content")
+
+    queries = args.query or DEFAULT_QUERIES + ([] if args.no_short else [q for q in SHORT_QUERIES if q not in DEFAULT_QUERIES])
+    report = {"total_reviews": total, "pg_bigm": has_bigm, "queries": []}
+    for query in queries:
+        (first_page, next_cursor), first = time_call(lambda: Repo.search_reviews(query), args.repeat)
+
+        deep = []
+        cursor = next_cursor
+        for _ in range(args.pages):
+            if not cursor:
+                break
+            (_, cursor), samples = time_call(lambda: Repo.search_reviews(query, cursor=cursor), 1)
+            deep.extend(samples)
+
+        hospital_id = hospital_ids[0] if hospital_ids else None
+        _, scoped = time_call(lambda: Repo.search_reviews(query, hospital_id=hospital_id), args.repeat)
+
+        entry = {
+            "query": query,
+            "shortest_term": min(len(t) for t in query.split()),
+            "first_page_hits": len(first_page),
+            "first_page": summarize(first),
+            "next_pages": summarize(deep) if deep else None,
+            "hospital_scoped": summarize(scoped)
+        }
+        report["queries"].append(entry)
+        logger.info(json.dumps(entry, ensure_ascii=False))
+
+    # Hangul terms are matched with LIKE (see apps.storage.search._term_filter)
+    plan_terms = [queries[0].split()[0]] + ([] if args.no_short else [SHORT_QUERIES[0]])
+    report["sample_plans"] = {}
+    with engine.connect() as conn:
+        for term in plan_terms:
+            plan = conn.execute(
+                text("EXPLAIN ANALYZE SELECT id FROM reviews WHERE content LIKE :q "
+                     "ORDER BY collected_at DESC, id DESC LIMIT 51"),
+                {"q": f"%{term}%"}
+            ).scalars().all()
+            report["sample_plans"][term] = plan
+            logger.info(f"Sample plan for {term!r}:\n" + "\n".join(plan))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
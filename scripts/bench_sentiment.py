@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Benchmark sentiment inference (apps.sentiment.worker.analyze_texts) across batch
+sizes, review-length distributions, thread counts and backends.
+
+Each configuration runs in a fresh subprocess so peak RSS and thread settings
+are isolated. Reports reviews/sec, p50/p99 batch latency and peak RSS as JSON.
+
+    # Fully offline: build a tiny random checkpoint and benchmark it
+    python scripts/bench_sentiment.py --make-tiny /tmp/tiny-electra --model /tmp/tiny-electra
+
+    # Production model, review lengths sampled from the database
+    python scripts/bench_sentiment.py --distributions db --lengths-from-db 5000 --output bench.json
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import platform
+import argparse
+import resource
+import statistics
+import subprocess
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PHRASES = [
+    "의사 선생님이 친절하세요", "간호사분들 설명이 자세해요", "대기시간이 너무 길어요", "접수 직원이 불친절해요",
+    "시설이 깨끗하고 좋아요", "주차가 불편해요", "과잉진료 같아서 불쾌했어요", "아이와 함께 갔는데 만족합니다",
+    "예약하고 갔는데도 오래 기다렸어요", "원장님이 꼼꼼하게 봐주셨어요", "다시는 안 갈 것 같아요", "재방문 의사 있어요",
+]
+
+# Review length (characters) distributions: lognormal (median, sigma), clipped to [5, 1000].
+# "default" approximates Naver place reviews: mostly short, with a long tail.
+DISTRIBUTIONS = {
+    "short": (20, 0.4),
+    "default": (45, 0.8),
+    "long": (250, 0.3),
+}
+
+
+def sample_lengths(distribution: str, count: int, rng: random.Random, lengths_pool=None) -> list:
+    if distribution in ("db", "file"):
+        if not lengths_pool:
+            raise ValueError(f"Distribution '{distribution}' needs --lengths-from-db or --lengths-file")
+        return [rng.choice(lengths_pool) for _ in range(count)]
+    median, sigma = DISTRIBUTIONS[distribution]
+    return [int(min(1000, max(5, rng.lognormvariate(0, sigma) * median))) for _ in range(count)]
+
+
+def synthetic_text(length: int, rng: random.Random) -> str:
+    parts = []
+    while sum(len(p) + 1 for p in parts) < length:
+        parts.append(rng.choice(PHRASES))
+    return " ".join(parts)[:length]
+
+
+def make_tiny_checkpoint(output_dir: str, layers: int = 2, hidden: int = 64):
+    """Random-weight ELECTRA classifier with a character vocabulary (no downloads)."""
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+    from transformers import ElectraConfig, ElectraForSequenceClassification, PreTrainedTokenizerFast
+
+    specials = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    chars = sorted(set("".join(PHRASES) + "0123456789.,!?") - {" "})
+    vocab = {token: i for i, token in enumerate(specials + chars + [f"##{c}" for c in chars])}
+
+    tokenizer = Tokenizer(models.WordPiece(vocab, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=False, strip_accents=False)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", pair="[CLS] $A [SEP] $B [SEP]",
+        special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])]
+    )
+    fast = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, unk_token="[UNK]", pad_token="[PAD]",
+        cls_token="[CLS]", sep_token="[SEP]", mask_token="[MASK]"
+    )
+
+    config = ElectraConfig(
+        vocab_size=len(vocab), embedding_size=hidden, hidden_size=hidden,
+        num_hidden_layers=layers, num_attention_heads=max(1, hidden // 32),
+        intermediate_size=hidden * 4, max_position_embeddings=512, num_labels=3
+    )
+    os.makedirs(output_dir, exist_ok=True)
+    fast.save_pretrained(output_dir)
+    ElectraForSequenceClassification(config).save_pretrained(output_dir)
+    print(f"Tiny checkpoint written to {output_dir}", file=sys.stderr)
+
+
+def load_lengths(args) -> list:
+    if args.lengths_file:
+        with open(args.lengths_file, encoding="utf-8") as f:
+            raw = f.read().strip()
+        return json.loads(raw) if raw.startswith("[") else [int(line) for line in raw.splitlines() if line.strip()]
+    if args.lengths_from_db:
+        from sqlalchemy import text
+        from apps.storage import engine
+        with engine.connect() as conn:
+            return list(conn.execute(
+                text("SELECT length(content) FROM reviews ORDER BY random() LIMIT :n"),
+                {"n": args.lengths_from_db}
+            ).scalars())
+    return []
+
+
+def run_one(config: dict) -> dict:
+    """Benchmark a single configuration in this (fresh) process."""
+    from apps.sentiment import worker, parallel
+
+    if config.get("model"):
+        worker.MODEL_NAME = config["model"]
+    parallel.apply_thread_settings(config["threads"], 1)
+
+    start = time.perf_counter()
+    worker.initialize_model()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(config["seed"])
+    lengths = sample_lengths(config["distribution"], config["reviews"], rng, config.get("lengths_pool"))
+    texts = [synthetic_text(length, rng) for length in lengths]
+    batch_size = config["batch_size"]
+
+    # Warm-up (allocator, kernels / ORT graph)
+    worker.analyze_texts(texts[:batch_size])
+
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        batch_start = time.perf_counter()
+        worker.analyze_texts(texts[i:i + batch_size])
+        latencies.append((time.perf_counter() - batch_start) * 1000)
+    total = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    return {
+        **{k: config[k] for k in ("backend", "threads", "batch_size", "distribution", "reviews")},
+        "mean_chars": round(statistics.mean(lengths), 1),
+        "reviews_per_sec": round(len(texts) / total, 1),
+        "batch_p50_ms": round(statistics.median(ordered), 2),
+        "batch_p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+        "model_load_ms": round(load_ms, 1),
+        # ru_maxrss is in KB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def run_isolated(config: dict, timeout: int) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "REV_SENTIMENT_BACKEND": config["backend"],
+        # The token budget follows the benchmarked batch size
+        "REV_SENTIMENT_BATCH_SIZE": str(config["batch_size"]),
+        "REV_SENTIMENT_MAX_BATCH_ITEMS": str(config["batch_size"]),
+        "REV_SENTIMENT_INTRA_OP_THREADS": str(config["threads"]),
+        "OMP_NUM_THREADS": str(config["threads"]),
+    })
+    env.pop("REV_SENTIMENT_TOKEN_BUDGET", None)
+    if config.get("onnx_path"):
+        env["REV_SENTIMENT_ONNX_PATH"] = config["onnx_path"]
+
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-one", json.dumps(config)],
+        env=env, capture_output=True, text=True, timeout=timeout
+    )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        return {**{k: config[k] for k in ("backend", "threads", "batch_size", "distribution")},
+                "error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"}
+    return json.loads(lines[-1])
+
+
+def int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Model name or local checkpoint (default: worker MODEL_NAME)")
+    parser.add_argument("--onnx-path", help="ONNX graph for the onnx backend (default: REV_SENTIMENT_ONNX_PATH)")
+    parser.add_argument("--backends", default="torch", help="Comma-separated: torch,onnx")
+    parser.add_argument("--batch-sizes", type=int_list, default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument("--threads", type=int_list, default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--distributions", default="short,default,long",
+                        help=f"Comma-separated: {','.join(DISTRIBUTIONS)},db,file")
+    parser.add_argument("--lengths-from-db", type=int, default=0, help="Sample N real review lengths (distribution 'db')")
+    parser.add_argument("--lengths-file", help="Review lengths, JSON list or one per line (distribution 'file')")
+    parser.add_argument("--reviews", type=int, default=256, help="Reviews per configuration")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=int, default=900, help="Seconds per configuration")
+    parser.add_argument("--make-tiny", metavar="DIR", help="Write a tiny random checkpoint to DIR first")
+    parser.add_argument("--output", help="Write JSON report to this path")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(json.loads(args.run_one))))
+        return 0
+
+    if args.make_tiny:
+        make_tiny_checkpoint(args.make_tiny)
+
+    lengths_pool = load_lengths(args)
+    results = []
+    for backend in args.backends.split(","):
+        for distribution in args.distributions.split(","):
+            for threads in args.threads:
+                for batch_size in args.batch_sizes:
+                    config = {
+                        "backend": backend, "threads": threads, "batch_size": batch_size,
+                        "distribution": distribution, "reviews": args.reviews, "seed": args.seed,
+                        "model": args.model, "onnx_path": args.onnx_path,
+                        "lengths_pool": lengths_pool if distribution in ("db", "file") else None
+                    }
+                    result = run_isolated(config, args.timeout)
+                    results.append(result)
+                    print(json.dumps(result, ensure_ascii=False), file=sys.stderr)
+
+    best = {}
+    for result in results:
+        if "error" in result:
+            continue
+        key = f"{result['backend']}/{result['distribution']}"
+        if key not in best or result["reviews_per_sec"] > best[key]["reviews_per_sec"]:
+            best[key] = result
+
+    report = {
+        "environment": {
+            "cpu_count": os.cpu_count(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "model": args.model or "default"
+        },
+        "results": results,
+        "best_by_backend_distribution": best
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
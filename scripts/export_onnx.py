@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Export the sentiment model to ONNX (int8-quantised by default) and verify it
+against the PyTorch backend.
+
+    python scripts/export_onnx.py                      # export + verify
+    python scripts/export_onnx.py --verify-only        # verify an existing export
+"""
+
+import sys
+import os
+import json
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apps.sentiment.backends import (
+    TorchBackend, OnnxBackend, export_onnx, compare_backends,
+    SCORE_TOLERANCE, LABEL_AGREEMENT_MIN
+)
+from apps.sentiment.worker import MODEL_NAME
+from apps.common import settings, get_logger
+
+logger = get_logger(__name__)
+
+# Fallback verification sample when --texts-file is not given
+SAMPLE_TEXTS = [
+    "친절하고 꼼꼼하게 진료해주셔서 감사합니다",
+    "대기시간이 너무 길고 직원분들이 불친절했어요",
+    "그냥 보통이에요",
+    "원장님 설명이 자세해서 좋았습니다. 재방문 의사 있어요",
+    "예약했는데도 한 시간 넘게 기다렸습니다. 다시는 안 갈 것 같아요",
+    "주차가 불편하지만 진료는 만족스러웠어요",
+    "과잉진료 같아서 기분이 나빴어요",
+    "깨끗하고 좋아요",
+]
+
+
+def load_texts(path):
+    if not path:
+        return SAMPLE_TEXTS
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output-dir", default=os.path.dirname(settings.sentiment_onnx_path))
+    parser.add_argument("--no-quantize", action="store_true", help="Keep the fp32 graph")
+    parser.add_argument("--verify-only", action="store_true")
+    parser.add_argument("--onnx-path", help="Graph to verify (default: the one just exported)")
+    parser.add_argument("--texts-file", help="One review per line to verify on")
+    args = parser.parse_args()
+
+    onnx_path = args.onnx_path or settings.sentiment_onnx_path
+    if not args.verify_only:
+        onnx_path = export_onnx(MODEL_NAME, args.output_dir, quantize=not args.no_quantize)
+
+    report = compare_backends(
+        TorchBackend(MODEL_NAME), OnnxBackend(MODEL_NAME, onnx_path), load_texts(args.texts_file)
+    )
+    report["tolerance"] = {"max_score_diff": SCORE_TOLERANCE, "min_label_agreement": LABEL_AGREEMENT_MIN}
+    print(json.dumps(report, indent=2))
+
+    if not report["within_tolerance"]:
+        logger.error("ONNX outputs exceed the documented tolerance; do not enable REV_SENTIMENT_BACKEND=onnx")
+        sys.exit(1)
+    logger.info(f"ONNX model verified: set REV_SENTIMENT_ONNX_PATH={onnx_path} and REV_SENTIMENT_BACKEND=onnx")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Measure sentiment worker startup: import cost, model load, first-inference
+latency and the memory a forked pool child shares with its parent.
+
+    python scripts/measure_sentiment_startup.py
+    python scripts/measure_sentiment_startup.py --model /path/to/checkpoint --output startup.json
+
+Run it in a fresh interpreter: the import timings are only meaningful cold.
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import resource
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_TEXTS = [
+    "친절하고 꼼꼼하게 진료해주셔서 감사합니다",
+    "대기시간이 너무 길고 직원분들이 불친절했어요",
+    "그냥 보통이에요",
+]
+
+
+def elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def smaps_rollup() -> dict:
+    """Shared vs private resident memory of this process (Linux only)."""
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        return {}
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "shared_mb": round((fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)) / 1024, 1),
+        "private_mb": round((fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024, 1)
+    }
+
+
+def measure_forked_child(worker) -> dict:
+    """Fork like a Celery prefork pool and time the child's first inference."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        start = time.perf_counter()
+        worker.analyze_texts(SAMPLE_TEXTS)
+        report = {"first_inference_ms": elapsed_ms(start), "memory": smaps_rollup()}
+        os.write(write_fd, json.dumps(report).encode("utf-8"))
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as stream:
+        payload = stream.read()
+    os.waitpid(pid, 0)
+    return json.loads(payload) if payload else {"error": "child produced no report"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Model name or local checkpoint (default: worker MODEL_NAME)")
+    parser.add_argument("--no-fork", action="store_true", help="Skip the forked-child measurement")
+    parser.add_argument("--output", help="Write JSON report to this path")
+    args = parser.parse_args()
+
+    report = {}
+
+    start = time.perf_counter()
+    from apps.sentiment import worker
+    report["import_worker_ms"] = elapsed_ms(start)
+    report["heavy_modules_after_import"] = [m for m in ("torch", "transformers", "onnxruntime") if m in sys.modules]
+
+    if args.model:
+        worker.MODEL_NAME = args.model
+
+    # Loading in the parent mirrors the Celery worker_init preload
+    start = time.perf_counter()
+    worker.preload_model(before_fork=True)
+    if worker.backend is None:
+        worker.initialize_model()  # Backend not preloadable before fork (CUDA / ONNX)
+    report["model_load_ms"] = elapsed_ms(start)
+    report["backend"] = worker.backend.name
+
+    if not args.no_fork and hasattr(os, "fork"):
+        report["forked_child"] = measure_forked_child(worker)
+
+    start = time.perf_counter()
+    worker.analyze_texts(SAMPLE_TEXTS)
+    report["first_inference_ms"] = elapsed_ms(start)
+
+    start = time.perf_counter()
+    worker.analyze_texts(SAMPLE_TEXTS)
+    report["warm_inference_ms"] = elapsed_ms(start)
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    report["memory"] = smaps_rollup()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
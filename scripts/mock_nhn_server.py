@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Local mock of the NHN Cloud AlimTalk (v2.3) and SMS (v3.0) send APIs with
+fault injection, for exercising notification retries and the SMS fallback.
+
+    python scripts/mock_nhn_server.py --port 8089 --timeout-rate 0.2 --error-rate 0.1
+
+    REV_ALIM_BASE_URL=http://127.0.0.1:8089 REV_SMS_BASE_URL=http://127.0.0.1:8089 \\
+    REV_NOTIFY_HTTP_TIMEOUT_SEC=2 celery -A apps.scheduler.main worker
+
+Faults are drawn per request (timeout, HTTP 500) and per recipient (result
+code); --rate-limit answers requests beyond N per second with HTTP 429 and
+Retry-After. Every request is printed as one JSON line; GET /stats returns counters.
+"""
+
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockState:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "recipients": 0, "timeouts": 0, "errors": 0,
+                      "recipient_errors": 0, "replays": 0, "throttled": 0}
+        self.window = (0, 0)  # (second, requests in it) for --rate-limit
+        self.seen_keys = {}  # idempotency key -> response (replayed, not re-sent)
+
+    def draw(self, rate: float) -> bool:
+        with self.lock:
+            return self.rng.random() < rate
+
+    def over_rate_limit(self) -> bool:
+        if not self.args.rate_limit:
+            return False
+        with self.lock:
+            second = int(time.time())
+            count = self.window[1] + 1 if self.window[0] == second else 1
+            self.window = (second, count)
+            if count > self.args.rate_limit:
+                self.stats["throttled"] += 1
+                return True
+            return False
+
+
+class Handler(BaseHTTPRequestHandler):
+    state: MockState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, data: dict):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.state.stats)
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        state = self.state
+        args = state.args
+        is_sms = "/sms/" in self.path
+        if not (is_sms or "/alimtalk/" in self.path):
+            self._send_json(404, {"header": {"isSuccessful": False, "resultCode": -404, "resultMessage": "Not found"}})
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+        if state.over_rate_limit():
+            payload = json.dumps({"header": {"isSuccessful": False, "resultCode": -429,
+                                             "resultMessage": "Too many requests"}}).encode("utf-8")
+            self.send_response(429)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        recipients = body.get("recipientList", [])
+        key = self.headers.get("X-NC-API-IDEMPOTENCY-KEY")
+
+        with state.lock:
+            state.stats["requests"] += 1
+            state.stats["recipients"] += len(recipients)
+            replay = state.seen_keys.get(key) if key else None
+            if replay:
+                state.stats["replays"] += 1
+
+        event = {"api": "sms" if is_sms else "alimtalk", "recipients": len(recipients), "key": (key or "")[:12]}
+
+        if args.delay_ms:
+            time.sleep(args.delay_ms / 1000)
+
+        if replay:
+            event["result"] = "replay"
+            print(json.dumps(event), flush=True)
+            self._send_json(200, replay)
+            return
+
+        if state.draw(args.timeout_rate):
+            with state.lock:
+                state.stats["timeouts"] += 1
+            event["result"] = "timeout"
+            print(json.dumps(event), flush=True)
+            time.sleep(args.hang_sec)  # Longer than the client timeout
+            return
+
+        if state.draw(args.error_rate):
+            with state.lock:
+                state.stats["errors"] += 1
+            event["result"] = "error"
+            print(json.dumps(event), flush=True)
+            self._send_json(500, {"header": {"isSuccessful": False, "resultCode": -9999,
+                                             "resultMessage": "Injected server error"}})
+            return
+
+        send_results = []
+        for seq, recipient in enumerate(recipients, start=1):
+            failed = state.draw(args.recipient_error_rate)
+            if failed:
+                with state.lock:
+                    state.stats["recipient_errors"] += 1
+            send_results.append({
+                "recipientSeq": seq,
+                "recipientNo": recipient.get("recipientNo"),
+                "resultCode": args.error_code if failed else 0,
+                "resultMessage": "Injected recipient error" if failed else "SUCCESS"
+            })
+
+        request_id = f"{time.strftime('%Y%m%d%H%M%S')}{uuid.uuid4().hex[:8]}"
+        header = {"isSuccessful": True, "resultCode": 0, "resultMessage": "SUCCESS"}
+        if is_sms:
+            response = {"header": header, "body": {"data": {
+                "requestId": request_id, "statusCode": "2", "sendResultList": send_results
+            }}}
+        else:
+            response = {"header": header, "message": {"requestId": request_id, "sendResults": send_results}}
+
+        if key:
+            with state.lock:
+                state.seen_keys[key] = response
+        event["result"] = "ok"
+        event["recipient_errors"] = sum(1 for r in send_results if r["resultCode"] != 0)
+        print(json.dumps(event), flush=True)
+        self._send_json(200, response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Share of requests that hang")
+    parser.add_argument("--hang-sec", type=float, default=35.0, help="How long a timed-out request hangs")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with HTTP 500")
+    parser.add_argument("--recipient-error-rate", type=float, default=0.0,
+                        help="Share of recipients failed with --error-code")
+    parser.add_argument("--error-code", type=int, default=-3018, help="Per-recipient failure result code")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Requests per second before HTTP 429 (0 = off)")
+    parser.add_argument("--delay-ms", type=int, default=0, help="Latency added to every request")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    Handler.state = MockState(args)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    print(f"Mock NHN server on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
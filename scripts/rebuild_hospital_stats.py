@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""Rebuild incrementally maintained hospital stats from reviews and flagged_reviews."""
+
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apps.storage import Repo
+from apps.common import get_logger
+
+logger = get_logger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hospital-id", help="Rebuild a single hospital (default: all)")
+    args = parser.parse_args()
+
+    logger.info(f"Rebuilding hospital stats ({args.hospital_id or 'all hospitals'})...")
+    count = Repo.rebuild_hospital_stats(args.hospital_id)
+    logger.info(f"Hospital stats rebuilt for {count} hospitals")
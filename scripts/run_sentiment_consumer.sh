@@ -0,0 +1,13 @@
+#!/bin/bash
+# Run the new-review sentiment consumer, restarting it if it exits
+
+trap 'kill "${CONSUMER_PID}" 2>/dev/null; exit 0' INT TERM
+
+while true; do
+    echo "Starting sentiment consumer..."
+    python -m apps.sentiment.consumer &
+    CONSUMER_PID=$!
+    wait "${CONSUMER_PID}"
+    echo "Sentiment consumer exited with status $?, restarting in 5s..."
+    sleep 5
+done
@@ -0,0 +1,15 @@
+#!/bin/bash
+# Run the shared sentiment inference server (one per machine), restarting it if it exits
+
+SOCKET="${REV_SENTIMENT_SERVER_SOCKET:-/tmp/revmon-sentiment.sock}"
+
+trap 'kill "${SERVER_PID}" 2>/dev/null; exit 0' INT TERM
+
+while true; do
+    echo "Starting sentiment server on ${SOCKET}..."
+    python -m apps.sentiment.server --socket "${SOCKET}" &
+    SERVER_PID=$!
+    wait "${SERVER_PID}"
+    echo "Sentiment server exited with status $?, restarting in 5s..."
+    sleep 5
+done